@@ -3,35 +3,184 @@ FeedbackCraft AI - Main Application
 Professional feedback enhancement tool using AI
 """
 
-import gradio as gr
-from typing import Tuple, Optional
+import atexit
 import os
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Tuple
 
-from core.prompt_builder import build_prompt
-from core.model_client import ModelClient
-from core.validators import (
-    validate_feedback_text,
-    validate_feedback_type,
-    validate_tone,
-    validate_formality,
-    sanitize_text
-)
-from core.formatters import format_full_output, create_copy_text
+from core.admission import ServiceBusyError, client_id
+from core.compression import compression_ratio_from_env
+from core.formatters import format_full_output, format_fis, format_suggestions, create_copy_text
+from core.metrics import metrics, timed
+from core.service import FeedbackService, InvalidFeedbackError
+from core.token_budget import PromptTooLongError
 
+if TYPE_CHECKING:
+    # Gradio takes seconds to import; it loads in create_interface() only
+    import gradio as gr
 
-# Initialize model client
-model_client = ModelClient(
-    model_name=os.getenv("HF_MODEL_NAME", "meta-llama/Meta-Llama-3.1-8B-Instruct"),
-    api_key=os.getenv("HF_API_KEY", ""),
-    use_local=os.getenv("USE_LOCAL_MODEL", "false").lower() == "true"
-)
+    from core.resilience import CircuitBreaker
 
 
-def process_feedback(
+# Show the offline fast engine's answer while the model streams
+FAST_PREVIEW = os.getenv("FAST_PREVIEW", "true").lower() == "true"
+
+# "reject", "truncate" or "compress" feedback that does not fit the model context
+PROMPT_OVERFLOW = os.getenv("PROMPT_OVERFLOW", "reject")
+
+# Compress drafts before prompting (unset: off; 1.0 only removes quoted
+# replies, signatures and repetition; lower values also drop sentences)
+PROMPT_COMPRESSION_RATIO = compression_ratio_from_env()
+
+# Admission control: model calls running at once, requests allowed to wait
+# for one (the rest get an immediate "busy" answer) and the longest wait
+MODEL_CONCURRENCY = int(os.getenv("MODEL_CONCURRENCY", 4))
+QUEUE_MAX_WAITING = int(os.getenv("QUEUE_MAX_WAITING", 16))
+QUEUE_WAIT_TIMEOUT = float(os.getenv("QUEUE_WAIT_TIMEOUT", 30)) or None
+
+# Gradio queue bound (requests not yet handed to a worker); beyond it Gradio
+# rejects new events itself
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", 64))
+
+# Per-stage latency histograms and counters (core.metrics), served on
+# /metrics with API_ENABLED or on METRICS_PORT; off by default
+if os.getenv("METRICS_ENABLED", "false").lower() == "true":
+    metrics.enable()
+
+_service: Optional[FeedbackService] = None
+_service_lock = threading.Lock()
+
+
+def export_circuit(breaker: "CircuitBreaker") -> None:
+    """Export a circuit breaker's state and transitions (feedbackcraft_circuit_*)."""
+    metrics.record_circuit(breaker.name, None, breaker.state)
+    breaker.add_listener(lambda old_state, new_state: metrics.record_circuit(breaker.name, old_state, new_state))
+
+
+def create_service() -> FeedbackService:
+    """
+    Build the model client and the pipeline around it from the environment.
+
+    Returns:
+        FeedbackService shared by the interface and the HTTP API
+    """
+    from core.admission import AdmissionController, create_rate_limiter
+    from core.async_model_client import AsyncModelClient
+    from core.cache import create_cache
+    from core.resilience import CircuitBreaker, RetryPolicy
+    from core.router import router_from_env
+    from core.semantic_cache import create_semantic_cache
+
+    retry_policy = RetryPolicy(
+        max_attempts=int(os.getenv("HF_RETRY_ATTEMPTS", 3)),
+        deadline=float(os.getenv("HF_RETRY_DEADLINE", 60))
+    )
+
+    model_client = AsyncModelClient(
+        model_name=os.getenv("HF_MODEL_NAME", "meta-llama/Meta-Llama-3.1-8B-Instruct"),
+        api_key=os.getenv("HF_API_KEY", ""),
+        use_local=os.getenv("USE_LOCAL_MODEL", "false").lower() == "true",
+        # Dedicated endpoint (e.g. a TGI server) instead of the serverless Inference API
+        api_url=os.getenv("HF_API_URL") or None,
+        cache=create_cache(
+            backend=os.getenv("RESPONSE_CACHE", "memory"),
+            max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 1024)),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", 3600)),
+            path=os.getenv("RESPONSE_CACHE_PATH", "feedback_cache.sqlite3")
+        ),
+        # Serve enhancements of near-duplicate drafts (SEMANTIC_CACHE_MODEL:
+        # "hashing", "default" or a sentence-transformers model; off when unset)
+        semantic_cache=create_semantic_cache(
+            model=os.getenv("SEMANTIC_CACHE_MODEL", "off"),
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.9)),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", 2048)),
+            path=os.getenv("SEMANTIC_CACHE_PATH", ""),
+            index=os.getenv("SEMANTIC_CACHE_INDEX", "auto")
+        ),
+        retry_policy=retry_policy,
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=float(os.getenv("CIRCUIT_FAILURE_RATE", 0.5)),
+            window=int(os.getenv("CIRCUIT_WINDOW", 20)),
+            cooldown=float(os.getenv("CIRCUIT_COOLDOWN", 30))
+        ),
+        # Several equivalent endpoints (ROUTER_CONFIG / ROUTER_BACKENDS), if configured
+        router=router_from_env(AsyncModelClient, retry_policy=retry_policy)
+    )
+
+    export_circuit(model_client.circuit_breaker)
+    if model_client.router is not None:
+        for target in model_client.router.targets:
+            export_circuit(target.client.circuit_breaker)
+
+    # Persist the semantic cache (SEMANTIC_CACHE_PATH) on shutdown
+    if model_client.semantic_cache is not None:
+        atexit.register(model_client.semantic_cache.save)
+
+    return FeedbackService(
+        model_client,
+        admission=AdmissionController(
+            max_concurrent=MODEL_CONCURRENCY,
+            max_waiting=QUEUE_MAX_WAITING,
+            wait_timeout=QUEUE_WAIT_TIMEOUT
+        ),
+        # Requests per minute per client (0 disables) and back-to-back burst
+        rate_limiter=create_rate_limiter(
+            per_minute=float(os.getenv("RATE_LIMIT_PER_MINUTE", 10)),
+            burst=int(os.getenv("RATE_LIMIT_BURST", 5))
+        ),
+        on_overflow=PROMPT_OVERFLOW,
+        compression_ratio=PROMPT_COMPRESSION_RATIO,
+        fast_preview=FAST_PREVIEW
+    )
+
+
+def get_service() -> FeedbackService:
+    """Pipeline shared by the interface and the HTTP API, created on first use."""
+    global _service
+    service = _service
+    if service is None:
+        with _service_lock:
+            service = _service
+            if service is None:
+                service = _service = create_service()
+    return service
+
+
+@timed("format")
+def format_result(response_data: dict) -> Tuple[str, str, str, str, str]:
+    """Format a parsed response as the tuple shown by the interface."""
+    formatted = format_full_output(response_data)
+    copy_text = create_copy_text(response_data)
+
+    return (
+        formatted["feedback_aprimorado"],
+        formatted["versao_curta"],
+        formatted["fato_impacto_sugestao"],
+        formatted["sugestoes_extras"],
+        copy_text
+    )
+
+
+def format_partial_result(partial_data: dict) -> Tuple[str, str, str, str, str]:
+    """Format the fields received so far while the response is still streaming."""
+    fis = partial_data.get("fato_impacto_sugestao")
+    sugestoes = partial_data.get("sugestoes_extras")
+
+    return (
+        str(partial_data.get("feedback_aprimorado", "")),
+        str(partial_data.get("versao_curta", "")),
+        format_fis(fis) if isinstance(fis, dict) else "",
+        format_suggestions(sugestoes) if isinstance(sugestoes, list) else "",
+        ""
+    )
+
+
+async def process_feedback(
     feedback_text: str,
     feedback_type: str,
     tone: str,
-    formality: str
+    formality: str,
+    request: Optional["gr.Request"] = None
 ) -> Tuple[str, str, str, str, str]:
     """
     Process feedback and return enhanced versions.
@@ -41,56 +190,65 @@ def process_feedback(
         feedback_type: Type of feedback
         tone: Desired tone
         formality: Formality level
+        request: Incoming request (injected by Gradio), used for rate limiting
 
     Returns:
         Tuple of (enhanced_feedback, short_version, fis_format, suggestions, copy_text)
     """
-    # Validate inputs
-    is_valid, error_msg = validate_feedback_text(feedback_text)
-    if not is_valid:
-        return error_msg, "", "", "", ""
-
-    is_valid, error_msg = validate_feedback_type(feedback_type)
-    if not is_valid:
-        return error_msg, "", "", "", ""
-
-    is_valid, error_msg = validate_tone(tone)
-    if not is_valid:
-        return error_msg, "", "", "", ""
-
-    is_valid, error_msg = validate_formality(formality)
-    if not is_valid:
-        return error_msg, "", "", "", ""
+    try:
+        response_data = await get_service().enhance(
+            feedback_text, feedback_type, tone, formality, client_id=client_id(request)
+        )
+        return format_result(response_data)
+    except (InvalidFeedbackError, PromptTooLongError, ServiceBusyError) as e:
+        return str(e), "", "", "", ""
+    except Exception as e:
+        error_message = f"Erro ao processar feedback: {str(e)}"
+        return error_message, "", "", "", ""
 
-    # Sanitize input
-    feedback_text = sanitize_text(feedback_text)
 
-    # Build prompt
-    prompt = build_prompt(feedback_text, feedback_type, tone, formality)
+async def process_feedback_stream(
+    feedback_text: str,
+    feedback_type: str,
+    tone: str,
+    formality: str,
+    request: Optional["gr.Request"] = None
+) -> AsyncIterator[Tuple[str, str, str, str, str]]:
+    """
+    Streaming variant of process_feedback for the interface.
 
-    # Generate response
+    The offline fast engine's result is shown first (unless FAST_PREVIEW is
+    "false"); each section is then replaced as soon as its part of the
+    streamed JSON arrives, and the fully formatted result is yielded at the end.
+    Cache misses wait for a model slot (see admission); rejected or
+    rate-limited requests get a "busy" message instead.
+    """
     try:
-        response_text = model_client.generate(prompt)
-        response_data = model_client.parse_response(response_text)
-
-        # Format output
-        formatted = format_full_output(response_data)
-        copy_text = create_copy_text(response_data)
-
-        return (
-            formatted["feedback_aprimorado"],
-            formatted["versao_curta"],
-            formatted["fato_impacto_sugestao"],
-            formatted["sugestoes_extras"],
-            copy_text
-        )
+        async for done, data in get_service().enhance_stream(
+            feedback_text, feedback_type, tone, formality, client_id=client_id(request)
+        ):
+            yield format_result(data) if done else format_partial_result(data)
+    except (InvalidFeedbackError, PromptTooLongError, ServiceBusyError) as e:
+        yield str(e), "", "", "", ""
     except Exception as e:
         error_message = f"Erro ao processar feedback: {str(e)}"
-        return error_message, "", "", "", ""
+        yield error_message, "", "", "", ""
 
 
 def create_interface():
     """Create and configure Gradio interface."""
+    import gradio as gr
+
+    async def enhance_feedback(
+        feedback_text: str,
+        feedback_type: str,
+        tone: str,
+        formality: str,
+        request: gr.Request
+    ) -> AsyncIterator[Tuple[str, str, str, str, str]]:
+        # Gradio injects the request only when it sees the gr.Request hint
+        async for outputs in process_feedback_stream(feedback_text, feedback_type, tone, formality, request):
+            yield outputs
 
     # Custom CSS for better styling
     custom_css = """
@@ -237,10 +395,15 @@ def create_interface():
         )
 
         # Event handlers
+        # Running and waiting requests are bounded by `admission`, which
+        # answers "busy" itself; Gradio only needs to hand them over
         process_btn.click(
-            fn=process_feedback,
+            fn=enhance_feedback,
             inputs=[feedback_input, feedback_type, tone, formality],
-            outputs=[enhanced_output, short_output, fis_output, suggestions_output, copy_text_output]
+            outputs=[enhanced_output, short_output, fis_output, suggestions_output, copy_text_output],
+            api_name="process_feedback_stream",
+            concurrency_limit=MODEL_CONCURRENCY + QUEUE_MAX_WAITING,
+            concurrency_id="model"
         )
 
         # Copy button functionality - using Gradio 5.x native copy
@@ -254,13 +417,30 @@ def create_interface():
             outputs=[copy_text_output]
         )
 
+    app.queue(max_size=QUEUE_MAX_SIZE)
     return app
 
 
 if __name__ == "__main__":
+    import gradio as gr
+
     app = create_interface()
-    app.launch(
-        server_name="0.0.0.0" if os.getenv("SPACE_ID") else "127.0.0.1",
-        server_port=int(os.getenv("PORT", 7860)),
-        share=False
-    )
+    server_name = "0.0.0.0" if os.getenv("SPACE_ID") else "127.0.0.1"
+    server_port = int(os.getenv("PORT", 7860))
+    if metrics.enabled and os.getenv("METRICS_PORT"):
+        from core.metrics import serve_metrics
+
+        serve_metrics(int(os.getenv("METRICS_PORT", 9090)))
+    if os.getenv("API_ENABLED", "false").lower() == "true":
+        # JSON API under /api/v1 with the interface mounted at "/", one server
+        import uvicorn
+        from core.http_api import create_api
+
+        api = create_api(get_service(), max_batch_items=int(os.getenv("API_MAX_BATCH_ITEMS", 32)))
+        uvicorn.run(gr.mount_gradio_app(api, app, path="/"), host=server_name, port=server_port)
+    else:
+        app.launch(
+            server_name=server_name,
+            server_port=server_port,
+            share=False
+        )
@@ -0,0 +1,112 @@
+"""
+Benchmark: prompt compression of long drafts.
+
+For each target ratio, compresses the drafts in fixtures/long_drafts.txt and
+reports compression latency, prompt tokens saved and two offline quality
+proxies against the uncompressed draft:
+  - cues kept: share of sentences with fato/impacto/sugestão cues that
+    survive compression
+  - FIS agreement: share of FIS parts for which the offline fast engine
+    picks the same sentence from the compressed and the original draft
+
+With --live, each draft is also enhanced by the configured model (see
+ModelClient; HF_API_KEY, USE_LOCAL_MODEL, ...) with and without compression,
+reporting latency and the similarity of feedback_aprimorado:
+    python -m benchmarks.bench_compression --live --ratios 1.0 0.6
+"""
+
+import argparse
+import difflib
+import statistics
+import time
+from pathlib import Path
+from typing import List
+
+from core.compression import compress_feedback
+from core.fast_engine import get_fast_engine, score_sentence, split_sentences
+from core.prompt_builder import build_budgeted_prompt
+from core.token_budget import TokenBudget
+from core.validators import sanitize_text
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "long_drafts.txt"
+
+
+def load_drafts(path: Path = FIXTURES) -> List[str]:
+    """Read the fixture corpus (drafts separated by "%%%" lines, "#" header)."""
+    lines = [line for line in path.read_text(encoding="utf-8").splitlines() if not line.startswith("#")]
+    return [sanitize_text(d) for d in "\n".join(lines).split("\n%%%\n") if d.strip()]
+
+
+def _cue_sentences(text: str) -> set:
+    return {s for s in split_sentences(text) if any(score_sentence(s))}
+
+
+def _fis_agreement(original: str, compressed: str) -> float:
+    engine = get_fast_engine()
+    a = engine.enhance(original)["fato_impacto_sugestao"]
+    b = engine.enhance(compressed)["fato_impacto_sugestao"]
+    return sum(a[part] == b[part] for part in a) / len(a)
+
+
+def _time_compress(draft: str, ratio: float, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compress_feedback(draft, ratio)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ratios", type=float, nargs="+", default=[1.0, 0.7, 0.5])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="Also run the configured model")
+    args = parser.parse_args()
+
+    drafts = load_drafts()
+    budget = TokenBudget()
+    base_draft_tokens = [budget.count(d) for d in drafts]
+    base_tokens = [build_budgeted_prompt(d, budget=budget).prompt_tokens for d in drafts]
+    print(f"{len(drafts)} drafts, {statistics.mean(base_draft_tokens):.0f} draft tokens and "
+          f"{statistics.mean(base_tokens):.0f} prompt tokens on average (uncompressed)\n")
+    print(f"{'ratio':>5} {'latency':>9} {'draft tok':>9} {'saved':>6} {'prompt tok':>10} {'saved':>6} "
+          f"{'cues kept':>9} {'FIS agree':>9}")
+
+    client = None
+    if args.live:
+        from core.model_client import ModelClient
+        client = ModelClient()
+
+    for ratio in args.ratios:
+        latencies, draft_tokens, tokens, cues, agreement, similarity, model_time = [], [], [], [], [], [], []
+        for draft in drafts:
+            compressed = compress_feedback(draft, ratio).text
+            latencies.append(_time_compress(draft, ratio, args.repeat))
+            draft_tokens.append(budget.count(compressed))
+            tokens.append(build_budgeted_prompt(compressed, budget=budget).prompt_tokens)
+            original_cues = _cue_sentences(draft)
+            cues.append(len(original_cues & _cue_sentences(compressed)) / max(1, len(original_cues)))
+            agreement.append(_fis_agreement(draft, compressed))
+            if client is not None:
+                start = time.perf_counter()
+                full = client.enhance(build_budgeted_prompt(draft).prompt, use_cache=False)
+                middle = time.perf_counter()
+                short = client.enhance(build_budgeted_prompt(compressed).prompt, use_cache=False)
+                model_time.append((middle - start, time.perf_counter() - middle))
+                similarity.append(difflib.SequenceMatcher(
+                    None, str(full.get("feedback_aprimorado", "")), str(short.get("feedback_aprimorado", ""))
+                ).ratio())
+
+        draft_saved = 1 - sum(draft_tokens) / sum(base_draft_tokens)
+        saved = 1 - sum(tokens) / sum(base_tokens)
+        print(f"{ratio:>5.2f} {statistics.mean(latencies) * 1e6:>6.0f} us {statistics.mean(draft_tokens):>9.0f} "
+              f"{draft_saved:>6.0%} {statistics.mean(tokens):>10.0f} {saved:>6.0%} "
+              f"{statistics.mean(cues):>9.0%} {statistics.mean(agreement):>9.0%}")
+        if client is not None:
+            print(f"      model: {statistics.mean(t[0] for t in model_time):.2f} s uncompressed, "
+                  f"{statistics.mean(t[1] for t in model_time):.2f} s compressed, "
+                  f"feedback_aprimorado similarity {statistics.mean(similarity):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: cold per-call connections vs pooled keep-alive session.
+
+Usage:
+    python -m benchmarks.bench_connection_pool [--requests N]
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from core.model_client import ModelClient
+
+
+def _measure(fn, n: int) -> list:
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<8} mean={statistics.mean(timings):.3f}ms "
+          f"p50={statistics.median(timings):.3f}ms p95={p95:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        payload = {"inputs": "prompt", "parameters": {}}
+
+        def cold():
+            # Same path as the old implementation: new connection on every call
+            requests.post(server.url, json=payload, timeout=60).json()
+
+        client = ModelClient()
+        client.api_url = server.url
+
+        def pooled():
+            client.generate("prompt")
+
+        pooled()  # warm the pool
+        _report("cold", _measure(cold, args.requests))
+        _report("pooled", _measure(pooled, args.requests))
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Benchmark: end-to-end throughput and latency against a local Inference API stub.
+
+Starts benchmarks.stub_server in a child process, with configurable
+latency, random 500 errors, bursts of 503 "model loading" answers and
+streaming speed. It then drives each target at several concurrency levels:
+
+    client   ModelClient.enhance() on a thread pool (the sync path of core.batch)
+    service  app.process_feedback(), the full async pipeline behind the interface
+    stream   app.process_feedback_stream(), also timing the first partial output
+
+Every request uses a distinct draft, so neither the response cache nor
+request coalescing hides upstream calls. The report has throughput,
+p50/p95/p99 latency, the fallback rate (answers not coming from the model)
+and the process memory. --output writes it as JSON. --baseline compares
+with a JSON written by an earlier run, e.g. on another commit.
+
+Usage:
+    python -m benchmarks.bench_e2e [--targets client,service,stream] [--concurrency 1,8,32]
+        [--requests N] [--latency S] [--error-rate P] [--burst-every N --burst-length N]
+        [--token-latency S] [--output results.json] [--baseline previous.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.stub_server import STUB_RESPONSE, StubProcess
+
+
+DRAFTS = (
+    "você precisa melhorar sua comunicação com a equipe. está difícil trabalhar assim.",
+    "o código que você entregou tinha muitos bugs. precisa ser mais cuidadoso.",
+    "parabéns pelo projeto! mas acho que poderia ter sido entregue antes.",
+    "O relatório atrasou dois dias e isso gerou retrabalho para o time.",
+)
+
+# (latency in seconds, seconds to the first output or None, outcome)
+Sample = Tuple[float, Optional[float], str]
+
+
+def make_drafts(n: int) -> List[str]:
+    """n distinct drafts (identical ones would be cached or coalesced)."""
+    return [f"{DRAFTS[i % len(DRAFTS)]} (caso {i})" for i in range(n)]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def memory_mb() -> Tuple[float, float]:
+    """Current and peak resident memory of this process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        current = peak
+    return current, max(current, peak)
+
+
+def outcome_of(response_data: Dict[str, Any]) -> str:
+    """"ok", or "fallback:<cause>" for a degraded ModelClient response."""
+    meta = response_data.get("_meta", {})
+    if meta.get("fallback"):
+        return f"fallback:{meta.get('cause', 'unknown')}"
+    if meta.get("parse_error"):
+        return "fallback:parse_error"
+    return "ok"
+
+
+def outcome_of_outputs(outputs: Tuple[str, ...]) -> str:
+    """Outcome of process_feedback's formatted outputs, judged by their first field."""
+    if outputs[0] == STUB_RESPONSE["feedback_aprimorado"]:
+        return "ok"
+    if outputs[0].startswith("Erro ao processar feedback") or not outputs[1]:
+        return "error"
+    return "fallback"
+
+
+def run_threads(call: Callable[[str], str], drafts: List[str], concurrency: int) -> List[Sample]:
+    """Run call over drafts on a pool of concurrency threads."""
+    def timed(draft: str) -> Sample:
+        start = time.perf_counter()
+        try:
+            outcome = call(draft)
+        except Exception:
+            outcome = "error"
+        return time.perf_counter() - start, None, outcome
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, drafts))
+
+
+async def run_tasks(call: Callable[[str], Any], drafts: List[str], concurrency: int) -> List[Sample]:
+    """Run the coroutine function call over drafts with concurrency workers."""
+    pending = iter(drafts)
+    samples: List[Sample] = []
+
+    async def worker() -> None:
+        for draft in pending:
+            start = time.perf_counter()
+            try:
+                first, outcome = await call(draft, start)
+            except Exception:
+                first, outcome = None, "error"
+            samples.append((time.perf_counter() - start, first, outcome))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles and outcome rates of one run."""
+    latencies = sorted(latency * 1000 for latency, _, _ in samples)
+    outcomes = Counter(outcome for _, _, outcome in samples)
+    fallbacks = {outcome.partition(":")[2] or "unknown": count
+                 for outcome, count in outcomes.items() if outcome.startswith("fallback")}
+    summary = {
+        "requests": len(samples),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0
+        },
+        "fallback_rate": round(sum(fallbacks.values()) / len(samples), 4) if samples else 0.0,
+        "fallback_causes": fallbacks,
+        "errors": outcomes.get("error", 0)
+    }
+    firsts = sorted(first * 1000 for _, first, _ in samples if first is not None)
+    if firsts:
+        summary["first_output_ms"] = {"p50": round(percentile(firsts, 50), 2),
+                                      "p95": round(percentile(firsts, 95), 2)}
+    return summary
+
+
+def configure_app(stub_url: str, max_concurrency: int) -> Any:
+    """Import app configured for the stub: no caches, no rate limit, no admission bound."""
+    os.environ.update({
+        "HF_API_URL": stub_url,
+        "RESPONSE_CACHE": "off",
+        "SEMANTIC_CACHE_MODEL": "off",
+        "RATE_LIMIT_PER_MINUTE": "0",
+        "MODEL_CONCURRENCY": str(max_concurrency),
+        "QUEUE_MAX_WAITING": str(max_concurrency)
+    })
+    for name in ("ROUTER_CONFIG", "ROUTER_BACKENDS", "USE_LOCAL_MODEL"):
+        os.environ.pop(name, None)
+    import app
+
+    return app
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Print throughput and p95 changes against a previous JSON report."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["target"], r["concurrency"]): r for r in baseline.get("results", [])}
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit') or '?'})")
+    print(f"{'target':<8} {'conc':>5} {'throughput':>11} {'p95':>9}")
+    for result in results:
+        before = previous.get((result["target"], result["concurrency"]))
+        if before is None:
+            continue
+        throughput = result["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        p95 = result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1 if before["latency_ms"]["p95"] else 0.0
+        print(f"{result['target']:<8} {result['concurrency']:>5} {throughput:>+10.1%} {p95:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default="client,service,stream", help="Comma-separated: client, service, stream")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per target and level")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds before each answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub answers that are 500s")
+    parser.add_argument("--burst-every", type=int, default=0, help="Stub period, in requests, of 503 bursts")
+    parser.add_argument("--burst-length", type=int, default=0, help="503 answers per burst")
+    parser.add_argument("--retry-after", type=float, default=0.05, help="estimated_time in the 503 answers")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="Stub seconds between streamed tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    stub_options = {
+        "error_rate": args.error_rate, "burst_every": args.burst_every, "burst_length": args.burst_length,
+        "retry_after": args.retry_after, "token_latency": args.token_latency, "seed": args.seed
+    }
+    results: List[Dict[str, Any]] = []
+
+    with StubProcess(latency=args.latency, **stub_options) as stub:
+        from core.model_client import ModelClient
+        from core.prompt_builder import build_prompt
+
+        client = ModelClient(api_url=stub.url, pool_maxsize=max(levels))
+        app = configure_app(stub.url, max(levels))
+        loop = asyncio.new_event_loop()
+
+        def enhance(draft: str) -> str:
+            return outcome_of(client.enhance(build_prompt(draft)))
+
+        async def process(draft: str, start: float) -> Tuple[None, str]:
+            outputs = await app.process_feedback(draft, "geral", "construtivo", "neutro")
+            return None, outcome_of_outputs(outputs)
+
+        async def process_stream(draft: str, start: float) -> Tuple[Optional[float], str]:
+            first, outputs = None, ("",)
+            async for outputs in app.process_feedback_stream(draft, "geral", "construtivo", "neutro"):
+                if first is None:
+                    first = time.perf_counter() - start
+            return first, outcome_of_outputs(outputs)
+
+        runners = {
+            "client": lambda drafts, level: run_threads(enhance, drafts, level),
+            "service": lambda drafts, level: loop.run_until_complete(run_tasks(process, drafts, level)),
+            "stream": lambda drafts, level: loop.run_until_complete(run_tasks(process_stream, drafts, level))
+        }
+        unknown = set(targets) - set(runners)
+        if unknown:
+            parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+        offset = 0
+        for target in targets:
+            runners[target](make_drafts(1), 1)  # warm up pools and lazy imports
+            for level in levels:
+                drafts = make_drafts(offset + args.requests)[offset:]
+                offset += args.requests
+                counts = stub.counts
+                start = time.perf_counter()
+                samples = runners[target](drafts, level)
+                elapsed = time.perf_counter() - start
+                current, peak = memory_mb()
+                after = stub.counts
+                results.append({
+                    "target": target,
+                    "concurrency": level,
+                    **summarize(samples, elapsed),
+                    "rss_mb": round(current, 1),
+                    "peak_rss_mb": round(peak, 1),
+                    "upstream": {key: after[key] - counts[key] for key in after}
+                })
+
+        client.close()
+        if app._service is not None:
+            loop.run_until_complete(app.get_service().client.aclose())
+        loop.close()
+
+    print(f"{args.requests} requests per run, stub latency {args.latency * 1000:.0f} ms, "
+          f"error rate {args.error_rate:.0%}, 503 bursts {args.burst_length}/{args.burst_every or '-'}")
+    print(f"{'target':<8} {'conc':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+          f"{'fallback':>9} {'errors':>7} {'rss':>8}")
+    for r in results:
+        latency = r["latency_ms"]
+        print(f"{r['target']:<8} {r['concurrency']:>5} {r['throughput_rps']:>8.1f} {latency['p50']:>6.1f}ms "
+              f"{latency['p95']:>6.1f}ms {latency['p99']:>6.1f}ms {r['fallback_rate']:>9.1%} {r['errors']:>7} "
+              f"{r['rss_mb']:>6.0f}MB")
+
+    report = {
+        "benchmark": "e2e",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {"requests": args.requests, "concurrency": levels, "latency": args.latency, **stub_options},
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Microbenchmark: latency of the offline fast engine.
+
+Times FastEngine.enhance on a typical draft and on a 5000-character draft
+(the validator's maximum), i.e. the cost of the fallback and of the preview
+shown while the model streams.
+
+Usage:
+    python -m benchmarks.bench_fast_engine [--seconds S]
+"""
+
+import argparse
+import time
+
+from core.fast_engine import get_fast_engine
+
+
+DRAFT = (
+    "vc tem que melhorar a comunicacao com a equipe. Ontem na reuniao de sprint vc nao "
+    "apresentou o relatorio. Isso atrasou as entregas e gerou retrabalho pro time. "
+    "Sugiro alinhar o status antes das reunioes. "
+)
+
+
+def _time_per_call(fn, text: str, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(20):
+            fn(text)
+        count += 20
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    engine = get_fast_engine()
+    print(f"{'input':<12} {'chars':>6} {'enhance':>10}")
+    for name, text in (("typical", DRAFT), ("5000 chars", (DRAFT * 30)[:5000])):
+        elapsed = _time_per_call(engine.enhance, text, args.seconds)
+        print(f"{name:<12} {len(text):>6} {elapsed * 1e6:>7.0f} us")
+
+
+if __name__ == "__main__":
+    main()
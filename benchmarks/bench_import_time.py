@@ -0,0 +1,44 @@
+"""
+Benchmark: import time of the application modules.
+
+Imports each module in a fresh interpreter with `python -X importtime`
+and reports its cumulative import time, the slowest modules it pulled in
+and any heavy dependency (Gradio, requests, httpx, numpy, ...) loaded
+eagerly. Those should only load on first use; tests/test_import_time.py
+guards against regressions with the same measurement (core.import_time).
+
+Usage:
+    python -m benchmarks.bench_import_time [MODULE ...] [--repeat N] [--top N]
+"""
+
+import argparse
+from typing import Dict, List, Tuple
+
+from core.import_time import TARGETS, heavy_imports, import_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module (the best one is reported)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imported modules to list")
+    args = parser.parse_args()
+
+    print(f"best of {args.repeat}")
+    print(f"{'module':<26} {'import':>9}  heavy dependencies")
+    slowest: Dict[str, List[Tuple[int, str]]] = {}
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module][1])
+        heavy = heavy_imports(best)
+        print(f"{module:<26} {best[module][1] / 1e3:>6.1f} ms  {', '.join(heavy) or '-'}")
+        slowest[module] = sorted(((self_us, name) for name, (self_us, _) in best.items()), reverse=True)
+
+    for module, modules in slowest.items():
+        print(f"\n{module}: slowest modules (self time)")
+        for self_us, name in modules[:args.top]:
+            print(f"  {name:<40} {self_us / 1e3:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
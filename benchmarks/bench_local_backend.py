@@ -0,0 +1,81 @@
+"""
+Benchmark: local CPU backend tokens/s and latency percentiles.
+
+Requires llama-cpp-python and a GGUF model. Typical run on a 4-core box:
+    python -m benchmarks.bench_local_backend --model qwen2.5-1.5b-instruct-q4_k_m.gguf --threads 4
+
+The static prompt prefix (master prompt and instructions) is prefilled
+before the timed requests, so each request only evaluates its suffix. Run
+with --no-prefix to measure the full prompt evaluation for comparison.
+"""
+
+import argparse
+import statistics
+import time
+
+from core.local_backend import LocalBackend
+from core.prompt_builder import build_prompt_parts
+
+
+DRAFTS = [
+    "você precisa melhorar sua comunicação com a equipe. está difícil trabalhar assim.",
+    "o código que você entregou tinha muitos bugs. precisa ser mais cuidadoso.",
+    "parabéns pelo projeto! mas acho que poderia ter sido entregue antes.",
+    "as reuniões que você conduz são longas e sem pauta definida."
+]
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True, help="Path to a GGUF model")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--no-prefix", action="store_true", help="Do not reuse the static prefix state")
+    args = parser.parse_args()
+
+    backend = LocalBackend(args.model, n_threads=args.threads)
+    start = time.perf_counter()
+    backend.llama
+    print(f"load            {time.perf_counter() - start:.2f}s")
+
+    static_prefix, _ = build_prompt_parts("")
+    if not args.no_prefix:
+        start = time.perf_counter()
+        backend.warm_up(static_prefix)
+        print(f"prefix prefill  {time.perf_counter() - start:.2f}s")
+
+    latencies, ttfts, token_rates = [], [], []
+    for i in range(args.requests):
+        prefix, suffix = build_prompt_parts(DRAFTS[i % len(DRAFTS)], "comportamento", "construtivo", "neutro")
+        if args.no_prefix:
+            # Evaluate an unrelated prompt first so nothing is reused
+            backend.generate(str(i), 1, 0.0, 1.0)
+        start = time.perf_counter()
+        first = None
+        tokens = 0
+        for _ in backend.stream(prefix + suffix, args.max_tokens, 0.7, 0.9,
+                                prefix=None if args.no_prefix else prefix):
+            if first is None:
+                first = time.perf_counter() - start
+            tokens += 1
+        elapsed = time.perf_counter() - start
+        if i == 0:
+            print(f"cold request    {elapsed:.2f}s (ttft {first:.2f}s)")
+            continue
+        latencies.append(elapsed)
+        ttfts.append(first)
+        token_rates.append(tokens / max(elapsed - first, 1e-9))
+
+    print(f"tokens/s        {statistics.mean(token_rates):.1f}")
+    print(f"ttft p50/p95    {_percentile(ttfts, 50):.2f}s / {_percentile(ttfts, 95):.2f}s")
+    print(f"latency p50/p95 {_percentile(latencies, 50):.2f}s / {_percentile(latencies, 95):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
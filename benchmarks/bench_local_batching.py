@@ -0,0 +1,126 @@
+"""
+Benchmark: throughput vs latency of the local micro-batching scheduler.
+
+Runs closed-loop clients at concurrency 1, 8 and 32, with grouping disabled
+(max batch 1) and enabled, and reports requests/s and latency percentiles.
+
+Without --model the backend is simulated the way LocalBackend.iter_batch
+works: the requests of a batch complete one after another, each costing
+--request-ms and answered as soon as it ends, so grouping can only add the
+--max-wait-ms queueing. With --batched-step-ms the simulation instead
+models a multi-sequence decoder (a fixed step per batch plus --item-ms per
+request), which LocalBackend does not implement; use it only to estimate
+what one would gain. With --model a real GGUF model runs through
+LocalBackend (requires llama-cpp-python):
+    python -m benchmarks.bench_local_batching --model model.gguf --max-tokens 64
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from typing import Callable, Iterator, List, Tuple
+
+from core.scheduler import MicroBatcher
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _simulated(step_cost: float, item_cost: float) -> Callable[[List[str]], Iterator[Tuple[int, str]]]:
+    """
+    Sequential requests costing item_cost each (step_cost 0), or one batched
+    step costing step_cost plus item_cost per request; both under one lock.
+    """
+    lock = threading.Lock()
+
+    def run_batch(prompts):
+        with lock:
+            if step_cost:
+                time.sleep(step_cost + item_cost * len(prompts))
+                yield from enumerate(["{}"] * len(prompts))
+                return
+            for i in range(len(prompts)):
+                time.sleep(item_cost)
+                yield i, "{}"
+
+    return run_batch
+
+
+def _run(call: Callable[[str], str], concurrency: int, requests_per_client: int):
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client(worker: int):
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            call(f"rascunho {worker}-{i}")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Path to a GGUF model (default: simulated backend)")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--requests", type=int, default=8, help="Requests per client")
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--request-ms", type=float, default=40.0,
+                        help="Simulated cost of one request, run sequentially as LocalBackend does")
+    parser.add_argument("--batched-step-ms", type=float,
+                        help="Simulate a hypothetical multi-sequence decoder with this cost per batch step")
+    parser.add_argument("--item-ms", type=float, default=4.0,
+                        help="Extra cost per request of the hypothetical batched step")
+    args = parser.parse_args()
+
+    if args.batched_step_ms is None:
+        step_cost, item_cost = 0.0, args.request_ms / 1000
+    else:
+        step_cost, item_cost = args.batched_step_ms / 1000, args.item_ms / 1000
+
+    print(f"{'concurrency':>11} {'max batch':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>10}")
+    for concurrency in (1, 8, 32):
+        for max_batch in (1, args.max_batch):
+            if args.model:
+                from core.local_backend import LocalBackend
+                from core.prompt_builder import build_prompt_parts
+
+                backend = LocalBackend(args.model, max_batch_size=max_batch, max_wait=args.max_wait_ms / 1000)
+                batcher = backend.batcher
+
+                def call(draft, backend=backend):
+                    prefix, suffix = build_prompt_parts(draft)
+                    return backend.generate(prefix + suffix, args.max_tokens, 0.7, 0.9, prefix=prefix)
+            else:
+                batcher = MicroBatcher(
+                    _simulated(step_cost, item_cost),
+                    max_batch_size=max_batch,
+                    max_wait=args.max_wait_ms / 1000 if max_batch > 1 else 0.0
+                )
+                call = batcher.run
+
+            throughput, latencies = _run(call, concurrency, args.requests)
+            mean_batch = batcher.mean_batch_size if batcher is not None else 1.0
+            print(
+                f"{concurrency:>11} {max_batch:>9} {throughput:>8.1f} "
+                f"{_percentile(latencies, 50) * 1000:>8.0f} {_percentile(latencies, 95) * 1000:>8.0f} "
+                f"{mean_batch:>10.1f}"
+            )
+            if batcher is not None:
+                batcher.close()
+
+
+if __name__ == "__main__":
+    main()
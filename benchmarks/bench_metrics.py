@@ -0,0 +1,74 @@
+"""
+Benchmark: cost of the metrics hooks, disabled and enabled.
+
+Times a single stage hook, then FeedbackService.enhance() served from the
+response cache, the cheapest full request and so the one where the hooks
+weigh the most, with metrics disabled and enabled.
+
+Usage:
+    python -m benchmarks.bench_metrics [--iterations N]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict, List
+
+from core.async_model_client import AsyncModelClient
+from core.cache import MemoryCache
+from core.metrics import metrics
+from core.service import FeedbackService
+
+
+TEXT = "O relatório atrasou dois dias e isso gerou retrabalho para o time."
+
+
+def _per_call(fn: Callable[[], None], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (the best one is reported)")
+    args = parser.parse_args()
+
+    def stage_hook():
+        with metrics.stage("validate"):
+            pass
+
+    client = AsyncModelClient(cache=MemoryCache())
+    service = FeedbackService(client)
+    client.cache.set(client.cache_key(TEXT, "geral", "construtivo", "neutro"), {"feedback_aprimorado": "ok"})
+    loop = asyncio.new_event_loop()
+
+    async def requests(n: int) -> None:
+        for _ in range(n):
+            await service.enhance(TEXT)
+
+    def cached_request_batch():
+        loop.run_until_complete(requests(100))
+
+    cases = {"stage hook": (stage_hook, 1), "cached enhance()": (cached_request_batch, 100)}
+    timings: Dict[str, Dict[str, List[float]]] = {name: {"disabled": [], "enabled": []} for name in cases}
+    # Interleaved runs, so both settings see the same machine noise
+    for _ in range(args.repeat):
+        for name, (fn, per_batch) in cases.items():
+            for state in ("disabled", "enabled"):
+                metrics.enabled = state == "enabled"
+                calls = max(1, args.iterations // per_batch)
+                timings[name][state].append(_per_call(fn, calls) / per_batch)
+    metrics.disable()
+    loop.close()
+
+    print(f"best of {args.repeat}")
+    print(f"{'case':<18} {'disabled':>10} {'enabled':>10}")
+    for name, states in timings.items():
+        print(f"{name:<18} {min(states['disabled']) * 1e9:>7.0f} ns {min(states['enabled']) * 1e9:>7.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Microbenchmark: prompt builds per second, uncached vs compiled template.
+
+Usage:
+    python -m benchmarks.bench_prompt_builder [--seconds S]
+"""
+
+import argparse
+import time
+
+from core.prompt_builder import (
+    CLOSING,
+    CONTEXT_TEMPLATE,
+    FORMALITY_MAP,
+    INSTRUCTIONS,
+    MASTER_PROMPT_PATH,
+    TONE_MAP,
+    TYPE_MAP,
+    build_prompt
+)
+
+
+def build_prompt_uncached(feedback_text, feedback_type, tone, formality):
+    """Previous behavior: read the file and rebuild the label maps on every call."""
+    with open(MASTER_PROMPT_PATH, "r", encoding="utf-8") as f:
+        master_prompt = f.read()
+    type_map = dict(TYPE_MAP)
+    tone_map = dict(TONE_MAP)
+    formality_map = dict(FORMALITY_MAP)
+    context = CONTEXT_TEMPLATE.format(
+        type_en=type_map.get(feedback_type, "general"),
+        tone_en=tone_map.get(tone, "constructive"),
+        formality_en=formality_map.get(formality, "neutral")
+    )
+    return f"{master_prompt}{INSTRUCTIONS}{context}{feedback_text}{CLOSING}"
+
+
+def _rate(fn, seconds: float) -> float:
+    args = ("você precisa melhorar sua comunicação com a equipe.", "comportamento", "construtivo", "neutro")
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn(*args)
+        count += 100
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    before = _rate(build_prompt_uncached, args.seconds)
+    after = _rate(build_prompt, args.seconds)
+    print(f"before  {before:,.0f} builds/s")
+    print(f"after   {after:,.0f} builds/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
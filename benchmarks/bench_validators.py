@@ -0,0 +1,125 @@
+"""
+Benchmark: bulk validation and sanitization of batch rows.
+
+Validates and sanitizes 100k synthetic rows (half clean one-liners, the
+rest with irregular whitespace or invalid fields) with the previous
+per-row path (four validators rebuilding their choice lists, line-by-line
+sanitize) and with validate_many/sanitize_many.
+
+Usage:
+    python -m benchmarks.bench_validators [--rows N]
+"""
+
+import argparse
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.validators import sanitize_many, validate_many
+
+
+TEXTS = (
+    "O relatório atrasou dois dias e isso gerou retrabalho para o time.",
+    "Ótimo trabalho na apresentação de ontem, continue assim!",
+    "vc precisa  melhorar a comunicação com a equipe,\n\n  principalmente nas reuniões de status.  ",
+    "O relatório atrasou dois dias.   Isso gerou retrabalho.\n\tSugiro alinhar o prazo antes.",
+    "Ótimo trabalho na apresentação de ontem! \n \n Continue assim.",
+    "curto",
+    "   ",
+)
+OPTIONS = (
+    ("geral", "construtivo", "neutro"),
+    ("desempenho", "direto", "formal"),
+    ("liderança", "encorajador", "casual"),
+    ("técnico", "neutro", "neutro"),
+    ("outro", "construtivo", "neutro"),
+)
+
+
+def _validate_before(text: Any, feedback_type: str, tone: str, formality: str) -> Optional[str]:
+    """Previous behavior: four validators, each rebuilding its list."""
+    checks: List[Tuple[bool, Optional[str]]] = []
+    if not text:
+        checks.append((False, "O texto de feedback não pode estar vazio."))
+    elif len(text.strip()) < 10:
+        checks.append((False, "O texto deve ter pelo menos 10 caracteres."))
+    elif len(text.strip()) > 5000:
+        checks.append((False, "O texto não pode exceder 5000 caracteres."))
+    valid_types = ["geral", "desempenho", "comportamento", "técnico", "liderança"]
+    if feedback_type not in valid_types:
+        checks.append((False, f"Tipo de feedback inválido. Use: {', '.join(valid_types)}"))
+    valid_tones = ["construtivo", "neutro", "encorajador", "direto"]
+    if tone not in valid_tones:
+        checks.append((False, f"Tom inválido. Use: {', '.join(valid_tones)}"))
+    valid_levels = ["formal", "neutro", "casual"]
+    if formality not in valid_levels:
+        checks.append((False, f"Nível de formalidade inválido. Use: {', '.join(valid_levels)}"))
+    return checks[0][1] if checks else None
+
+
+def _sanitize_before(text: str) -> str:
+    """Previous sanitize_text."""
+    if not text:
+        return ""
+    cleaned_lines = []
+    for line in text.split('\n'):
+        if line.strip():
+            cleaned_lines.append(' '.join(line.split()))
+    return '\n'.join(cleaned_lines)
+
+
+def make_rows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic batch rows: half clean one-liners, 40% irregular whitespace, 10% invalid."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        text = rng.choices(TEXTS, weights=(25, 25, 14, 13, 13, 5, 5))[0]
+        feedback_type, tone, formality = rng.choices(OPTIONS, weights=(30, 30, 20, 15, 5))[0]
+        rows.append({"feedback_text": text, "feedback_type": feedback_type, "tone": tone, "formality": formality})
+    return rows
+
+
+def run_before(rows: List[Dict[str, Any]]) -> int:
+    """Per-row validators and sanitize; returns the invalid count."""
+    invalid = 0
+    for row in rows:
+        if _validate_before(row["feedback_text"], row["feedback_type"], row["tone"], row["formality"]):
+            invalid += 1
+        else:
+            _sanitize_before(row["feedback_text"])
+    return invalid
+
+
+def run_after(rows: List[Dict[str, Any]]) -> int:
+    """validate_many, then sanitize_many over the valid rows; returns the invalid count."""
+    results = list(validate_many(rows))
+    deque(sanitize_many([row["feedback_text"] for row, result in zip(rows, results) if result.valid]), maxlen=0)
+    return sum(not result.valid for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path (the best one is reported)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    timings: Dict[str, List[float]] = {"per-row validators": [], "validate_many/sanitize_many": []}
+    counts = set()
+    # Interleaved runs, so both paths see the same machine noise
+    for _ in range(args.repeat):
+        for name, run in zip(timings, (run_before, run_after)):
+            start = time.perf_counter()
+            counts.add(run(rows))
+            timings[name].append(time.perf_counter() - start)
+
+    assert len(counts) == 1
+    print(f"{args.rows} rows, {counts.pop()} invalid, best of {args.repeat}")
+    print(f"{'path':<28} {'total':>8} {'per row':>9}")
+    for name, elapsed in timings.items():
+        print(f"{name:<28} {min(elapsed) * 1e3:>5.0f} ms {min(elapsed) / args.rows * 1e9:>6.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
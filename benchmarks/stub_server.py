@@ -0,0 +1,232 @@
+"""
+Local stub of the Hugging Face Inference API for benchmarks
+
+Answers like the text-generation endpoint: a JSON list with the generated
+text, or server-sent events when the payload asks for "stream". Latency,
+random 500 errors and bursts of 503 "model loading" answers are
+configurable, so client behavior under failures can be measured too.
+"""
+
+import json
+import multiprocessing
+import random
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+STUB_RESPONSE = {
+    "feedback_aprimorado": "Sua comunicação com a equipe pode ser aprimorada.",
+    "versao_curta": "Melhorar a comunicação com a equipe.",
+    "fato_impacto_sugestao": {
+        "fato": "A comunicação com a equipe apresentou falhas",
+        "impacto": "A colaboração fica mais difícil",
+        "sugestao": "Realizar alinhamentos semanais"
+    },
+    "sugestoes_extras": ["Ser específico", "Dar exemplos"],
+    "observacoes": "Resposta gerada pelo servidor de teste."
+}
+
+STUB_TEXT = json.dumps(STUB_RESPONSE, ensure_ascii=False)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every POST with an HF-style generation payload (or a configured error)."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server: StubHTTPServer = self.server
+        status = server.next_status()
+        if server.latency:
+            time.sleep(server.latency)
+
+        if status == 503:
+            self._send_json(503, {"error": "Model is currently loading", "estimated_time": server.retry_after})
+        elif status != 200:
+            self._send_json(status, {"error": "Internal Server Error"})
+        elif payload.get("stream"):
+            self._send_stream(server)
+        else:
+            self._send_json(200, [{"generated_text": STUB_TEXT}])
+
+    def do_GET(self):
+        # Counters, for a stub running in another process
+        self._send_json(200, self.server.counts)
+
+    def _send_json(self, status: int, content: object) -> None:
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, server: "StubHTTPServer") -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(STUB_TEXT), server.chunk_size):
+            if server.token_latency:
+                time.sleep(server.token_latency)
+            self._write_event({"token": {"text": STUB_TEXT[start:start + server.chunk_size], "special": False}})
+        self._write_event({"token": {"text": "</s>", "special": True}, "generated_text": STUB_TEXT})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_event(self, event: Dict) -> None:
+        data = b"data:" + json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    """HTTP server holding the stub's configuration and counters."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        burst_every: int = 0,
+        burst_length: int = 0,
+        retry_after: float = 0.05,
+        token_latency: float = 0.0,
+        chunk_size: int = 8,
+        seed: Optional[int] = None
+    ):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.token_latency = token_latency
+        self.chunk_size = max(1, chunk_size)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "error": 0, "loading": 0}
+
+    def next_status(self) -> int:
+        """
+        Status of the next answer.
+
+        The last burst_length of every burst_every requests get 503 (model
+        loading); of the others, a share error_rate fails with 500.
+        """
+        with self._lock:
+            index = self.counts["requests"]
+            self.counts["requests"] += 1
+            if self.burst_every and index % self.burst_every >= self.burst_every - self.burst_length:
+                status = 503
+            elif self.error_rate and self._random.random() < self.error_rate:
+                status = 500
+            else:
+                status = 200
+            self.counts[{200: "ok", 500: "error", 503: "loading"}[status]] += 1
+        return status
+
+
+class StubServer:
+    """Run the stub in a background thread; usable as a context manager."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0, **options):
+        """
+        Initialize the stub.
+
+        Args:
+            latency: Seconds before each answer
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            **options: error_rate, burst_every, burst_length, retry_after
+                (the 503 answers' estimated_time), token_latency and
+                chunk_size (characters per streamed token) and seed
+        """
+        self.httpd = StubHTTPServer((host, port), latency=latency, **options)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/models/stub"
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Requests received and answers sent by kind (ok, error, loading)."""
+        return dict(self.httpd.counts)
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def _serve(conn: Any, latency: float, options: Dict[str, Any]) -> None:
+    server = StubServer(latency, **options)
+    conn.send(server.httpd.server_address[1])
+    server.httpd.serve_forever()
+
+
+class StubProcess:
+    """
+    Run the stub in a child process, so it does not compete with the
+    benchmarked client for the GIL; usable as a context manager.
+    """
+
+    def __init__(self, latency: float = 0.0, **options):
+        """Initialize the stub; arguments as for StubServer."""
+        self.latency = latency
+        self.options = options
+        self.port = 0
+        self._process: Optional[multiprocessing.Process] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/models/stub"
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Requests received and answers sent by kind (ok, error, loading)."""
+        with urllib.request.urlopen(self.url, timeout=10) as response:
+            return json.load(response)
+
+    def start(self) -> "StubProcess":
+        parent, child = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(child, self.latency, self.options), daemon=True
+        )
+        self._process.start()
+        self.port = parent.recv()
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "StubProcess":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
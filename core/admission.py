@@ -0,0 +1,221 @@
+"""
+Admission control for incoming requests: concurrency slots and per-client rate limits
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Tuple
+
+from core.metrics import metrics
+
+
+class ServiceBusyError(Exception):
+    """Raised when a request is rejected instead of queued; the message is user-facing."""
+
+    def __init__(self, message: str = "⏳ O serviço está ocupado no momento. Tente novamente em alguns segundos."):
+        super().__init__(message)
+
+
+class RateLimitedError(ServiceBusyError):
+    """Raised when a client exceeds its request rate."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(
+            f"⏳ Muitas solicitações seguidas. Tente novamente em {max(1, math.ceil(retry_after))} s."
+        )
+
+
+class AdmissionController:
+    """
+    Bounds how many requests run and wait at once.
+
+    Up to max_concurrent requests hold a slot; up to max_waiting more wait
+    for one (at most wait_timeout seconds). Anything beyond is rejected
+    right away with ServiceBusyError, so load spikes cost neither memory nor
+    upstream quota.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_waiting: int = 16, wait_timeout: Optional[float] = 30.0):
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrent: Requests running at once
+            max_waiting: Requests waiting for a slot before new ones are rejected
+            wait_timeout: Seconds a request waits for a slot (None for no limit)
+        """
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running = 0
+        self._waiting = 0
+        self._rejected = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the block.
+
+        Raises:
+            ServiceBusyError: If too many requests are waiting, or no slot
+                frees up within wait_timeout
+        """
+        if self._semaphore is None:
+            # Created lazily so it belongs to the serving event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self._semaphore.locked() and self._waiting >= self.max_waiting:
+            self._rejected += 1
+            raise ServiceBusyError()
+
+        self._waiting += 1
+        try:
+            with metrics.stage("admission_wait"):
+                await asyncio.wait_for(self._semaphore.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise ServiceBusyError() from None
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Requests running and waiting now, and rejections so far."""
+        return {"running": self._running, "waiting": self._waiting, "rejected": self._rejected}
+
+
+class RateLimiter:
+    """
+    Token bucket per client: `rate` requests per second with bursts of `burst`.
+
+    At most max_clients buckets are kept; the least recently seen client is
+    forgotten first (it starts again with a full bucket).
+    """
+
+    def __init__(self, rate: float, burst: int = 5, max_clients: int = 10000):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Sustained requests per second per client
+            burst: Requests a client can make back to back
+            max_clients: Buckets kept in memory
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, client: str) -> float:
+        """
+        Take a token from client's bucket.
+
+        Args:
+            client: Client identifier (e.g. IP address)
+
+        Returns:
+            0.0 when the request is allowed, otherwise the seconds until
+            the next token
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def check(self, client: str) -> None:
+        """
+        Take a token from client's bucket or reject the request.
+
+        Raises:
+            RateLimitedError: If the client has no token left
+        """
+        wait = self.acquire(client)
+        if wait:
+            raise RateLimitedError(wait)
+
+
+def default_trusted_hops(environ: Mapping[str, str] = os.environ) -> int:
+    """
+    Reverse proxies in front of the app whose X-Forwarded-For entries are trusted.
+
+    TRUSTED_PROXY_HOPS when set (e.g. 1 behind a single load balancer);
+    otherwise 1 on Hugging Face Spaces (SPACE_ID is set), whose proxy
+    appends the caller's address, and 0 elsewhere, where the header, which
+    any caller can set, is ignored.
+    """
+    value = environ.get("TRUSTED_PROXY_HOPS")
+    if value:
+        return int(value)
+    return 1 if environ.get("SPACE_ID") else 0
+
+
+TRUSTED_PROXY_HOPS = default_trusted_hops()
+
+
+def client_id(request: Any, trusted_hops: Optional[int] = None) -> str:
+    """
+    Identify the caller of an HTTP request for rate limiting.
+
+    Args:
+        request: Starlette or Gradio request (None for local calls)
+        trusted_hops: Trusted proxies in front of the app (default:
+            TRUSTED_PROXY_HOPS)
+
+    Returns:
+        The X-Forwarded-For entry added by the outermost trusted proxy
+        (counted from the right), else the peer address
+    """
+    if request is None:
+        return "local"
+    if trusted_hops is None:
+        trusted_hops = TRUSTED_PROXY_HOPS
+    forwarded = request.headers.get("x-forwarded-for", "") if trusted_hops > 0 and request.headers else ""
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    if hops:
+        # Entries left of the trusted ones were written by the caller
+        return hops[max(0, len(hops) - trusted_hops)]
+    if request.client is not None and request.client.host:
+        return request.client.host
+    return getattr(request, "session_hash", None) or "anonymous"
+
+
+def create_rate_limiter(per_minute: float = 0, burst: int = 5, max_clients: int = 10000) -> Optional[RateLimiter]:
+    """
+    Create a per-client rate limiter.
+
+    Args:
+        per_minute: Sustained requests per minute per client (<= 0 disables)
+        burst: Requests a client can make back to back
+        max_clients: Buckets kept in memory
+
+    Returns:
+        RateLimiter, or None when disabled
+    """
+    if per_minute <= 0:
+        return None
+    return RateLimiter(rate=per_minute / 60, burst=max(1, burst), max_clients=max_clients)
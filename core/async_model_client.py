@@ -0,0 +1,394 @@
+"""
+Async model client for non-blocking LLM calls
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Any, Tuple
+
+from core.metrics import metrics
+from core.model_client import ModelClient, logger
+from core.resilience import retry_hint
+from core.singleflight import AsyncSingleFlight
+
+if TYPE_CHECKING:
+    # httpx loads with the first async session
+    import httpx
+
+    from core.semantic_cache import SemanticKey
+
+
+class AsyncModelClient(ModelClient):
+    """
+    Asyncio counterpart of ModelClient.
+
+    Shares configuration, fallback behavior and response parsing with the sync
+    client, but performs HTTP calls on an httpx.AsyncClient so many requests can
+    be in flight on a single event loop without holding a thread each.
+    """
+
+    def __init__(self, *args, max_connections: int = 100, **kwargs):
+        """
+        Initialize the async model client.
+
+        Args:
+            *args: Positional arguments forwarded to ModelClient
+            max_connections: Maximum concurrent connections for the async pool
+            **kwargs: Keyword arguments forwarded to ModelClient
+        """
+        super().__init__(*args, **kwargs)
+        self.max_connections = max_connections
+        self._async_session: Optional["httpx.AsyncClient"] = None
+        self._async_single_flight = AsyncSingleFlight()
+
+    @property
+    def async_session(self) -> "httpx.AsyncClient":
+        """Pooled async HTTP client, created on first use."""
+        if self._async_session is None or self._async_session.is_closed:
+            self._async_session = self._create_async_session()
+        return self._async_session
+
+    def _create_async_session(self) -> "httpx.AsyncClient":
+        """Create an httpx client with the same pool limits as the sync session."""
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0
+        )
+        headers = {} if self.keep_alive else {"Connection": "close"}
+        return httpx.AsyncClient(limits=limits, timeout=self.timeout, headers=headers)
+
+    async def aclose(self) -> None:
+        """Close async and sync pooled connections."""
+        session, self._async_session = self._async_session, None
+        if session is not None:
+            await session.aclose()
+        if self.router is not None:
+            await self.router.aclose()
+        self.close()
+
+    async def __aenter__(self) -> "AsyncModelClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def agenerate(
+        self,
+        prompt: str,
+        max_length: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9
+    ) -> str:
+        """
+        Generate text using the LLM without blocking the event loop.
+
+        Args:
+            prompt: Input prompt
+            max_length: Maximum response length in tokens (default: sized from the prompt, see max_new_tokens)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+
+        Returns:
+            Generated text response
+        """
+        if max_length is None:
+            max_length = self.max_new_tokens(prompt)
+        return (await self._agenerate_with_meta(prompt, max_length, temperature, top_p))[0]
+
+    async def _agenerate_with_meta(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float,
+        budget: Optional[float] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Generate text and return it with call metadata (budget as in ModelClient._generate_with_meta)."""
+        if self.router is not None:
+            return await self.router.agenerate_with_meta(prompt, max_length, temperature, top_p)
+        if self.use_local:
+            return await asyncio.to_thread(
+                self._generate_local, prompt, max_length, temperature, top_p
+            ), {}
+        return await self._agenerate_api(prompt, max_length, temperature, top_p, budget)
+
+    async def _agenerate_api(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float,
+        budget: Optional[float] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Generate using Hugging Face Inference API (async), with the same retry policy and budget."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        policy = self.retry_policy
+        deadline = loop.time() + (policy.deadline if budget is None else min(policy.deadline, budget))
+        headers = self._build_headers()
+        payload = self._build_payload(prompt, max_length, temperature, top_p)
+        retries = 0
+        breaker = self.circuit_breaker
+
+        while True:
+            if not breaker.allow_request():
+                return self._circuit_open_response(prompt, retries)
+            response = None
+            try:
+                with metrics.stage("http", in_flight=True):
+                    response = await self.async_session.post(
+                        self.api_url,
+                        headers=headers,
+                        json=payload,
+                        timeout=min(self.timeout, max(deadline - loop.time(), 0.001))
+                    )
+
+                if response.status_code in policy.retry_statuses:
+                    breaker.record_failure()
+                    delay = policy.next_delay(
+                        retries, retry_hint(response.headers, self._json_or_none(response))
+                    )
+                    if policy.should_retry(retries, delay, deadline - loop.time()):
+                        logger.warning("retrying after HTTP %s in %.2fs", response.status_code, delay)
+                        await asyncio.sleep(delay)
+                        retries += 1
+                        continue
+                elif response.status_code in policy.failure_statuses:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                # Model is loading (503 status), use fallback with message
+                if response.status_code == 503:
+                    return self._fallback_with_note(
+                        prompt, self._note_model_loading(), "model_loading"
+                    ), {"retries": retries}
+
+                response.raise_for_status()
+
+                text = self._extract_generated_text(response.json())
+                if metrics.enabled:
+                    self._record_tokens(prompt, text)
+                return text, {"retries": retries}
+
+            except asyncio.CancelledError:
+                # Cancelled before an outcome was recorded: free the probe slot
+                if response is None:
+                    breaker.release()
+                raise
+            except httpx.HTTPStatusError as e:
+                return self._fallback_with_note(
+                    prompt, self._note_http_error(e.response.status_code), "http_error"
+                ), {"retries": retries}
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                delay = policy.backoff(retries)
+                if policy.should_retry(retries, delay, deadline - loop.time()):
+                    logger.warning("retrying after %s in %.2fs", type(e).__name__, delay)
+                    await asyncio.sleep(delay)
+                    retries += 1
+                    continue
+                return self._fallback_with_note(
+                    prompt, self._note_connection_error(e), "connection_error"
+                ), {"retries": retries}
+            except Exception as e:
+                if response is None:
+                    breaker.record_failure()
+                return self._fallback_with_note(
+                    prompt, self._note_connection_error(e), "connection_error"
+                ), {"retries": retries}
+
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        max_length: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9
+    ) -> AsyncIterator[str]:
+        """
+        Async counterpart of ModelClient.generate_stream.
+
+        Concurrent streams for the same prompt and parameters share one
+        upstream request; each subscriber receives every chunk.
+
+        Args:
+            prompt: Input prompt
+            max_length: Maximum response length in tokens (default: sized from the prompt, see max_new_tokens)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+
+        Yields:
+            Text chunks as they arrive
+        """
+        if max_length is None:
+            max_length = self.max_new_tokens(prompt)
+        key = self._flight_key(prompt, max_length, temperature, top_p)
+        async for chunk in self._async_single_flight.stream(
+            key, lambda: self._agenerate_stream(prompt, max_length, temperature, top_p)
+        ):
+            yield chunk
+
+    async def _agenerate_stream(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> AsyncIterator[str]:
+        """Stream tokens from the Hugging Face Inference API (async)."""
+        import httpx
+
+        if self.router is not None:
+            async for chunk in self.router.agenerate_stream(prompt, max_length, temperature, top_p):
+                yield chunk
+            return
+        if self.use_local:
+            # Pull each chunk from the blocking local stream on a worker thread
+            chunks = self._generate_local_stream(prompt, max_length, temperature, top_p)
+            done = object()
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, done)
+                if chunk is done:
+                    return
+                yield chunk
+
+        payload = self._build_payload(prompt, max_length, temperature, top_p)
+        payload["stream"] = True
+        started = time.perf_counter()
+        yielded = False
+        breaker = self.circuit_breaker
+
+        if not breaker.allow_request():
+            yield self._circuit_open_response(prompt)[0]
+            return
+
+        response = None
+        try:
+            async with self.async_session.stream(
+                "POST",
+                self.api_url,
+                headers=self._build_headers(),
+                json=payload
+            ) as response:
+                if response.status_code in self.retry_policy.retry_statuses | self.retry_policy.failure_statuses:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                if response.status_code == 503:
+                    yield self._fallback_with_note(prompt, self._note_model_loading(), "model_loading")
+                    return
+
+                response.raise_for_status()
+
+                # Endpoints without streaming support answer with a plain JSON body
+                if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                    await response.aread()
+                    yielded = True
+                    text = self._extract_generated_text(response.json())
+                    if metrics.enabled:
+                        self._record_tokens(prompt, text)
+                    yield text
+                    return
+
+                generated = 0
+                async for line in response.aiter_lines():
+                    token = self._parse_sse_line(line)
+                    if token is None:
+                        continue
+                    if not yielded:
+                        yielded = True
+                        logger.info("time_to_first_token=%.3fs", time.perf_counter() - started)
+                        metrics.observe_stage("first_token", time.perf_counter() - started)
+                    generated += 1
+                    yield token
+                if metrics.enabled:
+                    self._record_tokens(prompt, generated_tokens=generated)
+
+        except asyncio.CancelledError:
+            if response is None:
+                breaker.release()
+            raise
+        except httpx.HTTPStatusError as e:
+            yield self._fallback_with_note(prompt, self._note_http_error(e.response.status_code), "http_error")
+        except Exception as e:
+            if response is None:
+                breaker.record_failure()
+            if yielded:
+                logger.warning("stream interrupted after first token: %s", e)
+                return
+            yield self._fallback_with_note(prompt, self._note_connection_error(e), "connection_error")
+
+    async def aenhance(
+        self,
+        prompt: str,
+        cache_key: Optional[str] = None,
+        max_length: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        use_cache: bool = True,
+        semantic_key: Optional["SemanticKey"] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of ModelClient.enhance.
+
+        Args:
+            prompt: Input prompt
+            cache_key: Key from cache_key(); no caching when omitted
+            max_length: Maximum response length in tokens (default: sized from the prompt, see max_new_tokens)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            use_cache: Set to False to skip the cache and force a fresh sample
+            semantic_key: Key from semantic_key(); no semantic caching when omitted
+
+        Returns:
+            Parsed response dictionary
+        """
+        cached, semantic_key = await self.alookup(cache_key, use_cache, semantic_key)
+        if cached is not None:
+            return cached
+        if max_length is None:
+            max_length = self.max_new_tokens(prompt)
+
+        async def call() -> Dict[str, Any]:
+            with metrics.stage("model"):
+                response_text, meta = await self._agenerate_with_meta(prompt, max_length, temperature, top_p)
+                response_data = self._attach_meta(await self.aparse_response(response_text), meta)
+            self.cache_store(cache_key, response_data, use_cache, semantic_key)
+            return response_data
+
+        if not use_cache:
+            return await call()
+        return await self._async_single_flight.do(
+            self._flight_key(prompt, max_length, temperature, top_p), call
+        )
+
+    async def alookup(
+        self,
+        cache_key: Optional[str],
+        use_cache: bool = True,
+        semantic_key: Optional["SemanticKey"] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional["SemanticKey"]]:
+        """Async counterpart of ModelClient.lookup; the draft is embedded on a worker thread."""
+        cached = self.cache_lookup(cache_key, use_cache)
+        if cached is None and use_cache and semantic_key is not None and self.semantic_cache is not None:
+            if semantic_key.vector is None:
+                # Model embedders take tens of ms of CPU; keep them off the event loop
+                semantic_key = await asyncio.to_thread(self.semantic_cache.embed, semantic_key)
+            cached = self.cache_lookup(None, use_cache, semantic_key)
+        return cached, semantic_key
+
+    async def aparse_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse LLM response into structured format.
+
+        Args:
+            response_text: Raw response from LLM
+
+        Returns:
+            Parsed response dictionary
+        """
+        return self.parse_response(response_text)
@@ -0,0 +1,269 @@
+"""
+Batch processing of feedback files (CSV/JSONL)
+
+Usage:
+    python -m core.batch input.csv output.jsonl [--concurrency N] [--no-resume]
+
+Drafts go through FeedbackService.prepare(), so PROMPT_OVERFLOW and
+PROMPT_COMPRESSION_RATIO apply as in the interface.
+"""
+
+import argparse
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional
+
+from core.cache import create_cache
+from core.compression import compression_ratio_from_env
+from core.formatters import create_copy_text
+from core.model_client import ModelClient
+from core.service import FeedbackService, InvalidFeedbackError
+from core.token_budget import PromptTooLongError
+
+
+def _jsonl_rows(f: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Rows of a JSONL file; a malformed line yields a row holding its parse error."""
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = {"_line": line_number, "_error": f"Linha {line_number}: JSON inválido."}
+        else:
+            if not isinstance(row, dict):
+                row = {"_line": line_number, "_error": f"Linha {line_number}: esperado um objeto JSON."}
+        yield row
+
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream input rows from a CSV or JSONL file.
+
+    Rows need a "feedback_text" column; "id", "feedback_type", "tone" and
+    "formality" are optional. Rows without an id (or with an empty one) get
+    their 0-based position.
+    A JSONL line that is not a JSON object still yields a row, with its line
+    number in "_line" and the problem in "_error" (see process_row).
+
+    Args:
+        path: Input file (.csv, .jsonl or .ndjson)
+
+    Yields:
+        One dictionary per row
+    """
+    is_csv = path.lower().endswith(".csv")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if is_csv else _jsonl_rows(f)
+        for index, row in enumerate(rows):
+            row = dict(row)
+            # Empty CSV cells count as missing; an explicit id of 0 is kept
+            if row.get("id") in (None, ""):
+                row["id"] = index
+            yield row
+
+
+def process_row(
+    client: ModelClient,
+    row: Dict[str, Any],
+    service: Optional[FeedbackService] = None
+) -> Dict[str, Any]:
+    """
+    Enhance a single feedback row.
+
+    Args:
+        client: Model client used for generation
+        row: Input row from read_rows()
+        service: Validation, compression and prompt budget settings
+            (default: FeedbackService(client))
+
+    Returns:
+        Output record with status "ok", "invalid" (with the first error
+        message and the structured "errors" list) or "error"
+    """
+    if "_error" in row:
+        return {
+            "id": row["id"],
+            "status": "invalid",
+            "error": row["_error"],
+            "line": row["_line"],
+            "errors": [{"field": "row", "code": "malformed"}]
+        }
+
+    service = service or FeedbackService(client)
+    try:
+        feedback_text, options, budgeted = service.prepare(
+            row.get("feedback_text"), row.get("feedback_type"), row.get("tone"), row.get("formality")
+        )
+    except InvalidFeedbackError as e:
+        return {
+            "id": row["id"],
+            "status": "invalid",
+            "error": str(e),
+            "errors": [{"field": error.field, "code": error.code} for error in e.errors]
+        }
+    except PromptTooLongError as e:
+        return {
+            "id": row["id"],
+            "status": "invalid",
+            "error": str(e),
+            "errors": [{"field": "feedback_text", "code": "prompt_too_long"}]
+        }
+    except Exception as e:
+        # A row that breaks preparation must not stop the run (and every resume)
+        return {"id": row["id"], "status": "error", "error": str(e)}
+
+    try:
+        cache_key = client.cache_key(feedback_text, *options)
+        semantic_key = client.semantic_key(feedback_text, *options)
+        response_data = client.enhance(
+            budgeted.prompt, cache_key=cache_key, max_length=budgeted.max_new_tokens, semantic_key=semantic_key
+        )
+    except Exception as e:
+        return {"id": row["id"], "status": "error", "error": str(e)}
+
+    return {
+        "id": row["id"],
+        "status": "ok",
+        "result": response_data,
+        "copy_text": create_copy_text(response_data)
+    }
+
+
+def _load_checkpoint(path: str) -> Dict[str, int]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"rows_done": 0, "offset": 0}
+
+
+def _save_checkpoint(path: str, rows_done: int, offset: int) -> None:
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"rows_done": rows_done, "offset": offset}, f)
+    os.replace(tmp_path, path)
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    client: ModelClient,
+    concurrency: int = 4,
+    resume: bool = True,
+    checkpoint_every: int = 1,
+    service: Optional[FeedbackService] = None
+) -> Dict[str, int]:
+    """
+    Process a whole file with bounded concurrency, writing results as they finish.
+
+    Results are written to a JSONL file in input order. At most
+    2 * concurrency rows are held in memory at any time. A checkpoint file
+    (output_path + ".checkpoint") records how many rows were written and the
+    output size; a later run resumes from there and discards any partial tail.
+
+    Args:
+        input_path: CSV or JSONL input file
+        output_path: JSONL output file
+        client: Model client used for generation (shared by all workers)
+        concurrency: Number of rows processed in parallel
+        resume: Continue from an existing checkpoint instead of starting over
+        checkpoint_every: Rows between checkpoint writes
+        service: Validation, compression and prompt budget settings
+            (default: FeedbackService(client))
+
+    Returns:
+        Counters for this run: processed, ok, invalid, error, skipped
+    """
+    service = service or FeedbackService(client)
+    checkpoint_path = output_path + ".checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path) if resume else {"rows_done": 0, "offset": 0}
+    rows_done = checkpoint["rows_done"]
+    stats = {"processed": 0, "ok": 0, "invalid": 0, "error": 0, "skipped": rows_done}
+
+    mode = "r+b" if rows_done and os.path.exists(output_path) else "wb"
+    with open(output_path, mode) as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        out.seek(checkpoint["offset"] if mode == "r+b" else 0)
+        out.truncate()
+
+        pending: Deque[Future] = deque()
+
+        def write_next() -> None:
+            nonlocal rows_done
+            record = pending.popleft().result()
+            out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            rows_done += 1
+            stats["processed"] += 1
+            stats[record["status"]] += 1
+            if stats["processed"] % checkpoint_every == 0:
+                out.flush()
+                _save_checkpoint(checkpoint_path, rows_done, out.tell())
+
+        for index, row in enumerate(read_rows(input_path)):
+            if index < checkpoint["rows_done"]:
+                continue
+            pending.append(executor.submit(process_row, client, row, service))
+            if len(pending) >= 2 * concurrency:
+                write_next()
+
+        while pending:
+            write_next()
+
+        out.flush()
+        _save_checkpoint(checkpoint_path, rows_done, out.tell())
+
+    return stats
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Enhance feedback drafts in bulk.")
+    parser.add_argument("input", help="CSV or JSONL file with a feedback_text column")
+    parser.add_argument("output", help="JSONL file for the results")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", 4)))
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--cache", default=os.getenv("RESPONSE_CACHE", "memory"),
+                        help="Response cache backend: memory, sqlite or off")
+    args = parser.parse_args(argv)
+    # A bad value stops the run before any row is processed
+    compression_ratio = compression_ratio_from_env()
+
+    # numpy comes with the semantic cache; importing core.batch stays light
+    from core.semantic_cache import create_semantic_cache
+
+    with ModelClient(
+        use_local=os.getenv("USE_LOCAL_MODEL", "false").lower() == "true",
+        pool_maxsize=max(args.concurrency, 1),
+        cache=create_cache(
+            backend=args.cache,
+            path=os.getenv("RESPONSE_CACHE_PATH", "feedback_cache.sqlite3")
+        ),
+        semantic_cache=create_semantic_cache(
+            model=os.getenv("SEMANTIC_CACHE_MODEL", "off"),
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.9)),
+            path=os.getenv("SEMANTIC_CACHE_PATH", "")
+        )
+    ) as client:
+        stats = run_batch(
+            args.input,
+            args.output,
+            client,
+            concurrency=args.concurrency,
+            resume=not args.no_resume,
+            # Same overflow and compression settings as app.py
+            service=FeedbackService(
+                client,
+                on_overflow=os.getenv("PROMPT_OVERFLOW", "reject"),
+                compression_ratio=compression_ratio
+            )
+        )
+
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
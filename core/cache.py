@@ -0,0 +1,242 @@
+"""
+Response caches for parsed model output
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Any
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss/eviction counters for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+def make_cache_key(
+    feedback_text: str,
+    feedback_type: str,
+    tone: str,
+    formality: str,
+    model_name: str,
+    temperature: float,
+    top_p: float
+) -> str:
+    """
+    Build a cache key for a feedback request.
+
+    Args:
+        feedback_text: Sanitized feedback text (output of validators.sanitize_text)
+        feedback_type: Type of feedback
+        tone: Desired tone
+        formality: Formality level
+        model_name: Model used for generation
+        temperature: Sampling temperature
+        top_p: Nucleus sampling parameter
+
+    Returns:
+        Hex digest identifying the request
+    """
+    raw = json.dumps(
+        [feedback_text, feedback_type, tone, formality, model_name, temperature, top_p],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Base class for response caches. Subclasses implement get/set/clear."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before LRU eviction
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache with TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        super().__init__(max_entries, ttl)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            created, value = entry
+            if self._expired(created, now):
+                del self._entries[key]
+                self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache backed by SQLite, shared across processes and restarts."""
+
+    def __init__(
+        self,
+        path: str = "feedback_cache.sqlite3",
+        max_entries: int = 10000,
+        ttl: Optional[float] = 86400
+    ):
+        """
+        Initialize the SQLite cache.
+
+        Args:
+            path: Database file path
+            max_entries: Maximum number of entries before LRU eviction
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        super().__init__(max_entries, ttl)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        # Wall clock: entries outlive the process
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            value, created = row
+            if self._expired(created, now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats.evictions += 1
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats.hits += 1
+            return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats.evictions += overflow
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_cache(
+    backend: str = "memory",
+    max_entries: int = 1024,
+    ttl: Optional[float] = 3600,
+    path: str = "feedback_cache.sqlite3"
+) -> Optional[ResponseCache]:
+    """
+    Create a response cache by backend name.
+
+    Args:
+        backend: "memory", "sqlite" or "off"
+        max_entries: Maximum number of entries
+        ttl: Entry lifetime in seconds (None or <= 0 for no expiry)
+        path: Database path for the sqlite backend
+
+    Returns:
+        Cache instance, or None when caching is disabled
+    """
+    backend = backend.lower()
+    if ttl is not None and ttl <= 0:
+        ttl = None
+    if backend in ("off", "none", ""):
+        return None
+    if backend == "sqlite":
+        return SQLiteCache(path=path, max_entries=max_entries, ttl=ttl)
+    if backend == "memory":
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,184 @@
+"""
+Compression of long feedback drafts before they are sent to the model
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from core.fast_engine import score_sentence, split_sentences
+
+
+# Everything after these lines is a quoted earlier message (unless they come
+# first, as in a forwarded message)
+_REPLY_MARKER = re.compile(
+    r"^(?:em .{0,120}escreveu:|on .{0,120}wrote:|-{2,}\s*(?:mensagem original|original message)\s*-{2,})$",
+    re.IGNORECASE
+)
+# E-mail headers of forwarded messages, only stripped before any content
+# ("Data: sexta" further down is part of the feedback)
+_HEADER = re.compile(r"^(?:de|from|para|to|cc|enviad[oa]|sent|data|date|assunto|subject):\s", re.IGNORECASE)
+# Lines that carry no feedback
+_BOILERPLATE = re.compile(
+    r"^(?:enviado do meu .*|sent from my .*|[-=_*~#]{3,}"
+    r"|(?:esta|this) (?:mensagem|message|e-?mail)\b.*\b(?:confidencia|confidential).*)$",
+    re.IGNORECASE
+)
+# Sign-offs that start a signature block near the end of the text
+_SIGN_OFF = re.compile(
+    r"^(?:atenciosamente|att|at\.te|abraços?|abs|cordialmente|saudações|grat[oa]|obrigad[oa]s?)[,.!]*$",
+    re.IGNORECASE
+)
+SIGNATURE_MAX_LINES = 5
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class CompressionResult:
+    """A compressed draft and what was removed from it."""
+
+    text: str
+    original_length: int
+    removed: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ratio(self) -> float:
+        """Compressed length over original length (1.0 when nothing was removed)."""
+        return len(self.text) / self.original_length if self.original_length else 1.0
+
+
+def _strip_lines(lines: List[str], removed: Dict[str, int]) -> List[str]:
+    """Drop quoted replies, headers, boilerplate and the signature block."""
+    kept = []
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        reply_marker = _REPLY_MARKER.match(stripped)
+        if reply_marker and kept:
+            removed["quoted"] = removed.get("quoted", 0) + len(lines) - index
+            break
+        if stripped.startswith(">"):
+            removed["quoted"] = removed.get("quoted", 0) + 1
+        elif reply_marker or (not kept and _HEADER.match(stripped)) or _BOILERPLATE.match(stripped):
+            # Before any content the marker opens a forwarded message
+            removed["boilerplate"] = removed.get("boilerplate", 0) + 1
+        elif stripped:
+            kept.append(stripped)
+
+    # A "--" delimiter or a sign-off among the last lines starts the signature,
+    # provided some content comes before it
+    for i in range(max(1, len(kept) - SIGNATURE_MAX_LINES), len(kept)):
+        if kept[i] in ("--", "-- ") or _SIGN_OFF.match(kept[i]):
+            removed["signature"] = removed.get("signature", 0) + len(kept) - i
+            return kept[:i]
+    return kept
+
+
+def _dedupe(lines: List[str], removed: Dict[str, int]) -> List[List[str]]:
+    """Split lines into sentences, dropping sentences seen before."""
+    seen = set()
+    result = []
+    for line in lines:
+        sentences = []
+        for sentence in split_sentences(line):
+            key = " ".join(_WORD.findall(sentence.lower()))
+            if key in seen:
+                removed["duplicate"] = removed.get("duplicate", 0) + 1
+                continue
+            seen.add(key)
+            sentences.append(sentence)
+        if sentences:
+            result.append(sentences)
+    return result
+
+
+def _select(paragraphs: List[List[str]], max_chars: int, removed: Dict[str, int]) -> List[List[str]]:
+    """Keep the highest-scoring sentences (ties to the earliest) within max_chars."""
+    indexed: List[Tuple[int, int, str]] = [
+        (p, s, sentence) for p, sentences in enumerate(paragraphs) for s, sentence in enumerate(sentences)
+    ]
+    ranked = sorted(range(len(indexed)), key=lambda i: (-sum(score_sentence(indexed[i][2])), i))
+    chosen = set()
+    length = -1  # no separator before the first sentence
+    for i in ranked:
+        cost = len(indexed[i][2]) + 1
+        if chosen and length + cost > max_chars:
+            continue
+        chosen.add(i)
+        length += cost
+    removed["low_score"] = removed.get("low_score", 0) + len(indexed) - len(chosen)
+
+    result: List[List[str]] = [[] for _ in paragraphs]
+    for i in sorted(chosen):
+        result[indexed[i][0]].append(indexed[i][2])
+    return [sentences for sentences in result if sentences]
+
+
+def compress_feedback(text: str, ratio: float = 1.0) -> CompressionResult:
+    """
+    Compress a feedback draft.
+
+    Quoted replies, e-mail headers, boilerplate lines, the signature block
+    and repeated sentences are always removed. When the result is still
+    longer than ratio times the original, the sentences with the fewest
+    fato/impacto/sugestão cues are dropped until it fits (at least one
+    sentence is kept). A draft that would compress to nothing is returned
+    unchanged.
+
+    Args:
+        text: Sanitized feedback text (see validators.sanitize_text)
+        ratio: Target length as a fraction of the original, in (0, 1];
+            1.0 only removes redundancy
+
+    Returns:
+        CompressionResult with the compressed text
+
+    Raises:
+        ValueError: If ratio is outside (0, 1]
+    """
+    if not 0 < ratio <= 1:
+        raise ValueError(f"ratio must be in (0, 1], got {ratio}")
+    removed: Dict[str, int] = {}
+    paragraphs = _dedupe(_strip_lines(text.splitlines(), removed), removed)
+
+    max_chars = int(len(text) * ratio)
+    compressed = "\n".join(" ".join(sentences) for sentences in paragraphs)
+    if len(compressed) > max_chars:
+        paragraphs = _select(paragraphs, max_chars, removed)
+        compressed = "\n".join(" ".join(sentences) for sentences in paragraphs)
+    if not compressed:
+        # Everything looked like redundancy (e.g. a fully quoted draft); the
+        # model gets the draft as written rather than nothing
+        return CompressionResult(text=text, original_length=len(text))
+
+    return CompressionResult(
+        text=compressed,
+        original_length=len(text),
+        removed=removed
+    )
+
+
+def compression_ratio_from_env(environ: Mapping[str, str] = os.environ) -> Optional[float]:
+    """
+    Read PROMPT_COMPRESSION_RATIO, failing at startup rather than on the first draft.
+
+    Args:
+        environ: Environment to read
+
+    Returns:
+        Ratio for compress_feedback, or None when unset or 0 (compression off)
+
+    Raises:
+        ValueError: If the value is not a number in (0, 1]
+    """
+    value = environ.get("PROMPT_COMPRESSION_RATIO", "").strip()
+    try:
+        ratio = float(value or 0)
+    except ValueError:
+        raise ValueError(f"PROMPT_COMPRESSION_RATIO must be a number in (0, 1], got {value!r}") from None
+    if ratio == 0:
+        return None
+    if not 0 < ratio <= 1:
+        raise ValueError(f"PROMPT_COMPRESSION_RATIO must be in (0, 1] (or 0 to disable), got {value!r}")
+    return ratio
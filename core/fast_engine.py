@@ -0,0 +1,259 @@
+"""
+Offline rule-based feedback enhancement (the "fast mode" engine)
+"""
+
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from core.text_normalizer import get_normalizer, load_replacements, match_case
+
+
+HARSH_PHRASES_PATH = Path(__file__).parent.parent / "data" / "harsh_phrases_pt_br.tsv"
+
+# Word prefixes that mark each part of the Fato-Impacto-Sugestão structure
+FACT_STEMS = (
+    "ontem", "hoje", "anteontem", "semana", "mês", "mes", "segunda", "terça",
+    "quarta", "quinta", "sexta", "reuni", "entreg", "prazo", "projeto",
+    "relatório", "apresenta", "cliente", "tarefa", "sprint", "código", "demanda",
+    "quando", "durante", "último", "última", "dia", "vezes", "manhã", "tarde"
+)
+IMPACT_STEMS = (
+    "impact", "afet", "prejudic", "atrapalh", "dificult", "difícil", "consequ",
+    "result", "gerou", "causou", "causa", "retrabalho", "risco", "confus", "perd",
+    "preocup", "sobrecarreg", "frustr", "compromet", "atras", "desgast",
+    "expectativ", "desmotiv", "insegur"
+)
+SUGGESTION_STEMS = (
+    "precis", "dever", "sugir", "sugiro", "sugest", "recomend", "poderia",
+    "podemos", "podería", "tente", "tentar", "procur", "evit", "consider",
+    "important", "ideal", "combin", "alinh", "próxim", "gostaria", "proponh",
+    "vamos", "seria"
+)
+# Generalizations worth pointing out in the extra suggestions
+ABSOLUTES = frozenset({"sempre", "nunca", "ninguém", "jamais"})
+
+DEFAULT_FIS = {
+    "fato": "Situação descrita no feedback original.",
+    "impacto": "Isso pode afetar os resultados e a colaboração da equipe.",
+    "sugestao": "Vamos conversar sobre os próximos passos e combinar como avançar."
+}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\s*\n+\s*")
+_WORD = re.compile(r"\w+")
+_DIGIT = re.compile(r"\d")
+
+# Sentences and words kept in versao_curta
+SHORT_SENTENCES = 2
+SHORT_WORDS = 40
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences at final punctuation and line breaks.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Non-empty sentences, in order
+    """
+    return [s for s in (part.strip() for part in _SENTENCE_END.split(text)) if s]
+
+
+@lru_cache(maxsize=4096)
+def _classify(word: str) -> Tuple[int, int, int]:
+    """(fato, impacto, sugestão) hits of a lowercase word."""
+    return (
+        int(word.startswith(FACT_STEMS)),
+        int(word.startswith(IMPACT_STEMS)),
+        int(word.startswith(SUGGESTION_STEMS))
+    )
+
+
+def score_sentence(sentence: str) -> Tuple[int, int, int]:
+    """
+    Score a sentence against the fato, impacto and sugestão lexicons.
+
+    Numbers (dates, counts) also count as facts.
+
+    Args:
+        sentence: Sentence to score
+
+    Returns:
+        Tuple of (fato, impacto, sugestao) keyword counts
+    """
+    fact = impact = suggestion = 0
+    for word in _WORD.findall(sentence.lower()):
+        f, i, s = _classify(word)
+        fact += f
+        impact += i
+        suggestion += s
+    if _DIGIT.search(sentence):
+        fact += 1
+    return fact, impact, suggestion
+
+
+def _ensure_period(sentence: str) -> str:
+    sentence = sentence[:1].upper() + sentence[1:]
+    return sentence if sentence[-1] in ".!?…" else sentence + "."
+
+
+class FastEngine:
+    """
+    Deterministic feedback enhancement without an LLM.
+
+    The text is normalized (see core.text_normalizer), harsh phrasing is
+    rewritten from a rule table, and the sentences are scored against small
+    lexicons to fill in the Fato-Impacto-Sugestão structure and pick the
+    summary extractively. Typical feedback is processed in well under a
+    millisecond.
+    """
+
+    def __init__(self, rewrites: Mapping[str, str]):
+        """
+        Compile the rewrite table.
+
+        Args:
+            rewrites: Mapping of harsh phrases to their rewrite
+        """
+        self.rewrites = {k.lower(): v for k, v in rewrites.items() if k.strip()}
+        # Longest phrases first, so "você nunca" wins over a bare "nunca" rule
+        phrases = sorted(self.rewrites, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(r"\s+".join(map(re.escape, p.split())) for p in phrases) + r")(?!\w)",
+            re.IGNORECASE
+        ) if phrases else None
+
+    @classmethod
+    def from_file(cls, path: Path = HARSH_PHRASES_PATH) -> "FastEngine":
+        """Create an engine from a rewrite table file (see load_replacements)."""
+        return cls(load_replacements(path, defaults={}))
+
+    def _rewrite_match(self, match: "re.Match[str]") -> str:
+        phrase = match.group(0)
+        return match_case(phrase, self.rewrites[" ".join(phrase.lower().split())])
+
+    def rewrite(self, text: str) -> Tuple[str, int]:
+        """
+        Rewrite harsh phrasing.
+
+        Args:
+            text: Text to rewrite
+
+        Returns:
+            Tuple of (rewritten text, number of rewrites)
+        """
+        if self._pattern is None:
+            return text, 0
+        return self._pattern.subn(self._rewrite_match, text)
+
+    def enhance(self, text: str) -> Dict[str, Any]:
+        """
+        Enhance feedback text.
+
+        Args:
+            text: Original feedback text
+
+        Returns:
+            Dictionary with feedback_aprimorado, versao_curta,
+            fato_impacto_sugestao and sugestoes_extras
+        """
+        improved, rewrites = self.rewrite(get_normalizer().normalize(text))
+        sentences = [_ensure_period(s) for s in split_sentences(improved)]
+        scores = [score_sentence(s) for s in sentences]
+
+        fis, used = self._extract_fis(sentences, scores)
+        return {
+            "feedback_aprimorado": " ".join(sentences) if sentences else improved,
+            "versao_curta": self._summarize(sentences, scores),
+            "fato_impacto_sugestao": fis,
+            "sugestoes_extras": self._extra_suggestions(text, scores, used, rewrites)
+        }
+
+    @staticmethod
+    def _extract_fis(
+        sentences: List[str],
+        scores: List[Tuple[int, int, int]]
+    ) -> Tuple[Dict[str, str], Dict[str, bool]]:
+        """Pick one distinct sentence per FIS part, or a default for missing parts."""
+        taken = set()
+
+        def best(part: int, prefer_late: bool) -> Optional[int]:
+            candidates = [i for i in range(len(sentences)) if i not in taken and scores[i][part] > 0]
+            if not candidates:
+                return None
+            index = max(candidates, key=lambda i: (scores[i][part], i if prefer_late else -i))
+            taken.add(index)
+            return index
+
+        # Suggestions usually close the feedback and facts open it
+        suggestion = best(2, prefer_late=True)
+        impact = best(1, prefer_late=True)
+        fact = best(0, prefer_late=False)
+        found = {"fato": fact is not None, "impacto": impact is not None, "sugestao": suggestion is not None}
+        if fact is None:
+            remaining = [i for i in range(len(sentences)) if i not in taken]
+            fact = remaining[0] if remaining else None
+
+        fis = dict(DEFAULT_FIS)
+        for part, index in (("fato", fact), ("impacto", impact), ("sugestao", suggestion)):
+            if index is not None:
+                fis[part] = sentences[index]
+        return fis, found
+
+    @staticmethod
+    def _summarize(sentences: List[str], scores: List[Tuple[int, int, int]]) -> str:
+        """Highest-scoring sentences (ties to the earliest), in their original order."""
+        if not sentences:
+            return ""
+        ranked = sorted(range(len(sentences)), key=lambda i: (-sum(scores[i]) - (i == 0), i))
+        chosen = sorted(ranked[:SHORT_SENTENCES])
+        words = " ".join(sentences[i] for i in chosen).split()
+        if len(words) > SHORT_WORDS:
+            return " ".join(words[:SHORT_WORDS]) + "..."
+        return " ".join(words)
+
+    @staticmethod
+    def _extra_suggestions(
+        text: str,
+        scores: List[Tuple[int, int, int]],
+        found: Dict[str, bool],
+        rewrites: int
+    ) -> List[str]:
+        """Tips derived from what the feedback is missing."""
+        tips = []
+        if rewrites:
+            tips.append("Descreva comportamentos observados em vez de julgamentos pessoais")
+        if ABSOLUTES.intersection(_WORD.findall(text.lower())):
+            tips.append("Evite generalizações como \"sempre\" e \"nunca\"; cite situações específicas")
+        if not any(score[0] for score in scores):
+            tips.append("Inclua um exemplo concreto: quando e em que situação aconteceu")
+        if not found["impacto"]:
+            tips.append("Explique o impacto do comportamento na equipe ou nos resultados")
+        if not found["sugestao"]:
+            tips.append("Termine com uma ação clara para os próximos passos")
+        for tip in (
+            "Foque em ações, não em características pessoais",
+            "Ofereça apoio e pergunte como você pode ajudar",
+            "Use linguagem respeitosa e construtiva"
+        ):
+            if len(tips) >= 3:
+                break
+            tips.append(tip)
+        return tips[:5]
+
+
+_default_engine: Optional[FastEngine] = None
+
+
+def get_fast_engine() -> FastEngine:
+    """Return the process-wide engine (rewrite table from HARSH_PHRASES_PATH)."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = FastEngine.from_file(
+            Path(os.getenv("HARSH_PHRASES_PATH", str(HARSH_PHRASES_PATH)))
+        )
+    return _default_engine
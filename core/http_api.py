@@ -0,0 +1,193 @@
+"""
+HTTP/JSON API over the feedback enhancement pipeline
+
+Endpoints (JSON bodies with feedback_text and the optional feedback_type,
+tone and formality):
+    POST /api/v1/enhance         -> parsed response dict
+    POST /api/v1/enhance/batch   -> {"results": [...]} for {"items": [...]}
+    POST /api/v1/enhance/stream  -> NDJSON lines {"partial": {...}}, then
+                                    {"result": {...}} (or {"error": "..."})
+    GET  /api/v1/health          -> admission, circuit breaker and cache counters
+    GET  /metrics                -> Prometheus text format (with METRICS_ENABLED)
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+from core.admission import RateLimitedError, ServiceBusyError, client_id
+from core.metrics import CONTENT_TYPE, metrics
+from core.service import FeedbackService, InvalidFeedbackError
+from core.token_budget import PromptTooLongError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with gradio
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """JSON response rendered with dumps()."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class EnhanceRequest(BaseModel):
+    """A feedback draft and its options (empty options take the defaults)."""
+
+    feedback_text: str
+    feedback_type: str = "geral"
+    tone: str = "construtivo"
+    formality: str = "neutro"
+
+
+class BatchRequest(BaseModel):
+    """Several drafts enhanced in one call."""
+
+    items: List[EnhanceRequest]
+
+
+def error_response(error: Exception) -> JSONBytesResponse:
+    """
+    Map a pipeline exception to an HTTP error.
+
+    Args:
+        error: Exception raised by FeedbackService
+
+    Returns:
+        422 for invalid input, 413 for oversized feedback, 429/503 (with
+        Retry-After) when rate limited or busy, 500 otherwise
+    """
+    if isinstance(error, InvalidFeedbackError):
+        return JSONBytesResponse({
+            "error": str(error),
+            "errors": [{"field": e.field, "code": e.code, "message": e.message} for e in error.errors]
+        }, status_code=422)
+    if isinstance(error, PromptTooLongError):
+        return JSONBytesResponse({"error": str(error)}, status_code=413)
+    if isinstance(error, RateLimitedError):
+        return JSONBytesResponse({"error": str(error)}, status_code=429,
+                                 headers={"Retry-After": str(max(1, round(error.retry_after)))})
+    if isinstance(error, ServiceBusyError):
+        return JSONBytesResponse({"error": str(error)}, status_code=503, headers={"Retry-After": "5"})
+    return JSONBytesResponse({"error": f"Erro ao processar feedback: {error}"}, status_code=500)
+
+
+def _batch_record(outcome: Any) -> Dict[str, Any]:
+    """Per-item batch result, with the statuses of core.batch."""
+    if not isinstance(outcome, Exception):
+        return {"status": "ok", "result": outcome}
+    if isinstance(outcome, InvalidFeedbackError):
+        return {"status": "invalid", "error": str(outcome),
+                "errors": [{"field": e.field, "code": e.code} for e in outcome.errors]}
+    if isinstance(outcome, PromptTooLongError):
+        return {"status": "invalid", "error": str(outcome),
+                "errors": [{"field": "feedback_text", "code": "prompt_too_long"}]}
+    if isinstance(outcome, ServiceBusyError):
+        return {"status": "busy", "error": str(outcome)}
+    return {"status": "error", "error": str(outcome)}
+
+
+def create_api(service: FeedbackService, max_batch_items: int = 32) -> FastAPI:
+    """
+    Build the API app.
+
+    The Gradio interface can be mounted on the result (gr.mount_gradio_app)
+    so both share the service, and with it the model client and caches.
+
+    Args:
+        service: Pipeline used by every endpoint
+        max_batch_items: Largest accepted batch
+
+    Returns:
+        FastAPI application
+    """
+    api = FastAPI(title="FeedbackCraft AI", default_response_class=JSONBytesResponse)
+
+    @api.get("/api/v1/health")
+    async def health() -> Response:
+        client = service.client
+        return JSONBytesResponse({
+            "status": "ok",
+            "admission": service.admission.stats() if service.admission is not None else None,
+            "circuit": client.circuit_breaker.stats(),
+            "cache": client.cache.stats.as_dict() if client.cache is not None else None,
+            "semantic_cache": client.semantic_cache.stats.as_dict() if client.semantic_cache is not None else None
+        })
+
+    @api.get("/metrics")
+    async def prometheus_metrics() -> Response:
+        if not metrics.enabled:
+            return JSONBytesResponse({"error": "Métricas desativadas (METRICS_ENABLED=true)."}, status_code=404)
+        return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+    @api.post("/api/v1/enhance")
+    async def enhance(body: EnhanceRequest, request: Request) -> Response:
+        try:
+            result = await service.enhance(**body.model_dump(), client_id=client_id(request))
+        except Exception as e:
+            return error_response(e)
+        return JSONBytesResponse(result)
+
+    @api.post("/api/v1/enhance/batch")
+    async def enhance_batch(body: BatchRequest, request: Request) -> Response:
+        if len(body.items) > max_batch_items:
+            return JSONBytesResponse(
+                {"error": f"O lote pode ter no máximo {max_batch_items} itens."}, status_code=413
+            )
+        # One rate limit charge per HTTP request, however many items it has
+        try:
+            service.check_rate_limit(client_id(request))
+        except Exception as e:
+            return error_response(e)
+        # At most max_concurrent items of one batch compete for model slots,
+        # so a batch never fills the admission waiting room by itself
+        limit = asyncio.Semaphore(service.admission.max_concurrent if service.admission is not None else 8)
+
+        async def run(item: EnhanceRequest) -> Dict[str, Any]:
+            async with limit:
+                return await service.enhance(**item.model_dump(), client_id=None)
+
+        outcomes = await asyncio.gather(*(run(item) for item in body.items), return_exceptions=True)
+        return JSONBytesResponse({"results": [_batch_record(outcome) for outcome in outcomes]})
+
+    @api.post("/api/v1/enhance/stream")
+    async def enhance_stream(body: EnhanceRequest, request: Request) -> Response:
+        stream = service.enhance_stream(**body.model_dump(), client_id=client_id(request))
+        # Errors before the first chunk still get a proper status code
+        try:
+            first = await stream.__anext__()
+        except Exception as e:
+            return error_response(e)
+
+        async def lines() -> AsyncIterator[bytes]:
+            chunk = first
+            try:
+                while True:
+                    done, data = chunk
+                    yield dumps({"result": data} if done else {"partial": data}) + b"\n"
+                    if done:
+                        return
+                    chunk = await stream.__anext__()
+            except Exception as e:
+                yield dumps({"error": str(e)}) + b"\n"
+            finally:
+                await stream.aclose()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return api
@@ -0,0 +1,55 @@
+"""
+Import cost of the application modules, measured with `python -X importtime`
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = ("core.model_client", "core.async_model_client", "core.service", "core.batch", "app")
+
+# Dependencies that cost 100 ms or more to import (or, like http.server,
+# serve an optional feature) and are only needed once a request is made or
+# the interface/API is built
+HEAVY_MODULES = (
+    "gradio", "fastapi", "uvicorn", "requests", "httpx", "numpy",
+    "sentence_transformers", "hnswlib", "llama_cpp", "tokenizers", "http.server"
+)
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Import a module in a fresh interpreter and collect -X importtime output.
+
+    Args:
+        module: Dotted module name, importable from the repository root
+
+    Returns:
+        Mapping of every module imported to (self, cumulative) microseconds
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def heavy_imports(times: Dict[str, Tuple[int, int]]) -> List[str]:
+    """Heavy modules (or their submodules) among the imported modules."""
+    return sorted({
+        heavy for name in times for heavy in HEAVY_MODULES
+        if name == heavy or name.startswith(heavy + ".")
+    })
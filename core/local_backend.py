@@ -0,0 +1,298 @@
+"""
+Local CPU inference backend (llama.cpp / GGUF)
+
+Requires the optional llama-cpp-python package and a GGUF model file, e.g. a
+quantized small instruct model such as Qwen2.5-1.5B-Instruct-Q4_K_M.gguf.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.scheduler import MicroBatcher
+
+
+class LocalBackendUnavailable(RuntimeError):
+    """Raised when the local backend cannot be loaded."""
+
+
+def _load_llama_cpp() -> Any:
+    try:
+        import llama_cpp
+    except ImportError as e:
+        raise LocalBackendUnavailable(
+            "llama-cpp-python não está instalado. Instale com: pip install llama-cpp-python"
+        ) from e
+    return llama_cpp
+
+
+@dataclass
+class GenerationRequest:
+    """
+    One completion request for the local backend.
+
+    Attributes:
+        prompt: Input prompt
+        max_tokens: Maximum new tokens
+        temperature: Sampling temperature
+        top_p: Nucleus sampling parameter
+        prefix: Static part at the start of prompt whose state is reused
+    """
+
+    prompt: str
+    max_tokens: int
+    temperature: float
+    top_p: float
+    prefix: Optional[str] = None
+
+
+class LocalBackend:
+    """
+    GGUF model running on CPU threads through llama.cpp.
+
+    The model is loaded on first use and shared by every caller; calls are
+    serialized because a llama.cpp context is not thread-safe.
+
+    Callers pass the static prompt prefix (see PromptTemplate.build_parts).
+    It is prefilled once and its attention state saved; each request then
+    restores that state, if another prompt evicted it, and only evaluates
+    its own suffix. An optional RAM KV-cache keyed by token prefix can also
+    be enabled for reuse beyond the static prefix.
+
+    With max_batch_size > 1, concurrent generate() calls go through a
+    MicroBatcher: requests arriving within `max_wait` seconds are handed to
+    one worker, which still completes them one after another (llama-cpp-
+    python's high-level API decodes a single sequence) but ordered so that
+    requests sharing a prefix run back to back, and each caller gets its
+    answer as soon as its own completion ends. That saves prefix state
+    restores when prompts use several prefixes; it adds up to `max_wait` of
+    queueing otherwise, so it is off by default.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_threads: Optional[int] = None,
+        n_ctx: int = 4096,
+        n_batch: int = 512,
+        kv_cache_bytes: int = 0,
+        max_batch_size: int = 1,
+        max_wait: float = 0.005
+    ):
+        """
+        Initialize the backend (the model itself is loaded lazily).
+
+        Args:
+            model_path: Path to the GGUF model file
+            n_threads: CPU threads for inference (default: all cores)
+            n_ctx: Context window in tokens
+            n_batch: Prompt tokens evaluated per batch
+            kv_cache_bytes: Capacity of the RAM KV-cache (0 disables it)
+            max_batch_size: Maximum requests grouped per batch (1, the
+                default, disables grouping)
+            max_wait: Seconds to wait for more requests before running a batch
+        """
+        self.model_path = model_path
+        self.n_threads = n_threads or os.cpu_count() or 1
+        self.n_ctx = n_ctx
+        self.n_batch = n_batch
+        self.kv_cache_bytes = kv_cache_bytes
+        self._llama: Any = None
+        self._prefix: Optional[str] = None
+        self._prefix_state: Any = None
+        self._prefix_live = False
+        self._load_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.batcher: Optional[MicroBatcher] = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(
+                self.iter_batch,
+                max_batch_size=max_batch_size,
+                max_wait=max_wait,
+                name="local-backend-batcher"
+            )
+
+    @property
+    def llama(self) -> Any:
+        """The loaded llama_cpp.Llama instance."""
+        if self._llama is None:
+            with self._load_lock:
+                if self._llama is None:
+                    self._llama = self._load()
+        return self._llama
+
+    def _load(self) -> Any:
+        if not os.path.exists(self.model_path):
+            raise LocalBackendUnavailable(f"Modelo local não encontrado: {self.model_path}")
+        llama_cpp = _load_llama_cpp()
+        llama = llama_cpp.Llama(
+            model_path=self.model_path,
+            n_threads=self.n_threads,
+            n_ctx=self.n_ctx,
+            n_batch=self.n_batch,
+            verbose=False
+        )
+        if self.kv_cache_bytes:
+            llama.set_cache(llama_cpp.LlamaRAMCache(capacity_bytes=self.kv_cache_bytes))
+        return llama
+
+    def _messages(self, prompt: str) -> list:
+        return [{"role": "user", "content": prompt}]
+
+    def _use_prefix(self, llama: Any, prompt: str, prefix: Optional[str]) -> None:
+        # Called with self.lock held. llama.cpp skips prompt tokens that match
+        # the tokens already in its context, so once the prefix is evaluated
+        # only the request's suffix is computed.
+        if not prefix or not prompt.startswith(prefix):
+            self._prefix_live = False
+            return
+        if prefix != self._prefix:
+            llama.reset()
+            llama.create_chat_completion(messages=self._messages(prefix), max_tokens=1, temperature=0.0)
+            self._prefix_state = llama.save_state()
+            self._prefix = prefix
+        elif not self._prefix_live:
+            llama.load_state(self._prefix_state)
+        self._prefix_live = True
+
+    def warm_up(self, prefix: str) -> None:
+        """
+        Load the model and prefill a prompt prefix ahead of the first request.
+
+        Args:
+            prefix: Static prompt prefix shared by later requests
+        """
+        llama = self.llama
+        with self.lock:
+            self._use_prefix(llama, prefix, prefix)
+
+    def generate(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        prefix: Optional[str] = None
+    ) -> str:
+        """
+        Generate a completion for the prompt.
+
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum new tokens
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            prefix: Static part at the start of prompt whose state is reused
+
+        Returns:
+            Generated text
+        """
+        request = GenerationRequest(prompt, max_tokens, temperature, top_p, prefix)
+        if self.batcher is not None:
+            return self.batcher.run(request)
+        llama = self.llama
+        with self.lock:
+            return self._complete(llama, request)
+
+    def generate_batch(self, requests: List[GenerationRequest]) -> List[Any]:
+        """
+        Complete several requests, one after another, grouped by prefix.
+
+        Args:
+            requests: Requests to complete
+
+        Returns:
+            Generated text for each request, in order, or the exception raised
+            by that request
+        """
+        results: List[Any] = [None] * len(requests)
+        for i, result in self.iter_batch(requests):
+            results[i] = result
+        return results
+
+    def iter_batch(self, requests: List[GenerationRequest]) -> Iterator[Tuple[int, Any]]:
+        """
+        Complete several requests grouped by prefix, yielding each one as it ends.
+
+        Args:
+            requests: Requests to complete
+
+        Yields:
+            (index in requests, generated text or the exception it raised)
+        """
+        try:
+            llama = self.llama
+        except LocalBackendUnavailable as e:
+            yield from ((i, e) for i in range(len(requests)))
+            return
+        # Requests sharing the loaded prefix first, then grouped by prefix,
+        # so each prefix state is restored at most once per batch
+        order = sorted(
+            range(len(requests)),
+            key=lambda i: (requests[i].prefix != self._prefix, requests[i].prefix or "")
+        )
+        with self.lock:
+            for i in order:
+                try:
+                    result: Any = self._complete(llama, requests[i])
+                except Exception as e:
+                    result = e
+                yield i, result
+
+    def _complete(self, llama: Any, request: GenerationRequest) -> str:
+        # Called with self.lock held
+        self._use_prefix(llama, request.prompt, request.prefix)
+        result = llama.create_chat_completion(
+            messages=self._messages(request.prompt),
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            top_p=request.top_p
+        )
+        return result["choices"][0]["message"]["content"] or ""
+
+    def stream(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        prefix: Optional[str] = None
+    ) -> Iterator[str]:
+        """Generate a completion, yielding text chunks as they are sampled."""
+        llama = self.llama
+        with self.lock:
+            self._use_prefix(llama, prompt, prefix)
+            for chunk in llama.create_chat_completion(
+                messages=self._messages(prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                stream=True
+            ):
+                text = chunk["choices"][0].get("delta", {}).get("content")
+                if text:
+                    yield text
+
+
+_backends: Dict[str, LocalBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_local_backend(model_path: str, **kwargs: Any) -> LocalBackend:
+    """
+    Return the process-wide backend for a model file, creating it once.
+
+    Args:
+        model_path: Path to the GGUF model file
+        **kwargs: LocalBackend options, used only when the backend is created
+
+    Returns:
+        Shared LocalBackend instance
+    """
+    with _backends_lock:
+        backend = _backends.get(model_path)
+        if backend is None:
+            backend = LocalBackend(model_path, **kwargs)
+            _backends[model_path] = backend
+        return backend
@@ -0,0 +1,366 @@
+"""
+Lightweight metrics in the Prometheus text exposition format
+
+Instrumentation is off unless enabled (METRICS_ENABLED=true in app.py).
+Every hook first checks metrics.enabled. stage() hands out a shared no-op
+timer while disabled; paths that also serve cache hits use clock()
+instead, which returns None, so a disabled process pays a truth test per
+stage there.
+
+Stages (feedbackcraft_stage_duration_seconds) nest: "model" covers the
+whole model call, including its "http" attempts and "parse_response".
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # http.server loads in serve_metrics() only; every client imports this module
+    from http.server import ThreadingHTTPServer
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from in-process stages to slow model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class _Metric:
+    """Base for a metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{self._labels(labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: observations per bucket (the last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry is not None else 0
+
+    def samples(self) -> Iterator[str]:
+        # Copy the counts too: observe() updates them in place
+        with self._lock:
+            values = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{self._labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(labels)} {repr(total)}"
+            yield f"{self.name}_count{self._labels(labels)} {cumulative}"
+
+
+class _NullTimer:
+    """Timer handed out while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Observes the duration of a block, optionally counted in an in-flight gauge."""
+
+    __slots__ = ("histogram", "labels", "gauge", "gauge_labels", "started")
+
+    def __init__(
+        self,
+        histogram: Histogram,
+        labels: Tuple[str, ...],
+        gauge: Optional[Gauge] = None,
+        gauge_labels: Tuple[str, ...] = ()
+    ):
+        self.histogram = histogram
+        self.labels = labels
+        self.gauge = gauge
+        self.gauge_labels = gauge_labels
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        if self.gauge is not None:
+            self.gauge.inc(*self.gauge_labels)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        if self.gauge is not None:
+            self.gauge.dec(*self.gauge_labels)
+
+
+class StageClock:
+    """Times consecutive stages: each lap() records the time since the previous one."""
+
+    __slots__ = ("histogram", "last")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, stage)
+        self.last = now
+
+
+class Metrics:
+    """
+    The application's metrics.
+
+    Hooks check `enabled` before recording anything; stage() and request()
+    return a no-op context manager while disabled.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize the metrics.
+
+        Args:
+            enabled: Record from the start (see enable())
+        """
+        self.enabled = enabled
+        self.stage_seconds = Histogram(
+            "feedbackcraft_stage_duration_seconds", "Duration of each pipeline stage.", ("stage",)
+        )
+        self.request_seconds = Histogram(
+            "feedbackcraft_request_duration_seconds", "Duration of enhancement requests.", ("mode",)
+        )
+        self.fallbacks = Counter(
+            "feedbackcraft_fallbacks_total", "Answers served by the fallback engine, by cause.", ("cause",)
+        )
+        self.cache_lookups = Counter(
+            "feedbackcraft_cache_lookups_total", "Response cache lookups by cache and result.", ("cache", "result")
+        )
+        self.tokens = Counter(
+            "feedbackcraft_tokens_total", "Model tokens sent (in) and generated (out).", ("direction",)
+        )
+        self.in_flight = Gauge(
+            "feedbackcraft_in_flight", "Requests (and upstream HTTP calls) in progress.", ("stage",)
+        )
+        self.circuit_state = Gauge(
+            "feedbackcraft_circuit_state", "1 for the current state of each circuit breaker.", ("circuit", "state")
+        )
+        self.circuit_transitions = Counter(
+            "feedbackcraft_circuit_transitions_total", "Circuit breaker state changes.", ("circuit", "from", "to")
+        )
+        self._families = (
+            self.stage_seconds, self.request_seconds, self.fallbacks,
+            self.cache_lookups, self.tokens, self.in_flight,
+            self.circuit_state, self.circuit_transitions
+        )
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def stage(self, name: str, in_flight: bool = False) -> Any:
+        """
+        Time a block as pipeline stage `name`.
+
+        Args:
+            name: Stage label
+            in_flight: Also count the block in feedbackcraft_in_flight
+
+        Returns:
+            Context manager
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        if in_flight:
+            return _Timer(self.stage_seconds, (name,), self.in_flight, (name,))
+        return _Timer(self.stage_seconds, (name,))
+
+    def clock(self) -> Optional[StageClock]:
+        """Lap timer for consecutive stages, or None while disabled."""
+        return StageClock(self.stage_seconds) if self.enabled else None
+
+    def request(self, mode: str) -> Any:
+        """Time a whole request (mode: "enhance" or "stream") and count it in flight."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.request_seconds, (mode,), self.in_flight, ("request",))
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        """Record a stage duration measured by the caller."""
+        if self.enabled:
+            self.stage_seconds.observe(seconds, name)
+
+    def record_circuit(self, circuit: str, old_state: Optional[str], new_state: str) -> None:
+        """
+        Record a circuit breaker's state (a CircuitBreaker listener calls this).
+
+        Args:
+            circuit: Breaker name
+            old_state: Previous state, or None to only set the current one
+            new_state: Current state
+        """
+        if not self.enabled:
+            return
+        if old_state is not None:
+            self.circuit_state.set(circuit, old_state, value=0)
+            self.circuit_transitions.inc(circuit, old_state, new_state)
+        self.circuit_state.set(circuit, new_state, value=1)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        return "\n".join(family.render() for family in self._families) + "\n"
+
+    def reset(self) -> None:
+        """Drop every recorded value (the enabled flag is kept)."""
+        for family in self._families:
+            family.clear()
+
+
+# Process-wide metrics, shared by every client and service
+metrics = Metrics()
+
+
+def timed(stage: str) -> Callable:
+    """Decorator timing every call of a function as pipeline stage `stage`."""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            with metrics.stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> "ThreadingHTTPServer":
+    """
+    Serve the metrics over HTTP from a background thread.
+
+    For deployments without the HTTP API (which serves them on /metrics).
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        host: Interface to bind
+
+    Returns:
+        The running server (shutdown() stops it)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -3,9 +3,31 @@ Model client for interacting with LLM APIs
 """
 
 import json
+import logging
 import os
-from typing import Dict, Optional, Any
-import requests
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Any, Tuple
+
+from core.cache import ResponseCache, make_cache_key
+from core.fast_engine import get_fast_engine
+from core.local_backend import LocalBackend, LocalBackendUnavailable, get_local_backend
+from core.metrics import metrics, timed
+from core.prompt_builder import extract_feedback_text, get_prompt_template
+from core.resilience import CircuitBreaker, RetryPolicy, retry_hint
+from core.router import Router
+from core.singleflight import SingleFlight, flight_key
+from core.stream_parser import salvage_response
+from core.token_budget import TokenBudget
+from core.text_normalizer import get_normalizer
+
+if TYPE_CHECKING:
+    # requests (and numpy, via the semantic cache) load on first use only
+    import requests
+
+    from core.semantic_cache import SemanticCache, SemanticKey
+
+logger = logging.getLogger(__name__)
 
 
 class ModelClient:
@@ -15,7 +37,23 @@ class ModelClient:
         self,
         model_name: Optional[str] = None,
         api_key: Optional[str] = None,
-        use_local: bool = False
+        use_local: bool = False,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        timeout: float = 60,
+        cache: Optional[ResponseCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        local_model_path: Optional[str] = None,
+        local_threads: Optional[int] = None,
+        local_batch_size: Optional[int] = None,
+        local_batch_wait: Optional[float] = None,
+        api_url: Optional[str] = None,
+        router: Optional[Router] = None,
+        token_budget: Optional[TokenBudget] = None,
+        semantic_cache: Optional["SemanticCache"] = None
     ):
         """
         Initialize the model client.
@@ -23,7 +61,29 @@ class ModelClient:
         Args:
             model_name: Hugging Face model name (default: meta-llama/Meta-Llama-3.1-8B-Instruct)
             api_key: Hugging Face API key (optional, can use env var HF_API_KEY)
-            use_local: Whether to use local model (for future implementation)
+            use_local: Whether to use the local CPU model instead of the API
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Maximum pooled connections per host
+            pool_block: Block when a host pool is exhausted instead of opening extra connections
+            keep_alive: Reuse connections between calls (False sends "Connection: close")
+            timeout: Request timeout in seconds
+            cache: Optional cache for parsed responses (see core.cache)
+            retry_policy: Retry/backoff policy for transient API failures
+            circuit_breaker: Breaker that short-circuits to the fallback while the endpoint is failing
+            local_model_path: GGUF model file for use_local (can use env var LOCAL_MODEL_PATH)
+            local_threads: CPU threads for the local model (can use env var LOCAL_MODEL_THREADS)
+            local_batch_size: Maximum requests grouped by prefix on the local model
+                (can use env var LOCAL_BATCH_SIZE, default 1: no grouping; see LocalBackend)
+            local_batch_wait: Seconds to wait for more requests before running a local group
+                (can use env var LOCAL_BATCH_WAIT_MS, default 5 ms)
+            api_url: Endpoint URL (default: the Inference API URL for model_name);
+                any server accepting the same payload, e.g. TGI, can be used
+            router: Route generation over several backends instead (see core.router)
+            token_budget: Context window split used to size max_new_tokens (default:
+                env vars MODEL_CONTEXT_TOKENS, 4096 locally and 8192 otherwise, and
+                MAX_NEW_TOKENS, default 4096; counts tokens with TOKENIZER_PATH if set)
+            semantic_cache: Optional cache serving responses of similar drafts
+                on exact-cache misses (see core.semantic_cache)
         """
         self.model_name = model_name or os.getenv(
             "HF_MODEL_NAME",
@@ -31,12 +91,93 @@ class ModelClient:
         )
         self.api_key = api_key or os.getenv("HF_API_KEY", "")
         self.use_local = use_local
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.model_name}"
+        self.api_url = api_url or f"https://api-inference.huggingface.co/models/{self.model_name}"
+        self.router = router
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._single_flight = SingleFlight()
+        self.local_model_path = local_model_path or os.getenv("LOCAL_MODEL_PATH", "")
+        self.local_threads = local_threads or int(os.getenv("LOCAL_MODEL_THREADS", 0)) or None
+        self.local_batch_size = local_batch_size or int(os.getenv("LOCAL_BATCH_SIZE", 1))
+        if local_batch_wait is None:
+            local_batch_wait = float(os.getenv("LOCAL_BATCH_WAIT_MS", 5)) / 1000
+        self.local_batch_wait = local_batch_wait
+        self.token_budget = token_budget or TokenBudget(
+            context_window=int(os.getenv("MODEL_CONTEXT_TOKENS", 4096 if use_local else 8192)),
+            max_new_tokens=int(os.getenv("MAX_NEW_TOKENS", 4096))
+        )
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def local_backend(self) -> LocalBackend:
+        """Shared local backend for local_model_path (loaded once per process)."""
+        if not self.local_model_path:
+            raise LocalBackendUnavailable("Defina LOCAL_MODEL_PATH com o caminho do modelo GGUF.")
+        return get_local_backend(
+            self.local_model_path,
+            n_threads=self.local_threads,
+            max_batch_size=self.local_batch_size,
+            max_wait=self.local_batch_wait
+        )
+
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled HTTP session, created on first use and shared across threads."""
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                session = self._session
+                if session is None:
+                    session = self._create_session()
+                    self._session = session
+        return session
+
+    def _create_session(self) -> "requests.Session":
+        """Create a session with a keep-alive connection pool mounted for HTTP(S)."""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self) -> None:
+        """Close pooled connections. The client can still be used afterwards."""
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+        if self.router is not None:
+            self.router.close()
+        if self.semantic_cache is not None:
+            self.semantic_cache.save()
+
+    def __enter__(self) -> "ModelClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
 
     def generate(
         self,
         prompt: str,
-        max_length: int = 1500,
+        max_length: Optional[int] = None,
         temperature: float = 0.7,
         top_p: float = 0.9
     ) -> str:
@@ -45,31 +186,254 @@ class ModelClient:
 
         Args:
             prompt: Input prompt
-            max_length: Maximum response length
+            max_length: Maximum response length in tokens (default: sized from the prompt, see max_new_tokens)
             temperature: Sampling temperature
             top_p: Nucleus sampling parameter
 
         Returns:
             Generated text response
         """
-        if self.use_local:
-            return self._generate_local(prompt, max_length, temperature, top_p)
-        else:
-            return self._generate_api(prompt, max_length, temperature, top_p)
+        if max_length is None:
+            max_length = self.max_new_tokens(prompt)
+        return self._generate_with_meta(prompt, max_length, temperature, top_p)[0]
 
-    def _generate_api(
+    def _generate_with_meta(
         self,
         prompt: str,
         max_length: int,
         temperature: float,
-        top_p: float
+        top_p: float,
+        budget: Optional[float] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate text and return it with call metadata (e.g. retry count).
+
+        budget caps the seconds spent on API retries below the retry policy's
+        deadline (the router passes what is left of its own deadline).
+        """
+        if self.router is not None:
+            return self.router.generate_with_meta(prompt, max_length, temperature, top_p)
+        if self.use_local:
+            return self._generate_local(prompt, max_length, temperature, top_p), {}
+        else:
+            return self._generate_api(prompt, max_length, temperature, top_p, budget)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_length: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9
+    ) -> Iterator[str]:
+        """
+        Generate text using the LLM, yielding tokens as they arrive.
+
+        Args:
+            prompt: Input prompt
+            max_length: Maximum response length in tokens (default: sized from the prompt, see max_new_tokens)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+
+        Yields:
+            Text chunks; concatenated they form the same response as generate()
+        """
+        if max_length is None:
+            max_length = self.max_new_tokens(prompt)
+        if self.router is not None:
+            yield from self.router.generate_stream(prompt, max_length, temperature, top_p)
+        elif self.use_local:
+            yield from self._generate_local_stream(prompt, max_length, temperature, top_p)
+        else:
+            yield from self._generate_api_stream(prompt, max_length, temperature, top_p)
+
+    def max_new_tokens(self, prompt: str) -> int:
+        """
+        Response budget for a prompt, from self.token_budget.
+
+        Unlike PromptTemplate.build_budgeted this never raises: a prompt that
+        overflows the context still gets a minimal budget and the backend
+        decides.
+
+        Args:
+            prompt: Input prompt
+
+        Returns:
+            max_new_tokens to request
+        """
+        budget = self.token_budget
+        prefix = get_prompt_template().static_prefix
+        if prompt.startswith(prefix):
+            prompt_tokens = budget.count_prefix(prefix) + budget.count(prompt[len(prefix):])
+        else:
+            prompt_tokens = budget.count(prompt)
+        feedback_text = extract_feedback_text(prompt)
+        feedback_tokens = prompt_tokens if feedback_text is None else budget.count(feedback_text)
+        return max(1, min(budget.output_tokens(feedback_tokens), budget.available(prompt_tokens)))
+
+    def cache_key(
+        self,
+        feedback_text: str,
+        feedback_type: str,
+        tone: str,
+        formality: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9
     ) -> str:
-        """Generate using Hugging Face Inference API."""
+        """Cache key for a sanitized feedback text and its options on this model."""
+        return make_cache_key(
+            feedback_text, feedback_type, tone, formality,
+            self.model_name, temperature, top_p
+        )
+
+    def semantic_key(
+        self,
+        feedback_text: str,
+        feedback_type: str,
+        tone: str,
+        formality: str,
+        temperature: float = 0.7,
+        top_p: float = 0.9
+    ) -> Optional["SemanticKey"]:
+        """Semantic cache key for the same request as cache_key(), or None without a semantic cache."""
+        if self.semantic_cache is None:
+            return None
+        from core.semantic_cache import SemanticKey
+
+        return SemanticKey(feedback_text, (feedback_type, tone, formality, self.model_name, temperature, top_p))
+
+    def enhance(
+        self,
+        prompt: str,
+        cache_key: Optional[str] = None,
+        max_length: Optional[int] = None,
+        temperature: float = 0.7,
+        top_p: float = 0.9,
+        use_cache: bool = True,
+        semantic_key: Optional["SemanticKey"] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate and parse a response, serving repeated requests from the cache.
+
+        Concurrent calls with the same prompt and parameters share a single
+        upstream request, unless use_cache is False (fresh samples).
+
+        Args:
+            prompt: Input prompt
+            cache_key: Key from cache_key(); no caching when omitted
+            max_length: Maximum response length in tokens (default: sized from the prompt, see max_new_tokens)
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+            use_cache: Set to False to skip the cache and force a fresh sample
+            semantic_key: Key from semantic_key(); no semantic caching when omitted
+
+        Returns:
+            Parsed response dictionary
+        """
+        cached, semantic_key = self.lookup(cache_key, use_cache, semantic_key)
+        if cached is not None:
+            return cached
+        if max_length is None:
+            max_length = self.max_new_tokens(prompt)
+
+        def call() -> Dict[str, Any]:
+            with metrics.stage("model"):
+                response_text, meta = self._generate_with_meta(prompt, max_length, temperature, top_p)
+                response_data = self._attach_meta(self.parse_response(response_text), meta)
+            self.cache_store(cache_key, response_data, use_cache, semantic_key)
+            return response_data
+
+        if not use_cache:
+            return call()
+        return self._single_flight.do(
+            self._flight_key(prompt, max_length, temperature, top_p), call
+        )
+
+    def _flight_key(self, prompt: str, max_length: int, temperature: float, top_p: float) -> str:
+        return flight_key(self.model_name, prompt, max_length, temperature, top_p)
+
+    @staticmethod
+    def _attach_meta(response_data: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge call metadata into the parsed response's "_meta" entry."""
+        if meta and isinstance(response_data, dict):
+            response_data["_meta"] = {**response_data.get("_meta", {}), **meta}
+        return response_data
+
+    def cache_lookup(
+        self,
+        cache_key: Optional[str],
+        use_cache: bool = True,
+        semantic_key: Optional["SemanticKey"] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached parsed response for cache_key, or for a draft similar to semantic_key's."""
+        if not use_cache:
+            return None
+        if self.cache is not None and cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if metrics.enabled:
+                metrics.cache_lookups.inc("exact", "miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+        if self.semantic_cache is not None and semantic_key is not None:
+            cached = self.semantic_cache.get(semantic_key)
+            if metrics.enabled:
+                metrics.cache_lookups.inc("semantic", "miss" if cached is None else "hit")
+            return cached
+        return None
+
+    def lookup(
+        self,
+        cache_key: Optional[str],
+        use_cache: bool = True,
+        semantic_key: Optional["SemanticKey"] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional["SemanticKey"]]:
+        """
+        cache_lookup(), embedding the draft only after an exact-cache miss.
+
+        Returns:
+            (cached response or None, semantic_key with its vector once
+            embedded, to pass on to cache_store())
+        """
+        cached = self.cache_lookup(cache_key, use_cache)
+        if cached is None and use_cache and semantic_key is not None and self.semantic_cache is not None:
+            semantic_key = self.semantic_cache.embed(semantic_key)
+            cached = self.cache_lookup(None, use_cache, semantic_key)
+        return cached, semantic_key
+
+    def cache_store(
+        self,
+        cache_key: Optional[str],
+        response_data: Dict[str, Any],
+        use_cache: bool = True,
+        semantic_key: Optional["SemanticKey"] = None
+    ) -> None:
+        """Store a parsed response under cache_key and semantic_key unless it is a degraded answer."""
+        if not use_cache:
+            return
+        # Degraded answers must not be served again once the model is back
+        meta = response_data.get("_meta", {})
+        if meta.get("fallback") or meta.get("parse_error") or meta.get("truncated"):
+            return
+        if self.cache is not None and cache_key is not None:
+            self.cache.set(cache_key, response_data)
+        if self.semantic_cache is not None and semantic_key is not None:
+            self.semantic_cache.set(semantic_key, response_data)
+
+    def _build_headers(self) -> Dict[str, str]:
+        """Build request headers for the Inference API."""
         headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
 
-        payload = {
+    def _build_payload(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> Dict[str, Any]:
+        """Build the Inference API request body."""
+        return {
             "inputs": prompt,
             "parameters": {
                 "max_new_tokens": max_length,
@@ -82,55 +446,249 @@ class ModelClient:
             }
         }
 
+    @staticmethod
+    def _extract_generated_text(result: Any) -> str:
+        """Extract the generated text from the different API response formats."""
+        if isinstance(result, list) and len(result) > 0:
+            if "generated_text" in result[0]:
+                return result[0]["generated_text"]
+            elif "text" in result[0]:
+                return result[0]["text"]
+
+        if isinstance(result, dict):
+            if "generated_text" in result:
+                return result["generated_text"]
+            elif "text" in result:
+                return result["text"]
+
+        # Fallback: return as string
+        return str(result)
+
+    def _fallback_with_note(self, prompt: str, note: str, cause: str) -> str:
+        """Fallback response with a note explaining why the model was not used."""
+        data = json.loads(self._generate_fallback(prompt, cause))
+        data["observacoes"] = note
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _note_model_loading() -> str:
+        return "⚠️ Modelo está carregando. Aguarde alguns segundos e tente novamente. Usando melhoria básica enquanto isso."
+
+    @staticmethod
+    def _note_http_error(status_code: Any) -> str:
+        return f"⚠️ Erro na API ({status_code}). Usando melhoria básica. Configure HF_API_KEY para usar modelo completo."
+
+    @staticmethod
+    def _note_connection_error(error: Exception) -> str:
+        return f"⚠️ Erro de conexão. Usando melhoria básica. Erro: {str(error)[:100]}"
+
+    @staticmethod
+    def _note_circuit_open() -> str:
+        return "⚠️ Serviço do modelo temporariamente indisponível. Usando melhoria básica enquanto isso."
+
+    def _circuit_open_response(self, prompt: str, retries: int = 0) -> Tuple[str, Dict[str, Any]]:
+        return self._fallback_with_note(
+            prompt, self._note_circuit_open(), "circuit_open"
+        ), {"retries": retries}
+
+    @staticmethod
+    def _json_or_none(response: Any) -> Any:
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def _generate_api(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float,
+        budget: Optional[float] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate using Hugging Face Inference API.
+
+        Transient failures (retryable statuses, connection errors, timeouts) are
+        retried per self.retry_policy; the fallback is used only once the
+        attempts or the time budget (the policy's deadline, or budget seconds
+        when lower) run out.
+
+        Returns:
+            Tuple of (generated text, metadata with the retry count)
+        """
+        import requests
+
+        policy = self.retry_policy
+        deadline = time.monotonic() + (policy.deadline if budget is None else min(policy.deadline, budget))
+        headers = self._build_headers()
+        payload = self._build_payload(prompt, max_length, temperature, top_p)
+        retries = 0
+
+        breaker = self.circuit_breaker
+
+        while True:
+            if not breaker.allow_request():
+                return self._circuit_open_response(prompt, retries)
+            response = None
+            try:
+                with metrics.stage("http", in_flight=True):
+                    response = self.session.post(
+                        self.api_url,
+                        headers=headers,
+                        json=payload,
+                        timeout=min(self.timeout, max(deadline - time.monotonic(), 0.001))
+                    )
+
+                if response.status_code in policy.retry_statuses:
+                    breaker.record_failure()
+                    delay = policy.next_delay(
+                        retries, retry_hint(response.headers, self._json_or_none(response))
+                    )
+                    if policy.should_retry(retries, delay, deadline - time.monotonic()):
+                        logger.warning("retrying after HTTP %s in %.2fs", response.status_code, delay)
+                        time.sleep(delay)
+                        retries += 1
+                        continue
+                elif response.status_code in policy.failure_statuses:
+                    # Reachable, but rejects every call (credentials, model name)
+                    breaker.record_failure()
+                else:
+                    # Other client errors are about this request, not the endpoint
+                    breaker.record_success()
+
+                # Model is loading (503 status), use fallback with message
+                if response.status_code == 503:
+                    return self._fallback_with_note(
+                        prompt, self._note_model_loading(), "model_loading"
+                    ), {"retries": retries}
+
+                response.raise_for_status()
+
+                text = self._extract_generated_text(response.json())
+                if metrics.enabled:
+                    self._record_tokens(prompt, text)
+                return text, {"retries": retries}
+
+            except requests.exceptions.HTTPError as e:
+                # HTTP error (401, 403, etc.) - likely API key issue
+                return self._fallback_with_note(
+                    prompt, self._note_http_error(e.response.status_code), "http_error"
+                ), {"retries": retries}
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                breaker.record_failure()
+                delay = policy.backoff(retries)
+                if policy.should_retry(retries, delay, deadline - time.monotonic()):
+                    logger.warning("retrying after %s in %.2fs", type(e).__name__, delay)
+                    time.sleep(delay)
+                    retries += 1
+                    continue
+                return self._fallback_with_note(
+                    prompt, self._note_connection_error(e), "connection_error"
+                ), {"retries": retries}
+            except (requests.exceptions.RequestException, Exception) as e:
+                # Fallback response for demo purposes (catch all exceptions)
+                if response is None:
+                    breaker.record_failure()
+                return self._fallback_with_note(
+                    prompt, self._note_connection_error(e), "connection_error"
+                ), {"retries": retries}
+
+    @staticmethod
+    def _parse_sse_line(line: str) -> Optional[str]:
+        """
+        Extract the token text from one server-sent event line.
+
+        Returns None for keep-alives, special tokens and the final summary event.
+        Raises ValueError when the server reports an error mid-stream.
+        """
+        if not line or not line.startswith("data:"):
+            return None
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            return None
+        event = json.loads(data)
+        if "error" in event:
+            raise ValueError(event["error"])
+        token = event.get("token") or {}
+        if token.get("special"):
+            return None
+        return token.get("text") or None
+
+    def _generate_api_stream(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> Iterator[str]:
+        """Stream tokens from the Hugging Face Inference API (server-sent events)."""
+        import requests
+
+        payload = self._build_payload(prompt, max_length, temperature, top_p)
+        payload["stream"] = True
+        started = time.perf_counter()
+        yielded = False
+        breaker = self.circuit_breaker
+
+        if not breaker.allow_request():
+            yield self._circuit_open_response(prompt)[0]
+            return
+
+        response = None
         try:
-            response = requests.post(
+            with self.session.post(
                 self.api_url,
-                headers=headers,
+                headers=self._build_headers(),
                 json=payload,
-                timeout=60
-            )
-            
-            # Check if model is loading (503 status)
-            if response.status_code == 503:
-                # Model is loading, use fallback with message
-                fallback_response = self._generate_fallback(prompt)
-                # Add note about model loading
-                data = json.loads(fallback_response)
-                data["observacoes"] = "⚠️ Modelo está carregando. Aguarde alguns segundos e tente novamente. Usando melhoria básica enquanto isso."
-                return json.dumps(data, ensure_ascii=False, indent=2)
-            
-            response.raise_for_status()
-            
-            result = response.json()
-            
-            # Handle different response formats
-            if isinstance(result, list) and len(result) > 0:
-                if "generated_text" in result[0]:
-                    return result[0]["generated_text"]
-                elif "text" in result[0]:
-                    return result[0]["text"]
-            
-            if isinstance(result, dict):
-                if "generated_text" in result:
-                    return result["generated_text"]
-                elif "text" in result:
-                    return result["text"]
-            
-            # Fallback: return as string
-            return str(result)
-            
+                timeout=self.timeout,
+                stream=True
+            ) as response:
+                if response.status_code in self.retry_policy.retry_statuses | self.retry_policy.failure_statuses:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                if response.status_code == 503:
+                    yield self._fallback_with_note(prompt, self._note_model_loading(), "model_loading")
+                    return
+
+                response.raise_for_status()
+
+                # Endpoints without streaming support answer with a plain JSON body
+                if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                    yielded = True
+                    text = self._extract_generated_text(response.json())
+                    if metrics.enabled:
+                        self._record_tokens(prompt, text)
+                    yield text
+                    return
+
+                response.encoding = "utf-8"
+                generated = 0
+                for line in response.iter_lines(decode_unicode=True):
+                    token = self._parse_sse_line(line)
+                    if token is None:
+                        continue
+                    if not yielded:
+                        yielded = True
+                        logger.info("time_to_first_token=%.3fs", time.perf_counter() - started)
+                        metrics.observe_stage("first_token", time.perf_counter() - started)
+                    generated += 1
+                    yield token
+                if metrics.enabled:
+                    self._record_tokens(prompt, generated_tokens=generated)
+
         except requests.exceptions.HTTPError as e:
-            # HTTP error (401, 403, etc.) - likely API key issue
-            fallback_response = self._generate_fallback(prompt)
-            data = json.loads(fallback_response)
-            data["observacoes"] = f"⚠️ Erro na API ({e.response.status_code}). Usando melhoria básica. Configure HF_API_KEY para usar modelo completo."
-            return json.dumps(data, ensure_ascii=False, indent=2)
-        except (requests.exceptions.RequestException, Exception) as e:
-            # Fallback response for demo purposes (catch all exceptions)
-            fallback_response = self._generate_fallback(prompt)
-            data = json.loads(fallback_response)
-            data["observacoes"] = f"⚠️ Erro de conexão. Usando melhoria básica. Erro: {str(e)[:100]}"
-            return json.dumps(data, ensure_ascii=False, indent=2)
+            yield self._fallback_with_note(prompt, self._note_http_error(e.response.status_code), "http_error")
+        except Exception as e:
+            if response is None:
+                breaker.record_failure()
+            if yielded:
+                # Partial output already reached the caller; stop the stream here
+                logger.warning("stream interrupted after first token: %s", e)
+                return
+            yield self._fallback_with_note(prompt, self._note_connection_error(e), "connection_error")
 
     def _generate_local(
         self,
@@ -139,45 +697,68 @@ class ModelClient:
         temperature: float,
         top_p: float
     ) -> str:
-        """Generate using local model (placeholder for future implementation)."""
-        # This would use transformers library for local inference
-        # For now, return fallback
-        return self._generate_fallback(prompt)
+        """Generate using the local CPU model, falling back when it cannot be loaded."""
+        try:
+            text = self.local_backend.generate(
+                prompt, max_length, temperature, top_p,
+                prefix=get_prompt_template().static_prefix
+            )
+        except LocalBackendUnavailable as e:
+            return self._fallback_with_note(prompt, self._note_local_unavailable(e), "local_unavailable")
+        except Exception as e:
+            logger.exception("local generation failed")
+            return self._fallback_with_note(prompt, self._note_local_unavailable(e), "local_error")
+        if metrics.enabled:
+            self._record_tokens(prompt, text)
+        return text
+
+    def _record_tokens(self, prompt: str, text: str = "", generated_tokens: Optional[int] = None) -> None:
+        """Count the prompt's tokens and the generated ones (counted from text unless given)."""
+        metrics.tokens.inc("in", amount=self.token_budget.count(prompt))
+        metrics.tokens.inc("out", amount=self.token_budget.count(text) if generated_tokens is None else generated_tokens)
+
+    def _generate_local_stream(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> Iterator[str]:
+        """Stream from the local CPU model, falling back when it cannot be loaded."""
+        yielded = False
+        try:
+            chunks = self.local_backend.stream(
+                prompt, max_length, temperature, top_p,
+                prefix=get_prompt_template().static_prefix
+            )
+            for chunk in chunks:
+                yielded = True
+                yield chunk
+        except Exception as e:
+            if yielded:
+                logger.warning("local stream interrupted: %s", e)
+                return
+            cause = "local_unavailable" if isinstance(e, LocalBackendUnavailable) else "local_error"
+            yield self._fallback_with_note(prompt, self._note_local_unavailable(e), cause)
 
-    def _generate_fallback(self, prompt: str) -> str:
+    @staticmethod
+    def _note_local_unavailable(error: Exception) -> str:
+        return f"⚠️ Modelo local indisponível. Usando melhoria básica. Erro: {str(error)[:100]}"
+
+    def _generate_fallback(self, prompt: str, cause: str = "fallback") -> str:
         """
         Fallback response when API is unavailable.
-        This provides a basic structure for demonstration with improved text processing.
+        The text is enhanced by the offline rule-based engine (see core.fast_engine).
+        The "_meta" entry marks the response as degraded so it is never cached.
         """
-        # Extract feedback text from prompt (simple extraction)
-        if "TEXTO ORIGINAL PARA MELHORAR:" in prompt:
-            parts = prompt.split("TEXTO ORIGINAL PARA MELHORAR:")
-            if len(parts) > 1:
-                original_text = parts[1].split("INSTRUÇÕES:")[0].strip()
-                
-                # Improved text processing (better than just capitalize)
-                improved = self._improve_text_basic(original_text)
-                
-                # Create short version
-                words = improved.split()
-                short_version = " ".join(words[:15]) + ("..." if len(words) > 15 else "")
-
-                return json.dumps({
-                    "feedback_aprimorado": improved,
-                    "versao_curta": short_version,
-                    "fato_impacto_sugestao": {
-                        "fato": "Feedback recebido para análise e melhoria",
-                        "impacto": "Oportunidade de aprimorar a comunicação profissional",
-                        "sugestao": "Revisar o feedback aprimorado e aplicar as sugestões fornecidas"
-                    },
-                    "sugestoes_extras": [
-                        "Seja específico sobre comportamentos observados",
-                        "Foque em ações, não em características pessoais",
-                        "Ofereça exemplos concretos quando possível",
-                        "Use linguagem respeitosa e construtiva"
-                    ],
-                    "observacoes": "⚠️ Modo fallback ativo. Para melhorias mais sofisticadas, configure uma chave de API do Hugging Face ou use um modelo local."
-                }, ensure_ascii=False, indent=2)
+        if metrics.enabled:
+            metrics.fallbacks.inc(cause)
+        original_text = extract_feedback_text(prompt)
+        if original_text is not None:
+            data = get_fast_engine().enhance(original_text)
+            data["observacoes"] = "⚠️ Modo fallback ativo. Para melhorias mais sofisticadas, configure uma chave de API do Hugging Face ou use um modelo local."
+            data["_meta"] = {"fallback": True, "cause": cause}
+            return json.dumps(data, ensure_ascii=False, indent=2)
 
         return json.dumps({
             "feedback_aprimorado": "Erro ao processar feedback.",
@@ -188,57 +769,18 @@ class ModelClient:
                 "sugestao": "Tente novamente ou verifique a conexão"
             },
             "sugestoes_extras": [],
-            "observacoes": "Erro no processamento do feedback."
+            "observacoes": "Erro no processamento do feedback.",
+            "_meta": {"fallback": True, "cause": cause}
         }, ensure_ascii=False, indent=2)
     
     def _improve_text_basic(self, text: str) -> str:
         """
         Basic text improvement when LLM is not available.
-        This is a simple rule-based improvement.
+        This is a simple rule-based improvement (see core.text_normalizer).
         """
-        if not text:
-            return text
-        
-        # Capitalize first letter
-        improved = text.strip().capitalize()
-        
-        # Ensure it ends with punctuation
-        if improved and improved[-1] not in '.!?':
-            improved += '.'
-        
-        # Replace common informal patterns
-        replacements = {
-            'vc': 'você',
-            'pq': 'porque',
-            'tb': 'também',
-            'tbm': 'também',
-            'nao': 'não',
-            'eh': 'é',
-            'ta': 'está',
-            'to': 'estou',
-        }
-        
-        words = improved.split()
-        improved_words = []
-        for word in words:
-            word_lower = word.lower().rstrip('.,!?;:')
-            if word_lower in replacements:
-                # Preserve capitalization and punctuation
-                punct = word[len(word_lower):]
-                improved_words.append(replacements[word_lower].capitalize() + punct)
-            else:
-                improved_words.append(word)
-        
-        improved = ' '.join(improved_words)
-        
-        # Add professional touch
-        if not any(improved.startswith(prefix) for prefix in ['Sua', 'Você', 'O', 'A', 'Os', 'As']):
-            # Try to make it more professional
-            if improved.lower().startswith('você'):
-                improved = improved[0].upper() + improved[1:]
-        
-        return improved
+        return get_normalizer().normalize(text)
 
+    @timed("parse_response")
     def parse_response(self, response_text: str) -> Dict[str, Any]:
         """
         Parse LLM response into structured format.
@@ -264,15 +806,23 @@ class ModelClient:
         try:
             return json.loads(response_text)
         except json.JSONDecodeError:
-            # If JSON parsing fails, return a structured error response
-            return {
-                "feedback_aprimorado": response_text[:500] if response_text else "Erro ao processar resposta.",
-                "versao_curta": "Resposta não formatada corretamente",
-                "fato_impacto_sugestao": {
-                    "fato": "Resposta do modelo não está no formato esperado",
-                    "impacto": "Dados podem estar incompletos",
-                    "sugestao": "Tente novamente ou verifique a configuração do modelo"
-                },
-                "sugestoes_extras": [],
-                "observacoes": f"Resposta original: {response_text[:200]}"
-            }
+            pass
+
+        # Truncated at max_new_tokens or surrounded by extra text: keep what is usable
+        salvaged = salvage_response(response_text)
+        if salvaged is not None:
+            return salvaged
+
+        # Nothing recoverable, return a structured error response
+        return {
+            "feedback_aprimorado": response_text[:500] if response_text else "Erro ao processar resposta.",
+            "versao_curta": "Resposta não formatada corretamente",
+            "fato_impacto_sugestao": {
+                "fato": "Resposta do modelo não está no formato esperado",
+                "impacto": "Dados podem estar incompletos",
+                "sugestao": "Tente novamente ou verifique a configuração do modelo"
+            },
+            "sugestoes_extras": [],
+            "observacoes": f"Resposta original: {response_text[:200]}",
+            "_meta": {"parse_error": True}
+        }
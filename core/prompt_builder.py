@@ -2,25 +2,21 @@
 Prompt builder for constructing LLM prompts
 """
 
-from typing import Optional
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
 from pathlib import Path
 
+from core.compression import compress_feedback
+from core.token_budget import TokenBudget
 
-def load_master_prompt() -> str:
-    """
-    Load the master prompt template from file.
 
-    Returns:
-        Master prompt template as string
-    """
-    prompt_path = Path(__file__).parent.parent / "prompts" / "master_prompt.txt"
+MASTER_PROMPT_PATH = Path(__file__).parent.parent / "prompts" / "master_prompt.txt"
 
-    try:
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        # Fallback prompt if file doesn't exist
-        return """Você é um especialista em comunicação profissional e feedback construtivo.
+FALLBACK_MASTER_PROMPT = """Você é um especialista em comunicação profissional e feedback construtivo.
 
 Sua tarefa é melhorar textos de feedback, tornando-os:
 - Claros e objetivos
@@ -30,54 +26,29 @@ Sua tarefa é melhorar textos de feedback, tornando-os:
 
 Siga o formato solicitado e adapte o tom e formalidade conforme as preferências."""
 
+# Map Portuguese labels to English for the model
+TYPE_MAP = {
+    "geral": "general",
+    "desempenho": "performance",
+    "comportamento": "behavioral",
+    "técnico": "technical",
+    "liderança": "leadership"
+}
 
-def build_prompt(
-    feedback_text: str,
-    feedback_type: str = "geral",
-    tone: str = "construtivo",
-    formality: str = "neutro"
-) -> str:
-    """
-    Build a complete prompt for the LLM.
+TONE_MAP = {
+    "construtivo": "constructive and supportive",
+    "neutro": "neutral and balanced",
+    "encorajador": "encouraging and positive",
+    "direto": "direct and straightforward"
+}
 
-    Args:
-        feedback_text: The original feedback text to improve
-        feedback_type: Type of feedback (geral, desempenho, comportamento, técnico, liderança)
-        tone: Desired tone (construtivo, neutro, encorajador, direto)
-        formality: Formality level (formal, neutro, casual)
+FORMALITY_MAP = {
+    "formal": "formal and professional",
+    "neutro": "neutral",
+    "casual": "casual and friendly"
+}
 
-    Returns:
-        Complete formatted prompt
-    """
-    master_prompt = load_master_prompt()
-
-    # Map Portuguese labels to English for the model
-    type_map = {
-        "geral": "general",
-        "desempenho": "performance",
-        "comportamento": "behavioral",
-        "técnico": "technical",
-        "liderança": "leadership"
-    }
-
-    tone_map = {
-        "construtivo": "constructive and supportive",
-        "neutro": "neutral and balanced",
-        "encorajador": "encouraging and positive",
-        "direto": "direct and straightforward"
-    }
-
-    formality_map = {
-        "formal": "formal and professional",
-        "neutro": "neutral",
-        "casual": "casual and friendly"
-    }
-
-    type_en = type_map.get(feedback_type, "general")
-    tone_en = tone_map.get(tone, "constructive")
-    formality_en = formality_map.get(formality, "neutral")
-
-    prompt = f"""{master_prompt}
+CONTEXT_TEMPLATE = """
 
 CONTEXTO:
 - Tipo de feedback: {type_en}
@@ -85,10 +56,14 @@ CONTEXTO:
 - Nível de formalidade: {formality_en}
 
 TEXTO ORIGINAL PARA MELHORAR:
-{feedback_text}
+"""
+
+# The instructions do not depend on the request, so they follow the master
+# prompt and the whole block forms a static prefix shared by every prompt.
+INSTRUCTIONS = """
 
 INSTRUÇÕES:
-1. Analise o texto original
+1. Analise o texto original (no final desta mensagem)
 2. Identifique pontos que podem ser melhorados (clareza, respeito, objetividade)
 3. Gere uma versão aprimorada do feedback
 4. Crie uma versão curta (resumo executivo)
@@ -96,22 +71,376 @@ INSTRUÇÕES:
 6. Forneça sugestões extras de melhoria
 
 FORMATO DE RESPOSTA (JSON):
-{{
+{
     "feedback_aprimorado": "texto completo melhorado",
     "versao_curta": "resumo em 2-3 frases",
-    "fato_impacto_sugestao": {{
+    "fato_impacto_sugestao": {
         "fato": "o que aconteceu/foi observado",
         "impacto": "como isso afeta o trabalho/equipe",
         "sugestao": "ação recomendada"
-    }},
+    },
     "sugestoes_extras": [
         "sugestão 1",
         "sugestão 2",
         "sugestão 3"
     ],
     "observacoes": "notas adicionais sobre o feedback original"
-}}
+}"""
+
+CLOSING = """
 
 Responda APENAS com o JSON válido, sem texto adicional antes ou depois."""
 
-    return prompt
+ORIGINAL_TEXT_MARKER = "TEXTO ORIGINAL PARA MELHORAR:"
+
+# What to do with feedback that does not fit the model context
+OVERFLOW_POLICIES = ("reject", "truncate", "compress")
+
+_SENTENCE_BREAK = re.compile(r"[.!?…]\s|\n")
+
+
+@dataclass(frozen=True)
+class BudgetedPrompt:
+    """A prompt with its token accounting."""
+
+    prompt: str
+    prompt_tokens: int
+    max_new_tokens: int
+    feedback_text: str
+    truncated: bool = False
+
+
+def truncate_to_tokens(text: str, max_tokens: int, count: Callable[[str], int]) -> str:
+    """
+    Cut text to at most max_tokens tokens.
+
+    The cut falls at the last sentence boundary when one is reasonably
+    close, otherwise at the last word boundary.
+
+    Args:
+        text: Text to cut
+        max_tokens: Token limit
+        count: Token counting function
+
+    Returns:
+        The longest prefix found within the limit
+    """
+    tokens = count(text)
+    while text and tokens > max_tokens:
+        head = text[:int(len(text) * max_tokens / tokens * 0.95)]
+        ends = [m.end() for m in _SENTENCE_BREAK.finditer(head)]
+        if ends and ends[-1] > len(head) // 2:
+            head = head[:ends[-1]]
+        elif " " in head:
+            head = head.rsplit(" ", 1)[0]
+        text = head.rstrip()
+        tokens = count(text)
+    return text
+
+
+def _read_master_prompt(path: Path) -> str:
+    """Read the master prompt file, falling back to a built-in prompt."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return FALLBACK_MASTER_PROMPT
+
+
+class PromptTemplate:
+    """
+    Compiled prompt template.
+
+    The master prompt is read once and the text around the user input is
+    precomputed per option combination, so building a prompt is a single
+    string concatenation. The file is re-read when its mtime changes.
+
+    Prompts are laid out as a static prefix (master prompt and instructions,
+    identical for every request) followed by a dynamic suffix (CONTEXTO
+    lines and the user text), so inference backends can reuse the prefix's
+    attention state across requests.
+    """
+
+    def __init__(self, path: Path = MASTER_PROMPT_PATH, check_interval: float = 1.0):
+        """
+        Initialize the template.
+
+        Args:
+            path: Path to the master prompt file
+            check_interval: Minimum seconds between mtime checks
+        """
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._master_prompt = ""
+        self._static_prefix = ""
+        self._heads: Dict[Tuple[str, str, str], str] = {}
+        self._compile(self._stat_mtime())
+
+    def _stat_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _compile(self, mtime: Optional[float]) -> None:
+        self._master_prompt = _read_master_prompt(self.path)
+        self._static_prefix = self._master_prompt + INSTRUCTIONS
+        self._heads = {}
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        mtime = self._stat_mtime()
+        with self._lock:
+            self._checked_at = now
+            if mtime != self._mtime:
+                self._compile(mtime)
+
+    @property
+    def master_prompt(self) -> str:
+        """Current master prompt text."""
+        self._refresh()
+        return self._master_prompt
+
+    @property
+    def static_prefix(self) -> str:
+        """Part of the prompt shared by every request."""
+        self._refresh()
+        return self._static_prefix
+
+    def _head(self, feedback_type: str, tone: str, formality: str) -> str:
+        key = (feedback_type, tone, formality)
+        head = self._heads.get(key)
+        if head is None:
+            head = CONTEXT_TEMPLATE.format(
+                type_en=TYPE_MAP.get(feedback_type, "general"),
+                tone_en=TONE_MAP.get(tone, "constructive"),
+                formality_en=FORMALITY_MAP.get(formality, "neutral")
+            )
+            self._heads[key] = head
+        return head
+
+    def build(
+        self,
+        feedback_text: str,
+        feedback_type: str = "geral",
+        tone: str = "construtivo",
+        formality: str = "neutro"
+    ) -> str:
+        """
+        Build a complete prompt for the LLM.
+
+        Args:
+            feedback_text: The original feedback text to improve
+            feedback_type: Type of feedback
+            tone: Desired tone
+            formality: Formality level
+
+        Returns:
+            Complete formatted prompt
+        """
+        prefix, suffix = self.build_parts(feedback_text, feedback_type, tone, formality)
+        return prefix + suffix
+
+    def build_parts(
+        self,
+        feedback_text: str,
+        feedback_type: str = "geral",
+        tone: str = "construtivo",
+        formality: str = "neutro"
+    ) -> Tuple[str, str]:
+        """
+        Build a prompt split into its static prefix and dynamic suffix.
+
+        Args:
+            feedback_text: The original feedback text to improve
+            feedback_type: Type of feedback
+            tone: Desired tone
+            formality: Formality level
+
+        Returns:
+            Tuple of (static_prefix, dynamic_suffix); their concatenation is
+            the complete prompt
+        """
+        self._refresh()
+        prefix = self._static_prefix
+        return prefix, self._head(feedback_type, tone, formality) + feedback_text + CLOSING
+
+    def build_budgeted(
+        self,
+        feedback_text: str,
+        feedback_type: str = "geral",
+        tone: str = "construtivo",
+        formality: str = "neutro",
+        budget: Optional[TokenBudget] = None,
+        on_overflow: str = "reject"
+    ) -> BudgetedPrompt:
+        """
+        Build a prompt and size the response budget from its token count.
+
+        Args:
+            feedback_text: The original feedback text to improve
+            feedback_type: Type of feedback
+            tone: Desired tone
+            formality: Formality level
+            budget: Context window split (default: TokenBudget())
+            on_overflow: "reject" raises when the prompt does not fit the
+                context window; "truncate" cuts the feedback text to fit;
+                "compress" first compresses it (see core.compression) and
+                cuts what still does not fit
+
+        Returns:
+            BudgetedPrompt with the prompt and its max_new_tokens
+
+        Raises:
+            PromptTooLongError: If the prompt does not fit and cannot be cut
+        """
+        if on_overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"on_overflow must be one of {OVERFLOW_POLICIES}, got {on_overflow!r}")
+        budget = budget or TokenBudget()
+        self._refresh()
+        prefix = self._static_prefix
+        head = self._head(feedback_type, tone, formality)
+        overhead = budget.count_prefix(prefix) + budget.count(head + CLOSING)
+        feedback_tokens = budget.count(feedback_text)
+
+        truncated = False
+        if on_overflow != "reject" and not budget.fits(overhead + feedback_tokens):
+            limit = budget.max_feedback_tokens(overhead)
+            if on_overflow == "compress" and limit > 0:
+                ratio = min(1.0, limit / feedback_tokens)
+                feedback_text = compress_feedback(feedback_text, ratio).text
+            feedback_text = truncate_to_tokens(feedback_text, limit, budget.count)
+            feedback_tokens = budget.count(feedback_text)
+            truncated = True
+
+        prompt_tokens = overhead + feedback_tokens
+        return BudgetedPrompt(
+            prompt=prefix + head + feedback_text + CLOSING,
+            prompt_tokens=prompt_tokens,
+            max_new_tokens=budget.plan(prompt_tokens, feedback_tokens),
+            feedback_text=feedback_text,
+            truncated=truncated
+        )
+
+
+_default_template: Optional[PromptTemplate] = None
+
+
+def get_prompt_template() -> PromptTemplate:
+    """Return the process-wide template for prompts/master_prompt.txt."""
+    global _default_template
+    if _default_template is None:
+        _default_template = PromptTemplate()
+    return _default_template
+
+
+def load_master_prompt() -> str:
+    """
+    Load the master prompt template from file.
+
+    The content is cached and only re-read when the file changes.
+
+    Returns:
+        Master prompt template as string
+    """
+    return get_prompt_template().master_prompt
+
+
+def build_prompt(
+    feedback_text: str,
+    feedback_type: str = "geral",
+    tone: str = "construtivo",
+    formality: str = "neutro"
+) -> str:
+    """
+    Build a complete prompt for the LLM.
+
+    Args:
+        feedback_text: The original feedback text to improve
+        feedback_type: Type of feedback (geral, desempenho, comportamento, técnico, liderança)
+        tone: Desired tone (construtivo, neutro, encorajador, direto)
+        formality: Formality level (formal, neutro, casual)
+
+    Returns:
+        Complete formatted prompt
+    """
+    return get_prompt_template().build(feedback_text, feedback_type, tone, formality)
+
+
+def build_prompt_parts(
+    feedback_text: str,
+    feedback_type: str = "geral",
+    tone: str = "construtivo",
+    formality: str = "neutro"
+) -> Tuple[str, str]:
+    """
+    Build a prompt split into its static prefix and dynamic suffix.
+
+    The prefix (master prompt and instructions) is the same for every
+    request; only the suffix depends on the arguments.
+
+    Args:
+        feedback_text: The original feedback text to improve
+        feedback_type: Type of feedback (geral, desempenho, comportamento, técnico, liderança)
+        tone: Desired tone (construtivo, neutro, encorajador, direto)
+        formality: Formality level (formal, neutro, casual)
+
+    Returns:
+        Tuple of (static_prefix, dynamic_suffix)
+    """
+    return get_prompt_template().build_parts(feedback_text, feedback_type, tone, formality)
+
+
+def build_budgeted_prompt(
+    feedback_text: str,
+    feedback_type: str = "geral",
+    tone: str = "construtivo",
+    formality: str = "neutro",
+    budget: Optional[TokenBudget] = None,
+    on_overflow: str = "reject"
+) -> BudgetedPrompt:
+    """
+    Build a prompt with its token count and response budget.
+
+    Args:
+        feedback_text: The original feedback text to improve
+        feedback_type: Type of feedback (geral, desempenho, comportamento, técnico, liderança)
+        tone: Desired tone (construtivo, neutro, encorajador, direto)
+        formality: Formality level (formal, neutro, casual)
+        budget: Context window split (default: TokenBudget())
+        on_overflow: "reject", "truncate" or "compress" (see PromptTemplate.build_budgeted)
+
+    Returns:
+        BudgetedPrompt with the prompt and its max_new_tokens
+
+    Raises:
+        PromptTooLongError: If the prompt does not fit the context window
+    """
+    return get_prompt_template().build_budgeted(
+        feedback_text, feedback_type, tone, formality, budget=budget, on_overflow=on_overflow
+    )
+
+
+def extract_feedback_text(prompt: str) -> Optional[str]:
+    """
+    Recover the user text from a prompt built by build_prompt().
+
+    Args:
+        prompt: Complete prompt
+
+    Returns:
+        The original feedback text, or None when the prompt has no text section
+    """
+    if ORIGINAL_TEXT_MARKER not in prompt:
+        return None
+    text = prompt.split(ORIGINAL_TEXT_MARKER, 1)[1]
+    # Prompts from older layouts put the instructions after the text
+    terminator = CLOSING if CLOSING in text else "INSTRUÇÕES:"
+    return text.split(terminator, 1)[0].strip()
@@ -0,0 +1,239 @@
+"""
+Resilience policies for calls to the inference endpoint
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Mapping, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by a per-request deadline.
+
+    Attributes:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff for the first retry, in seconds
+        max_delay: Upper bound for a single backoff
+        deadline: Total time budget for one request, retries included
+        retry_statuses: HTTP statuses that are retried
+        failure_statuses: Statuses not worth retrying that still count as a
+            failure for the circuit breaker (the endpoint rejects every call)
+        jitter: Randomize each backoff between 0 and its exponential value
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    deadline: float = 60.0
+    retry_statuses: FrozenSet[int] = frozenset({408, 425, 429, 500, 502, 503, 504})
+    failure_statuses: FrozenSet[int] = frozenset({401, 403, 404})
+    jitter: bool = True
+
+    def backoff(self, retry: int) -> float:
+        """Backoff before the given retry (0-based)."""
+        delay = min(self.max_delay, self.base_delay * (2 ** retry))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(self, retry: int, hint: Optional[float] = None) -> float:
+        """Delay before the given retry, honoring a server hint when present."""
+        if hint is not None:
+            return max(0.0, hint)
+        return self.backoff(retry)
+
+    def should_retry(self, retry: int, delay: float, remaining: float) -> bool:
+        """Whether another attempt fits in both the attempt count and the time budget."""
+        return retry + 1 < self.max_attempts and delay < remaining
+
+
+def retry_hint(headers: Mapping[str, str], body: Any = None) -> Optional[float]:
+    """
+    Extract the server's suggested wait from a response.
+
+    Honors the Retry-After header (seconds or HTTP date) and the
+    "estimated_time" field Hugging Face returns while a model is loading.
+
+    Args:
+        headers: Response headers
+        body: Decoded JSON body, if any
+
+    Returns:
+        Seconds to wait, or None when the server gave no hint
+    """
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            # HTTP-date form, rare enough to import its parser on demand
+            from email.utils import parsedate_to_datetime
+
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    if isinstance(body, dict) and "estimated_time" in body:
+        try:
+            return float(body["estimated_time"])
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a sliding window of call outcomes.
+
+    CLOSED: calls pass; the breaker opens when the failure rate over the last
+    `window` calls reaches `failure_threshold` (after at least `min_calls`).
+    OPEN: calls are rejected until `cooldown` seconds have passed.
+    HALF_OPEN: up to `half_open_max_calls` probe calls pass; a success closes
+    the circuit, a failure opens it again. Callers that abandon a call before
+    its outcome is known return its slot with release().
+
+    State changes are logged and passed to listeners registered with
+    add_listener(); counters are available from stats().
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        cooldown: float = 30.0,
+        half_open_max_calls: int = 1,
+        name: str = "inference"
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Failure rate (0-1) that opens the circuit
+            window: Number of recent calls considered
+            min_calls: Minimum calls in the window before the rate is evaluated
+            cooldown: Seconds the circuit stays open before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+            name: Name used in logs
+        """
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self._state = self.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._rejected = 0
+        self._opened = 0
+        self._listeners: List[Callable[[str, str], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[str, str], None]) -> None:
+        """
+        Register a callback invoked with (old_state, new_state) on transitions.
+
+        Listeners run while the breaker's lock is held and must not call back
+        into the breaker.
+        """
+        self._listeners.append(listener)
+
+    def _transition(self, new_state: str) -> None:
+        # Called with the lock held
+        old_state, self._state = self._state, new_state
+        if new_state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self._opened += 1
+        if new_state != self.HALF_OPEN:
+            self._probes = 0
+        if new_state == self.CLOSED:
+            self._outcomes.clear()
+        logger.warning("circuit %s: %s -> %s", self.name, old_state, new_state)
+        for listener in self._listeners:
+            try:
+                listener(old_state, new_state)
+            except Exception:
+                logger.exception("circuit listener failed")
+
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN to HALF_OPEN once the cool-down has elapsed."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._transition(self.HALF_OPEN)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the endpoint now. Rejections are counted."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def release(self) -> None:
+        """
+        Give back a call slot whose outcome will never be recorded.
+
+        A call cancelled while its request is in flight (a hedged loser, a
+        disconnected client) says nothing about the endpoint; without this
+        its half-open probe slot would stay taken and the circuit would
+        reject every later call.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._transition(self.CLOSED)
+            else:
+                self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit when the threshold is reached."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._transition(self.OPEN)
+                return
+            self._outcomes.append(False)
+            if self._state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_threshold:
+                    self._transition(self.OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current state and counters."""
+        with self._lock:
+            self._maybe_half_open()
+            failures = self._outcomes.count(False)
+            return {
+                "state": self._state,
+                "window_calls": len(self._outcomes),
+                "window_failures": failures,
+                "opened": self._opened,
+                "rejected": self._rejected
+            }
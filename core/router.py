@@ -0,0 +1,560 @@
+"""
+Latency-aware routing across equivalent inference backends
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from core.resilience import CircuitBreaker, RetryPolicy
+
+# Hugging Face endpoints get this key unless the backend names another
+HF_API_KEY_ENV = "HF_API_KEY"
+
+
+def _is_fallback(text: str) -> bool:
+    """Whether a generated text is a fallback answer rather than model output."""
+    if '"_meta"' not in text:
+        return False
+    try:
+        return bool(json.loads(text).get("_meta", {}).get("fallback"))
+    except (ValueError, AttributeError):
+        return False
+
+
+class BackendStats:
+    """
+    Moving averages of one backend's latency and error rate.
+
+    Latency and error rate are exponentially weighted (EWMA); recent
+    successful latencies are also kept to estimate percentiles for hedging.
+    """
+
+    def __init__(self, alpha: float = 0.2, window: int = 100):
+        """
+        Initialize the stats.
+
+        Args:
+            alpha: Weight of the newest sample in the moving averages
+            window: Number of recent latencies kept for percentiles
+        """
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def begin(self) -> None:
+        """Count a call as in flight."""
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, latency: Optional[float], ok: bool) -> None:
+        """
+        Record the outcome of a call started with begin().
+
+        Args:
+            latency: Call duration in seconds, or None for a cancelled call
+            ok: Whether the backend produced a model answer
+        """
+        with self._lock:
+            self.in_flight -= 1
+            if latency is None:
+                return
+            self.calls += 1
+            if not ok:
+                self.failures += 1
+            self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+            if ok:
+                self._samples.append(latency)
+                if self.latency is None:
+                    self.latency = latency
+                else:
+                    self.latency += self.alpha * (latency - self.latency)
+
+    def quantile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Latency quantile over the recent successful calls, or None without enough samples."""
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Current averages and counters."""
+        with self._lock:
+            return {
+                "latency_ewma": self.latency,
+                "error_rate_ewma": self.error_rate,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "failures": self.failures
+            }
+
+
+class RouteTarget:
+    """A named backend: a model client plus its routing statistics."""
+
+    def __init__(self, name: str, client: Any, alpha: float = 0.2):
+        """
+        Initialize the target.
+
+        Args:
+            name: Backend name used in logs, stats and response metadata
+            client: ModelClient (or AsyncModelClient) bound to the backend
+            alpha: EWMA weight for the backend's stats
+        """
+        self.name = name
+        self.client = client
+        self.stats = BackendStats(alpha=alpha)
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the backend's circuit breaker lets calls through."""
+        return self.client.circuit_breaker.state != CircuitBreaker.OPEN
+
+    def score(self) -> float:
+        """
+        Expected cost of sending one more call here (lower is better).
+
+        EWMA latency scaled by load, plus the client timeout weighted by the
+        error rate (a failed call costs about that much before failing over).
+        Untried backends score 0 so they get tried early; backends that were
+        tried but never answered count the timeout as their latency.
+        """
+        stats = self.stats
+        timeout = self.client.timeout
+        if stats.latency is not None:
+            latency = stats.latency
+        else:
+            latency = timeout if stats.calls else 0.0
+        cost = latency * (1 + stats.in_flight) + stats.error_rate * timeout
+        return cost / max(0.05, 1.0 - stats.error_rate)
+
+
+class Router:
+    """
+    Spread generation calls over equivalent backends.
+
+    Each call goes to the healthy backend with the lowest score (see
+    RouteTarget.score). If it answers with a fallback, the next backend is
+    tried, as long as the call's overall deadline has not passed; each
+    backend only gets what is left of it. With hedging enabled, a duplicate
+    call is sent to the second-best backend when the first has not answered
+    by its latency quantile (p95 by default); the first model answer wins
+    and the other call is cancelled.
+    """
+
+    def __init__(
+        self,
+        targets: List[RouteTarget],
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        min_hedge_samples: int = 20,
+        max_workers: int = 16,
+        deadline: float = RetryPolicy.deadline
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            targets: Backends to route between
+            hedge: Send a duplicate call when the first one is slow
+            hedge_quantile: Latency quantile after which the duplicate is sent
+            min_hedge_samples: Successful calls needed before a backend is hedged
+            max_workers: Threads available to hedged sync calls
+            deadline: Seconds one call may take, failover and retries included
+        """
+        if not targets:
+            raise ValueError("Router needs at least one backend")
+        self.targets = targets
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_samples = min_hedge_samples
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """Thread pool for hedged sync calls, created on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="router")
+            return self._pool
+
+    def choose(self, exclude: Optional[Set[str]] = None) -> Optional[RouteTarget]:
+        """
+        Pick the backend for the next call.
+
+        Args:
+            exclude: Names of backends not to use
+
+        Returns:
+            Best healthy backend; the best unhealthy one when none is healthy;
+            None when every backend is excluded
+        """
+        candidates = [t for t in self.targets if not exclude or t.name not in exclude]
+        if not candidates:
+            return None
+        healthy = [t for t in candidates if t.healthy]
+        return min(healthy or candidates, key=lambda t: t.score())
+
+    def hedge_delay(self, target: RouteTarget) -> Optional[float]:
+        """Seconds to wait on target before hedging, or None when not hedging."""
+        if not self.hedge or len(self.targets) < 2:
+            return None
+        return target.stats.quantile(self.hedge_quantile, self.min_hedge_samples)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Routing statistics per backend."""
+        return {
+            t.name: {**t.stats.as_dict(), "healthy": t.healthy}
+            for t in self.targets
+        }
+
+    def _call(self, target: RouteTarget, *args: Any) -> Tuple[str, Dict[str, Any]]:
+        # args: prompt, max_length, temperature, top_p and the time budget
+        target.stats.begin()
+        start = time.perf_counter()
+        try:
+            text, meta = target.client._generate_with_meta(*args)
+        except BaseException:
+            target.stats.end(time.perf_counter() - start, False)
+            raise
+        target.stats.end(time.perf_counter() - start, not _is_fallback(text))
+        return text, {**meta, "backend": target.name}
+
+    def generate_with_meta(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate on the best backend, failing over and hedging as configured.
+
+        Returns:
+            Tuple of (generated text, metadata naming the backend that answered)
+        """
+        expires = time.monotonic() + self.deadline
+        tried: Set[str] = set()
+        result: Tuple[str, Dict[str, Any]] = ("", {})
+        while True:
+            target = self.choose(tried)
+            remaining = expires - time.monotonic()
+            if target is None or (tried and remaining <= 0):
+                return result
+            tried.add(target.name)
+            result = self._hedged(target, tried, (prompt, max_length, temperature, top_p, remaining))
+            if not _is_fallback(result[0]):
+                return result
+
+    def _hedged(self, target: RouteTarget, tried: Set[str], args: Tuple) -> Tuple[str, Dict[str, Any]]:
+        delay = self.hedge_delay(target)
+        backup = self.choose(tried) if delay is not None else None
+        if backup is None:
+            return self._call(target, *args)
+
+        first = self.pool.submit(self._call, target, *args)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        tried.add(backup.name)
+        futures = [first, self.pool.submit(self._call, backup, *args)]
+        result: Tuple[str, Dict[str, Any]] = ("", {})
+        for future in as_completed(futures):
+            result = future.result()
+            if not _is_fallback(result[0]):
+                break
+        # A blocking HTTP call cannot be interrupted: the loser is only
+        # cancelled if it has not started, otherwise its answer is discarded
+        for future in futures:
+            future.cancel()
+        return result[0], {**result[1], "hedged": True}
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> Iterator[str]:
+        """
+        Stream from the best backend.
+
+        Streams are neither hedged nor failed over, since chunks may already
+        have been shown to the user.
+        """
+        target = self.choose()
+        target.stats.begin()
+        start = time.perf_counter()
+        ok = True
+        try:
+            for index, chunk in enumerate(target.client.generate_stream(prompt, max_length, temperature, top_p)):
+                if index == 0:
+                    ok = not _is_fallback(chunk)
+                yield chunk
+        except GeneratorExit:
+            raise
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            target.stats.end(time.perf_counter() - start, ok)
+
+    async def _acall(self, target: RouteTarget, *args: Any) -> Tuple[str, Dict[str, Any]]:
+        import asyncio
+
+        target.stats.begin()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        latency: Optional[float] = None
+        ok = False
+        try:
+            if hasattr(target.client, "_agenerate_with_meta"):
+                text, meta = await target.client._agenerate_with_meta(*args)
+            else:
+                text, meta = await asyncio.to_thread(target.client._generate_with_meta, *args)
+            ok = not _is_fallback(text)
+            latency = loop.time() - start
+            return text, {**meta, "backend": target.name}
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            latency = loop.time() - start
+            raise
+        finally:
+            target.stats.end(latency, ok)
+
+    async def agenerate_with_meta(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Async counterpart of generate_with_meta(); a hedged loser is cancelled."""
+        expires = time.monotonic() + self.deadline
+        tried: Set[str] = set()
+        result: Tuple[str, Dict[str, Any]] = ("", {})
+        while True:
+            target = self.choose(tried)
+            remaining = expires - time.monotonic()
+            if target is None or (tried and remaining <= 0):
+                return result
+            tried.add(target.name)
+            result = await self._ahedged(target, tried, (prompt, max_length, temperature, top_p, remaining))
+            if not _is_fallback(result[0]):
+                return result
+
+    async def _ahedged(self, target: RouteTarget, tried: Set[str], args: Tuple) -> Tuple[str, Dict[str, Any]]:
+        delay = self.hedge_delay(target)
+        backup = self.choose(tried) if delay is not None else None
+        if backup is None:
+            return await self._acall(target, *args)
+
+        import asyncio
+
+        first = asyncio.ensure_future(self._acall(target, *args))
+        done, _ = await asyncio.wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        tried.add(backup.name)
+        pending = {first, asyncio.ensure_future(self._acall(backup, *args))}
+        result: Tuple[str, Dict[str, Any]] = ("", {})
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if not _is_fallback(result[0]):
+                        return result[0], {**result[1], "hedged": True}
+        finally:
+            for task in pending:
+                task.cancel()
+        return result[0], {**result[1], "hedged": True}
+
+    async def agenerate_stream(
+        self,
+        prompt: str,
+        max_length: int,
+        temperature: float,
+        top_p: float
+    ) -> AsyncIterator[str]:
+        """Async counterpart of generate_stream()."""
+        import asyncio
+
+        target = self.choose()
+        target.stats.begin()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        ok = True
+        index = 0
+        try:
+            async for chunk in target.client._agenerate_stream(prompt, max_length, temperature, top_p):
+                if index == 0:
+                    ok = not _is_fallback(chunk)
+                index += 1
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            raise
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            target.stats.end(loop.time() - start, ok)
+
+    def close(self) -> None:
+        """Close every backend's connections and the hedging threads."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+        for target in self.targets:
+            target.client.close()
+
+    async def aclose(self) -> None:
+        """Close every backend's async and sync connections."""
+        for target in self.targets:
+            if hasattr(target.client, "aclose"):
+                await target.client.aclose()
+        self.close()
+
+
+def load_router_config(path: str) -> Dict[str, Any]:
+    """
+    Read a router configuration file.
+
+    Example (YAML):
+        hedge: true
+        deadline: 30
+        backends:
+          - name: hf
+            model_name: meta-llama/Meta-Llama-3.1-8B-Instruct
+            api_key_env: HF_API_KEY
+          - name: tgi
+            url: http://tgi:8080/
+          - name: local
+            local: true
+            model_path: models/qwen2.5-1.5b-instruct-q4_k_m.gguf
+
+    Args:
+        path: YAML (or JSON) file
+
+    Returns:
+        Configuration dictionary
+    """
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _parse_backends(value: str) -> List[Dict[str, Any]]:
+    """Parse "name=url,name=url|KEY_ENV,name=local:path" into backend specs."""
+    backends = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, target = item.strip().partition("=")
+        if target == "local" or target.startswith("local:"):
+            backends.append({"name": name, "local": True, "model_path": target[6:] or None})
+        else:
+            url, _, api_key_env = target.partition("|")
+            spec = {"name": name, "url": url}
+            if api_key_env:
+                spec["api_key_env"] = api_key_env
+            backends.append(spec)
+    return backends
+
+
+def _is_hf_url(url: Optional[str]) -> bool:
+    """Whether url is a Hugging Face endpoint (no url means the default one)."""
+    if not url:
+        return True
+    host = urlparse(url).hostname or ""
+    return host == "huggingface.co" or host.endswith((".huggingface.co", ".hf.space"))
+
+
+def build_router(config: Dict[str, Any], client_class: Any, **client_kwargs: Any) -> Router:
+    """
+    Create a router and one client per configured backend.
+
+    Args:
+        config: Configuration as returned by load_router_config()
+        client_class: ModelClient or AsyncModelClient
+        **client_kwargs: Options shared by every backend client (timeout, retry_policy, ...)
+
+    Returns:
+        Configured Router
+    """
+    alpha = float(config.get("ewma_alpha", 0.2))
+    targets = []
+    for spec in config.get("backends", []):
+        name = spec["name"]
+        kwargs = dict(client_kwargs)
+        kwargs["circuit_breaker"] = CircuitBreaker(name=name)
+        if spec.get("local"):
+            kwargs.update(use_local=True, local_model_path=spec.get("model_path"))
+            client = client_class(**kwargs)
+        else:
+            api_key_env = spec.get("api_key_env") or (HF_API_KEY_ENV if _is_hf_url(spec.get("url")) else "")
+            api_key = spec.get("api_key") or (os.getenv(api_key_env, "") if api_key_env else "")
+            kwargs.update(model_name=spec.get("model_name"), api_url=spec.get("url"))
+            client = client_class(**kwargs)
+            # Only send the key configured for this backend
+            client.api_key = api_key
+        targets.append(RouteTarget(name, client, alpha=alpha))
+
+    return Router(
+        targets,
+        hedge=bool(config.get("hedge", False)),
+        hedge_quantile=float(config.get("hedge_quantile", 0.95)),
+        min_hedge_samples=int(config.get("min_hedge_samples", 20)),
+        deadline=float(config.get("deadline", RetryPolicy.deadline))
+    )
+
+
+def router_from_env(client_class: Any, **client_kwargs: Any) -> Optional[Router]:
+    """
+    Build a router from ROUTER_CONFIG (YAML file) or ROUTER_BACKENDS.
+
+    ROUTER_BACKENDS lists backends inline, e.g.
+    "hf=https://api-inference.huggingface.co/models/x,tgi=http://tgi:8080/|TGI_TOKEN,local=local:model.gguf";
+    "|VAR" names the environment variable holding a backend's API key
+    (Hugging Face URLs default to HF_API_KEY). ROUTER_HEDGE=true enables
+    hedging and ROUTER_DEADLINE sets the seconds one call may take across
+    every backend.
+
+    Args:
+        client_class: ModelClient or AsyncModelClient
+        **client_kwargs: Options shared by every backend client
+
+    Returns:
+        Router, or None when no backends are configured
+    """
+    path = os.getenv("ROUTER_CONFIG")
+    if path:
+        config = load_router_config(path)
+    elif os.getenv("ROUTER_BACKENDS"):
+        config = {"backends": _parse_backends(os.getenv("ROUTER_BACKENDS", ""))}
+    else:
+        return None
+    if os.getenv("ROUTER_HEDGE"):
+        config["hedge"] = os.getenv("ROUTER_HEDGE", "false").lower() == "true"
+    if os.getenv("ROUTER_DEADLINE"):
+        config["deadline"] = float(os.getenv("ROUTER_DEADLINE", ""))
+    return build_router(config, client_class, **client_kwargs)
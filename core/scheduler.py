@@ -0,0 +1,139 @@
+"""
+Micro-batching scheduler for generation requests
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collect concurrent requests into batches for a single worker.
+
+    The worker takes the first waiting request, then keeps collecting until
+    `max_batch_size` requests are queued or `max_wait` seconds have passed,
+    and hands the whole batch to `run_batch`, which yields (index, result)
+    pairs as items complete. Each caller receives its own result as soon as
+    it is yielded, not when the whole batch is done; a result may be an
+    exception instance for an item that failed on its own.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Iterable[Tuple[int, Any]]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.005,
+        name: str = "batcher"
+    ):
+        """
+        Initialize the scheduler (the worker thread starts on first submit).
+
+        Args:
+            run_batch: Function mapping a list of requests to (index, result)
+                pairs, in completion order
+            max_batch_size: Maximum requests per batch
+            max_wait: Seconds to wait for more requests after the first one
+            name: Name of the worker thread
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, request: Any) -> "Future[Any]":
+        """
+        Queue a request for the next batch.
+
+        Args:
+            request: Item passed to run_batch
+
+        Returns:
+            Future resolved with the item's result
+        """
+        future: "Future[Any]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+            self._queue.put((request, future))
+        return future
+
+    def run(self, request: Any) -> Any:
+        """Submit a request and wait for its result."""
+        return self.submit(request).result()
+
+    def close(self) -> None:
+        """Stop the worker once the queued requests have been processed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._queue.put(_STOP)
+        if worker is not None:
+            worker.join()
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of requests per executed batch."""
+        return self.items / self.batches if self.batches else 0.0
+
+    def _collect(self, first: Tuple[Any, "Future[Any]"]) -> Tuple[List[Tuple[Any, "Future[Any]"]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            batch, stop = self._collect(entry)
+            # Skip requests whose caller already gave up
+            batch = [(request, future) for request, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            pending = {index: future for index, (_, future) in enumerate(batch)}
+            try:
+                for index, result in self.run_batch([request for request, _ in batch]):
+                    future = pending.pop(index)
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+                if pending:
+                    raise RuntimeError(f"run_batch returned no result for {len(pending)} of {len(batch)} requests")
+            except Exception as e:
+                logger.exception("%s: batch of %d failed", self.name, len(batch))
+                for future in pending.values():
+                    future.set_exception(e)
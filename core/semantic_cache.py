@@ -0,0 +1,507 @@
+"""
+Semantic cache: serves enhancements of near-duplicate drafts
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.cache import CacheStats
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_THRESHOLD = 0.9
+
+# Words that flip or change the meaning of a draft while barely moving its
+# embedding ("você nunca entrega" vs "você sempre entrega"). Drafts only
+# match when they use the same ones, the same numbers and the same names
+# (see guard_terms).
+GUARD_WORDS = frozenset({
+    "não", "nao", "nunca", "jamais", "sempre", "nenhum", "nenhuma",
+    "ninguém", "ninguem", "nada", "sem", "nem"
+})
+
+_WORD = re.compile(r"\w+")
+# Words and the punctuation that ends a sentence
+_SENTENCE_TOKEN = re.compile(r"\w+|[.!?…:\n]")
+
+# Function words left out of the hashing embedding
+_STOPWORDS = frozenset(
+    "a o as os um uma uns umas de da do das dos e em no na nos nas ao aos à às "
+    "com por pelo pela para que se seu sua seus suas você voce é".split()
+)
+
+
+class SemanticKey(NamedTuple):
+    """
+    A sanitized draft and the options its enhancement depends on.
+
+    vector holds the draft's embedding once SemanticCache.embed() computed
+    it, so a lookup and the store after a miss embed the draft once.
+    """
+
+    text: str
+    partition: Tuple[Hashable, ...]
+    vector: Optional[np.ndarray] = None
+
+
+def guard_terms(text: str) -> Tuple[str, ...]:
+    """
+    Negations, absolutes, numbers and names of a text, sorted.
+
+    Names are the capitalized words that do not start a sentence ("o João",
+    "com a Maria", "no Jira"), lowercased: swapping them barely moves the
+    embedding, and serving one person's enhancement to a draft about
+    another would leak it. A sentence's first word is skipped since any
+    word is capitalized there, so a name only found there is not caught,
+    nor is one written in lowercase.
+
+    Args:
+        text: Sanitized feedback text
+
+    Returns:
+        The distinct guard words, digit runs and names of text
+    """
+    terms = set()
+    sentence_start = True
+    for token in _SENTENCE_TOKEN.findall(text):
+        if not token[0].isalnum() and token[0] != "_":
+            sentence_start = True
+            continue
+        word = token.lower()
+        if word in GUARD_WORDS or word.isdigit():
+            terms.add(word)
+        elif not sentence_start and token[0].isupper() and word not in _STOPWORDS:
+            terms.add(word)
+        sentence_start = False
+    return tuple(sorted(terms))
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: signed feature hashing of words and character trigrams.
+
+    Matches drafts that differ in word order, accents, punctuation,
+    function words or inflection; real paraphrases need a model embedder.
+    """
+
+    def __init__(self, dim: int = 1024):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Embedding size
+        """
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        folded = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+        for word in _WORD.findall(folded):
+            if word in _STOPWORDS:
+                continue
+            self._add(vector, "w:" + word, 1.0)
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                self._add(vector, "c:" + padded[i:i + 3], 0.25)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        # crc32 rather than hash(): embeddings must survive a restart
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % self.dim] += weight if h & 0x10000 else -weight
+
+
+class SentenceTransformerEmbedder:
+    """Embedder backed by a sentence-transformers model on CPU."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        """
+        Load the model.
+
+        Args:
+            model_name: Hub model name or local path
+
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def __call__(self, text: str) -> np.ndarray:
+        return self._model.encode(text, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+@lru_cache(maxsize=2)
+def load_embedder(name: str = DEFAULT_MODEL) -> Callable[[str], np.ndarray]:
+    """
+    Load an embedder once per process.
+
+    "hashing" selects HashingEmbedder. Any other name is a
+    sentence-transformers model (optional package); failures are logged
+    and fall back to HashingEmbedder.
+
+    Args:
+        name: "hashing" or a sentence-transformers model name or path
+
+    Returns:
+        Callable mapping a text to a unit-length float32 vector, with
+        "name" and "dim" attributes
+    """
+    if name != "hashing":
+        try:
+            return SentenceTransformerEmbedder(name)
+        except ImportError:
+            logger.warning("Pacote 'sentence-transformers' não instalado; usando embeddings por hashing")
+        except Exception as e:
+            logger.warning("Não foi possível carregar o modelo de embeddings %s: %s", name, e)
+    return HashingEmbedder()
+
+
+class _NumpyIndex:
+    """Exact inner-product search over a growing matrix."""
+
+    def __init__(self, dim: int):
+        self._vectors = np.empty((16, dim), dtype=np.float32)
+        self._labels: List[int] = []
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, label: int, vector: np.ndarray) -> None:
+        row = len(self._labels)
+        if row == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.empty_like(self._vectors)])
+        self._vectors[row] = vector
+        self._labels.append(label)
+        self._rows[label] = row
+
+    def remove(self, label: int) -> None:
+        # Move the last row into the hole
+        row = self._rows.pop(label)
+        last = len(self._labels) - 1
+        if row != last:
+            moved = self._labels[last]
+            self._vectors[row] = self._vectors[last]
+            self._labels[row] = moved
+            self._rows[moved] = row
+        self._labels.pop()
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        if not self._labels:
+            return None
+        scores = self._vectors[:len(self._labels)] @ vector
+        row = int(np.argmax(scores))
+        return self._labels[row], float(scores[row])
+
+
+class _HNSWIndex:
+    """Approximate inner-product search with hnswlib (optional package)."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        import hnswlib
+
+        self._index = hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(max_elements=capacity, ef_construction=200, M=16, allow_replace_deleted=True)
+        self._index.set_ef(64)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, label: int, vector: np.ndarray) -> None:
+        capacity = self._index.get_max_elements()
+        if self._count >= capacity:
+            self._index.resize_index(2 * capacity)
+        self._index.add_items(vector[np.newaxis], [label], replace_deleted=True)
+        self._count += 1
+
+    def remove(self, label: int) -> None:
+        self._index.mark_deleted(label)
+        self._count -= 1
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        if not self._count:
+            return None
+        labels, distances = self._index.knn_query(vector[np.newaxis], k=1)
+        # "ip" distance is 1 - inner product
+        return int(labels[0][0]), 1.0 - float(distances[0][0])
+
+
+def _hnsw_available() -> bool:
+    try:
+        import hnswlib  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _Entry(NamedTuple):
+    partition: Tuple[Hashable, ...]
+    vector: np.ndarray
+    value: Dict[str, Any]
+
+
+class SemanticCache:
+    """
+    In-process cache keyed by draft similarity.
+
+    Drafts are embedded and searched among earlier drafts with the same
+    partition (options, model and sampling parameters) and the same guard
+    terms (see guard_terms). The closest one is served when its cosine
+    similarity reaches the threshold. The least recently used entry is
+    evicted beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Callable[[str], np.ndarray]] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = 2048,
+        path: Optional[str] = None,
+        index: str = "auto",
+        save_every: int = 32
+    ):
+        """
+        Initialize the cache, loading path if it exists.
+
+        Args:
+            embedder: Text to unit vector callable with "name" and "dim"
+                attributes (default: HashingEmbedder)
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum number of entries before LRU eviction
+            path: File the entries are persisted to (None keeps them in memory)
+            index: "hnsw" (requires hnswlib), "numpy" (exact search) or
+                "auto" (hnsw when installed)
+            save_every: Stores between automatic saves to path
+
+        Raises:
+            ValueError: If index is unknown
+        """
+        if index == "auto":
+            index = "hnsw" if _hnsw_available() else "numpy"
+        if index not in ("hnsw", "numpy"):
+            raise ValueError(f"Unknown semantic cache index: {index}")
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.index = index
+        self.save_every = save_every
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._indexes: Dict[Tuple[Hashable, ...], Any] = {}
+        self._next_label = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _partition(self, key: SemanticKey) -> Tuple[Hashable, ...]:
+        return tuple(key.partition) + guard_terms(key.text)
+
+    def embed(self, key: SemanticKey) -> SemanticKey:
+        """
+        Attach the draft's embedding to key (CPU-bound; async callers run it in a thread).
+
+        Args:
+            key: Draft and options of the request
+
+        Returns:
+            key with its vector set
+        """
+        if key.vector is not None:
+            return key
+        return key._replace(vector=self.embedder(key.text))
+
+    def _vector(self, key: SemanticKey) -> np.ndarray:
+        return key.vector if key.vector is not None else self.embedder(key.text)
+
+    def _search(self, partition: Tuple[Hashable, ...], vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        index = self._indexes.get(partition)
+        if index is None:
+            return None
+        match = index.search(vector)
+        if match is None or match[1] < self.threshold:
+            return None
+        return match
+
+    def get(self, key: SemanticKey) -> Optional[Dict[str, Any]]:
+        """
+        Look up the enhancement of a similar draft.
+
+        Args:
+            key: Draft and options of the request
+
+        Returns:
+            The cached response with "_meta"["similarity"] set, or None
+        """
+        partition = self._partition(key)
+        if partition not in self._indexes:
+            self.stats.misses += 1
+            return None
+        vector = self._vector(key)
+        with self._lock:
+            match = self._search(partition, vector)
+            if match is None:
+                self.stats.misses += 1
+                return None
+            label, similarity = match
+            self._entries.move_to_end(label)
+            self.stats.hits += 1
+            value = self._entries[label].value
+        return {**value, "_meta": {**value.get("_meta", {}), "similarity": round(similarity, 4)}}
+
+    def set(self, key: SemanticKey, value: Dict[str, Any]) -> None:
+        """
+        Store the enhancement of a draft.
+
+        A draft matching an existing entry replaces its value instead of
+        adding a near-duplicate.
+
+        Args:
+            key: Draft and options of the request
+            value: Parsed response
+        """
+        partition = self._partition(key)
+        vector = self._vector(key)
+        with self._lock:
+            self._add(partition, vector, value)
+            self._unsaved += 1
+            save = bool(self.path) and self._unsaved >= self.save_every
+        if save:
+            self.save()
+
+    def _add(self, partition: Tuple[Hashable, ...], vector: np.ndarray, value: Dict[str, Any]) -> None:
+        match = self._search(partition, vector)
+        if match is not None:
+            label = match[0]
+            self._entries[label] = self._entries[label]._replace(value=value)
+            self._entries.move_to_end(label)
+            return
+
+        index = self._indexes.get(partition)
+        if index is None:
+            dim = len(vector)
+            index = self._indexes[partition] = _HNSWIndex(dim) if self.index == "hnsw" else _NumpyIndex(dim)
+        label = self._next_label
+        self._next_label += 1
+        index.add(label, vector)
+        self._entries[label] = _Entry(partition, vector, value)
+
+        while len(self._entries) > self.max_entries:
+            old_label, old = self._entries.popitem(last=False)
+            old_index = self._indexes[old.partition]
+            old_index.remove(old_label)
+            if not len(old_index):
+                del self._indexes[old.partition]
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Write the entries to disk, least recently used first.
+
+        Args:
+            path: Destination (default: the cache's path); nothing is
+                written when neither is set
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            entries = list(self._entries.values())
+            self._unsaved = 0
+        meta = {
+            "embedder": getattr(self.embedder, "name", ""),
+            "entries": [[list(e.partition), e.value] for e in entries]
+        }
+        dim = len(entries[0].vector) if entries else 0
+        vectors = np.stack([e.vector for e in entries]) if entries else np.empty((0, dim), dtype=np.float32)
+        # Write-then-rename so a crash never leaves a half-written file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, vectors=vectors, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        """
+        Add the entries saved at path.
+
+        Files written with another embedder are ignored.
+
+        Args:
+            path: File written by save()
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                vectors = data["vectors"]
+                meta = json.loads(data["meta"].item())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Não foi possível carregar o cache semântico %s: %s", path, e)
+            return
+        if meta.get("embedder") != getattr(self.embedder, "name", ""):
+            logger.warning("Cache semântico %s gerado com outro modelo de embeddings; ignorado", path)
+            return
+        with self._lock:
+            for vector, (partition, value) in zip(vectors, meta["entries"]):
+                self._add(tuple(partition), vector.astype(np.float32), value)
+
+
+def create_semantic_cache(
+    model: str = "off",
+    threshold: float = DEFAULT_THRESHOLD,
+    max_entries: int = 2048,
+    path: Optional[str] = None,
+    index: str = "auto"
+) -> Optional[SemanticCache]:
+    """
+    Create a semantic cache by embedding model name.
+
+    Args:
+        model: "off", "hashing" or a sentence-transformers model name
+            ("default" for DEFAULT_MODEL)
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Maximum number of entries
+        path: File to persist entries to (empty for none)
+        index: "auto", "hnsw" or "numpy"
+
+    Returns:
+        Cache instance, or None when disabled
+    """
+    model = model.strip()
+    if model.lower() in ("off", "none", ""):
+        return None
+    if model.lower() == "default":
+        model = DEFAULT_MODEL
+    return SemanticCache(
+        embedder=load_embedder(model),
+        threshold=threshold,
+        max_entries=max_entries,
+        path=path or None,
+        index=index
+    )
@@ -0,0 +1,245 @@
+"""
+Feedback enhancement pipeline shared by the Gradio interface and the HTTP API
+"""
+
+import contextlib
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from core.admission import AdmissionController, RateLimiter
+from core.async_model_client import AsyncModelClient
+from core.compression import compress_feedback
+from core.fast_engine import get_fast_engine
+from core.metrics import metrics
+from core.prompt_builder import BudgetedPrompt, build_budgeted_prompt
+from core.stream_parser import IncrementalResponseParser
+from core.validators import DEFAULT_OPTIONS, FieldError, sanitize_text, validate_row
+
+
+class InvalidFeedbackError(ValueError):
+    """Raised for invalid input; the message is the first error (PT-BR)."""
+
+    def __init__(self, errors: Tuple[FieldError, ...]):
+        self.errors = errors
+        super().__init__(errors[0].message)
+
+
+class FeedbackService:
+    """
+    Validates, prompts and enhances feedback drafts.
+
+    Holds the pieces every entry point must share: the model client (and
+    its caches), admission control and the per-client rate limiter.
+    """
+
+    def __init__(
+        self,
+        client: AsyncModelClient,
+        admission: Optional[AdmissionController] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        on_overflow: str = "reject",
+        compression_ratio: Optional[float] = None,
+        fast_preview: bool = True
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            client: Model client used for generation and caching (prepare()
+                only reads its token_budget, so core.batch passes a ModelClient)
+            admission: Bounds concurrent model calls (None for no bound)
+            rate_limiter: Per-client request rate limit (None for no limit)
+            on_overflow: "reject", "truncate" or "compress" feedback that does
+                not fit the model context (see build_budgeted_prompt)
+            compression_ratio: Compress drafts before prompting (None: off; see
+                compress_feedback)
+            fast_preview: Start streams with the offline fast engine's answer
+        """
+        self.client = client
+        self.admission = admission
+        self.rate_limiter = rate_limiter
+        self.on_overflow = on_overflow
+        self.compression_ratio = compression_ratio
+        self.fast_preview = fast_preview
+
+    def prepare_text(self, feedback_text: str) -> str:
+        """Sanitize the input and compress it when compression_ratio is set."""
+        feedback_text = sanitize_text(feedback_text)
+        if self.compression_ratio is not None:
+            feedback_text = compress_feedback(feedback_text, self.compression_ratio).text
+        return feedback_text
+
+    def prepare(
+        self,
+        feedback_text: str,
+        feedback_type: str,
+        tone: str,
+        formality: str
+    ) -> Tuple[str, Tuple[str, str, str], BudgetedPrompt]:
+        """
+        Validate the input and build its budgeted prompt.
+
+        Also used by core.batch, which calls a sync ModelClient itself.
+
+        Returns:
+            (prepared feedback text, (feedback_type, tone, formality), prompt)
+
+        Raises:
+            InvalidFeedbackError: If the input is invalid
+            PromptTooLongError: If the feedback does not fit the model context
+        """
+        clock = metrics.clock()
+        validation = validate_row({
+            "feedback_text": feedback_text,
+            "feedback_type": feedback_type,
+            "tone": tone,
+            "formality": formality
+        })
+        if clock:
+            clock.lap("validate")
+        if not validation.valid:
+            raise InvalidFeedbackError(validation.errors)
+        options = (
+            feedback_type or DEFAULT_OPTIONS["feedback_type"],
+            tone or DEFAULT_OPTIONS["tone"],
+            formality or DEFAULT_OPTIONS["formality"]
+        )
+
+        feedback_text = self.prepare_text(feedback_text)
+        if clock:
+            clock.lap("sanitize")
+        budgeted = build_budgeted_prompt(
+            feedback_text, *options, budget=self.client.token_budget, on_overflow=self.on_overflow
+        )
+        if clock:
+            clock.lap("build_prompt")
+        return feedback_text, options, budgeted
+
+    def check_rate_limit(self, client_id: str) -> None:
+        """
+        Charge one request to client_id's rate limit.
+
+        Raises:
+            RateLimitedError: If the client has no request left
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.check(client_id)
+
+    def _prepare(
+        self,
+        feedback_text: str,
+        feedback_type: str,
+        tone: str,
+        formality: str,
+        client_id: Optional[str]
+    ) -> Tuple[str, Tuple[str, str, str], BudgetedPrompt]:
+        """Validate, build the prompt and rate limit (unless client_id is None)."""
+        prepared = self.prepare(feedback_text, feedback_type, tone, formality)
+        if client_id is not None:
+            self.check_rate_limit(client_id)
+        return prepared
+
+    async def _lookup(
+        self,
+        feedback_text: str,
+        options: Tuple[str, str, str]
+    ) -> Tuple[str, Any, Optional[Dict[str, Any]]]:
+        """Cache keys for the request (the semantic one embedded) and the cached response, if any."""
+        clock = metrics.clock()
+        cache_key = self.client.cache_key(feedback_text, *options)
+        semantic_key = self.client.semantic_key(feedback_text, *options)
+        response_data, semantic_key = await self.client.alookup(cache_key, semantic_key=semantic_key)
+        if clock:
+            clock.lap("cache_lookup")
+        return cache_key, semantic_key, response_data
+
+    def _slot(self) -> Any:
+        return self.admission.slot() if self.admission is not None else contextlib.nullcontext()
+
+    async def enhance(
+        self,
+        feedback_text: str,
+        feedback_type: str = "geral",
+        tone: str = "construtivo",
+        formality: str = "neutro",
+        client_id: Optional[str] = "local"
+    ) -> Dict[str, Any]:
+        """
+        Enhance a feedback draft.
+
+        Cached answers are served without waiting for a model slot.
+
+        Args:
+            feedback_text: Original feedback text
+            feedback_type: Type of feedback
+            tone: Desired tone
+            formality: Formality level
+            client_id: Caller identity for rate limiting (None when the caller
+                was already charged, see check_rate_limit)
+
+        Returns:
+            Parsed response dictionary (see ModelClient.parse_response)
+
+        Raises:
+            InvalidFeedbackError: If the input is invalid
+            PromptTooLongError: If the feedback does not fit the model context
+            ServiceBusyError: If rate limited or no model slot is available
+        """
+        with metrics.request("enhance"):
+            feedback_text, options, budgeted = self._prepare(feedback_text, feedback_type, tone, formality, client_id)
+            cache_key, semantic_key, response_data = await self._lookup(feedback_text, options)
+            if response_data is None:
+                async with self._slot():
+                    response_data = await self.client.aenhance(
+                        budgeted.prompt, cache_key=cache_key, max_length=budgeted.max_new_tokens,
+                        semantic_key=semantic_key
+                    )
+        return response_data
+
+    async def enhance_stream(
+        self,
+        feedback_text: str,
+        feedback_type: str = "geral",
+        tone: str = "construtivo",
+        formality: str = "neutro",
+        client_id: Optional[str] = "local"
+    ) -> AsyncIterator[Tuple[bool, Dict[str, Any]]]:
+        """
+        Enhance a feedback draft, yielding partial results as the model streams.
+
+        The offline fast engine's answer comes first (when fast_preview is
+        set); the fields parsed so far are merged over it as tokens arrive.
+
+        Args:
+            feedback_text: Original feedback text
+            feedback_type: Type of feedback
+            tone: Desired tone
+            formality: Formality level
+            client_id: Caller identity for rate limiting (None when the caller
+                was already charged, see check_rate_limit)
+
+        Yields:
+            (False, partial fields) while streaming, then (True, parsed response)
+
+        Raises:
+            InvalidFeedbackError: If the input is invalid
+            PromptTooLongError: If the feedback does not fit the model context
+            ServiceBusyError: If rate limited or no model slot is available
+        """
+        with metrics.request("stream"):
+            feedback_text, options, budgeted = self._prepare(feedback_text, feedback_type, tone, formality, client_id)
+            cache_key, semantic_key, response_data = await self._lookup(feedback_text, options)
+            if response_data is None:
+                async with self._slot():
+                    preview = get_fast_engine().enhance(feedback_text) if self.fast_preview else {}
+                    if preview:
+                        yield False, preview
+                    with metrics.stage("model"):
+                        parser = IncrementalResponseParser()
+                        async for token in self.client.agenerate_stream(
+                            budgeted.prompt, max_length=budgeted.max_new_tokens
+                        ):
+                            parser.feed(token)
+                            yield False, {**preview, **parser.partial()}
+                        response_data = await self.client.aparse_response(parser.buffer)
+                self.client.cache_store(cache_key, response_data, semantic_key=semantic_key)
+            yield True, response_data
@@ -0,0 +1,209 @@
+"""
+Request coalescing (single-flight) for identical in-flight calls
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+if TYPE_CHECKING:
+    # asyncio loads with the first AsyncSingleFlight, not with the sync group
+    import asyncio
+
+
+def flight_key(*parts: Any) -> str:
+    """Build a key identifying a call from its prompt and parameters."""
+    raw = json.dumps(parts, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread-based single-flight group.
+
+    Concurrent do() calls with the same key run fn once; every caller gets
+    a deep copy of the result, so none can alter what fn stored elsewhere
+    (e.g. in a cache), or the same exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn unless an identical call is already in flight.
+
+        Args:
+            key: Identity of the call
+            fn: Function producing the result
+
+        Returns:
+            Result of the (shared) call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return copy.deepcopy(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class _Broadcast:
+    def __init__(self):
+        import asyncio
+
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.subscribers = 0
+        self.task: Optional["asyncio.Task[None]"] = None
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio single-flight group for coroutines and async streams.
+
+    do() runs one call per key as a background task and shares its result
+    between concurrent callers. stream() runs one producer per key the same
+    way and replays every chunk to each subscriber. Either way a caller that
+    goes away does not cancel the call for the others; a stream whose last
+    subscriber has gone is cancelled and its upstream closed. Callers always
+    receive a deep copy of a do() result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Task[Any]"] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        # Strong references keep running tasks from being collected
+        self._tasks: Set["asyncio.Task[Any]"] = set()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() unless an identical call is already in flight.
+
+        The call runs as a task of its own, so cancelling any caller, the
+        one that started it included, leaves it running for the others.
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function producing the result
+
+        Returns:
+            Result of the (shared) call
+        """
+        import asyncio
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._calls[key] = task
+            self._tasks.add(task)
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def _finish(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        self._tasks.discard(task)
+        # Mark retrieved so an error nobody awaited any more is not logged by asyncio
+        if not task.cancelled():
+            task.exception()
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Subscribe to the stream for key, starting it if nobody else has.
+
+        When the last subscriber stops iterating (it finished, was cancelled
+        or closed the iterator), a stream still running is cancelled.
+
+        Args:
+            key: Identity of the stream
+            factory: Function returning the async iterator to share
+
+        Yields:
+            Every chunk of the shared stream, from the beginning
+        """
+        import asyncio
+
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.get_running_loop().create_task(self._pump(key, broadcast, factory))
+            self._tasks.add(broadcast.task)
+            broadcast.task.add_done_callback(self._tasks.discard)
+
+        broadcast.subscribers += 1
+        try:
+            position = 0
+            while True:
+                async with broadcast.changed:
+                    await broadcast.changed.wait_for(
+                        lambda: len(broadcast.chunks) > position or broadcast.done
+                    )
+                    chunks = broadcast.chunks[position:]
+                    done = broadcast.done
+
+                for chunk in chunks:
+                    yield chunk
+                position += len(chunks)
+
+                if done and position >= len(broadcast.chunks):
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                # Nobody is listening: later callers start a fresh stream
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                broadcast.task.cancel()
+
+    async def _pump(self, key: str, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        upstream = factory()
+        try:
+            async for chunk in upstream:
+                async with broadcast.changed:
+                    broadcast.chunks.append(chunk)
+                    broadcast.changed.notify_all()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            # Close the upstream response now, not whenever the generator is collected
+            aclose = getattr(upstream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            async with broadcast.changed:
+                broadcast.done = True
+                broadcast.changed.notify_all()
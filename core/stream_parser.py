@@ -0,0 +1,232 @@
+"""
+Incremental parser for streamed JSON model output
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Any, Tuple
+
+
+RESPONSE_FIELDS = (
+    "feedback_aprimorado",
+    "versao_curta",
+    "fato_impacto_sugestao",
+    "sugestoes_extras",
+    "observacoes"
+)
+
+_CLOSERS = {"{": "}", "[": "]"}
+_INCOMPLETE_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{0,3})?$')
+
+
+def _scan(text: str) -> Tuple[bool, List[str]]:
+    """Return (inside_string, open_containers) at the end of a JSON fragment."""
+    in_string = False
+    escape = False
+    stack: List[str] = []
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]" and stack:
+            stack.pop()
+    return in_string, stack
+
+
+def _close(fragment: str, state: Optional[Tuple[bool, List[str]]] = None) -> Optional[Any]:
+    """Try to decode a fragment by closing its open string and containers."""
+    in_string, stack = state if state is not None else _scan(fragment)
+    if in_string:
+        # An incomplete escape is at most a backslash and "uXXX"
+        fragment = fragment[:-5] + _INCOMPLETE_ESCAPE.sub("", fragment[-5:]) + '"'
+    candidate = fragment.rstrip().rstrip(",:") + "".join(_CLOSERS[c] for c in reversed(stack))
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+
+
+def repair_fragment(fragment: str, state: Optional[Tuple[bool, List[str]]] = None) -> Optional[Any]:
+    """
+    Recover the longest decodable prefix of a truncated JSON value.
+
+    Args:
+        fragment: Beginning of a JSON value (string, object or array)
+        state: (inside_string, open_containers) at the end of the fragment,
+            when the caller already tracks them; scanned otherwise
+
+    Returns:
+        Decoded value, or None when nothing can be salvaged
+    """
+    # Only leading whitespace is safe to strip: the tail may be inside a string
+    fragment = fragment.lstrip()
+    if not fragment:
+        return None
+
+    value = _close(fragment, state)
+    if value is not None:
+        return value
+
+    # Drop the last incomplete member (e.g. a dangling key) and retry
+    cut = len(fragment)
+    while True:
+        cut = fragment.rfind(",", 0, cut)
+        if cut <= 0:
+            return None
+        value = _close(fragment[:cut])
+        if value is not None:
+            return value
+
+
+class IncrementalResponseParser:
+    """
+    Parse a streamed JSON object, emitting each top-level field once complete.
+
+    Feed raw model output chunk by chunk (code fences and text before the
+    opening brace are ignored). Completed fields are returned by feed();
+    partial() and finish() also include the value still being generated,
+    repaired so truncated output remains usable.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._pos = 0
+        # Open containers, the top-level object first
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._phase = "start"
+        self._key: Optional[str] = None
+        self._mark = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk of model output.
+
+        Args:
+            chunk: Next piece of the response text
+
+        Returns:
+            List of (field, value) pairs completed by this chunk
+        """
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+
+        for i in range(self._pos, len(buffer)):
+            if self.complete:
+                break
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1 and self._phase == "key":
+                        self._key = json.loads(buffer[self._mark:i + 1])
+                        self._phase = "colon"
+                continue
+
+            if self._phase == "start":
+                if char == "{":
+                    self._stack.append(char)
+                    self._phase = "key"
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if len(self._stack) == 1 and self._phase == "key":
+                    self._mark = i
+            elif char == ":" and len(self._stack) == 1 and self._phase == "colon":
+                self._phase = "value"
+                self._mark = i + 1
+            elif char in ",}" and len(self._stack) == 1:
+                if self._phase == "value":
+                    field = self._store(buffer[self._mark:i])
+                    if field is not None:
+                        completed.append(field)
+                    self._phase = "key"
+                if char == "}":
+                    self._stack.pop()
+                    self.complete = True
+            elif char in "{[":
+                self._stack.append(char)
+            elif char in "}]" and len(self._stack) > 1:
+                self._stack.pop()
+
+        self._pos = len(buffer)
+        return completed
+
+    def _store(self, raw: str) -> Optional[Tuple[str, Any]]:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            value = repair_fragment(raw)
+            if value is None:
+                return None
+        self.fields[self._key] = value
+        return self._key, value
+
+    def pending(self) -> Optional[Tuple[str, Any]]:
+        """Field currently being generated, with its value repaired so far."""
+        if self.complete or self._phase != "value":
+            return None
+        # The scan state feed() keeps saves rescanning the whole value on every preview
+        value = repair_fragment(self.buffer[self._mark:], (self._in_string, self._stack[1:]))
+        if value is None:
+            return None
+        return self._key, value
+
+    def partial(self) -> Dict[str, Any]:
+        """Completed fields plus the repaired field in progress."""
+        data = dict(self.fields)
+        pending = self.pending()
+        if pending is not None:
+            data[pending[0]] = pending[1]
+        return data
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        Finalize parsing after the stream ends.
+
+        Returns:
+            Parsed fields (marked with _meta.truncated when the object was cut
+            off), or None when no field could be recovered
+        """
+        data = self.partial()
+        if not data:
+            return None
+        if not self.complete:
+            data["_meta"] = {"truncated": True}
+        return data
+
+
+def salvage_response(response_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Recover the known response fields from a truncated or malformed output.
+
+    Args:
+        response_text: Raw model output
+
+    Returns:
+        Dictionary with the recovered fields, or None when no known field was found
+    """
+    parser = IncrementalResponseParser()
+    parser.feed(response_text)
+    data = parser.finish()
+    if not data or not any(field in data for field in RESPONSE_FIELDS):
+        return None
+    return data
@@ -0,0 +1,234 @@
+"""
+Rule-based normalization of informal PT-BR text (used by the fallback)
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+
+INFORMAL_DICT_PATH = Path(__file__).parent.parent / "data" / "informal_pt_br.tsv"
+
+# Used when the dictionary file is missing
+DEFAULT_REPLACEMENTS = {
+    "vc": "você",
+    "pq": "porque",
+    "tb": "também",
+    "tbm": "também",
+    "nao": "não",
+    "eh": "é",
+    "ta": "está",
+    "to": "estou",
+}
+
+
+def load_replacements(
+    path: Path = INFORMAL_DICT_PATH,
+    defaults: Mapping[str, str] = DEFAULT_REPLACEMENTS
+) -> Dict[str, str]:
+    """
+    Load a replacement table such as the informal-form dictionary.
+
+    The file has one "informal<TAB>replacement" entry per line; blank lines
+    and lines starting with "#" are ignored.
+
+    Args:
+        path: Table file
+        defaults: Entries returned when the file does not exist
+
+    Returns:
+        Mapping of lowercase informal forms to replacements
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return dict(defaults)
+
+    replacements = {}
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        informal, sep, replacement = line.partition("\t")
+        if sep and informal.strip() and replacement.strip():
+            replacements[informal.strip().lower()] = replacement.strip()
+    return replacements
+
+
+# ASCII characters \w does not match ("?" is handled separately, see _shadow)
+_ASCII_SEPARATORS = "".join(
+    char for char in map(chr, range(128)) if not (char.isalnum() or char == "_") and char != "?"
+)
+_SEPARATOR_TABLE = bytes.maketrans(_ASCII_SEPARATORS.encode(), b" " * len(_ASCII_SEPARATORS))
+_ASCII = bytes(range(128))
+_WORD = re.compile(r"\w+")
+# Above this many (substring) hits one pass over all words beats a find per hit
+_DENSE_HITS = 64
+
+
+def _shadow(text: str) -> bytes:
+    """
+    ASCII image of text with exactly one byte per character.
+
+    Non-word characters (neither alphanumeric nor "_", as for the regex
+    word class) become spaces and every other non-ASCII character becomes
+    "?", so words split where _WORD would split them, keep their offsets
+    and can be searched with bytes operations, which stay fast whatever the
+    text contains.
+    """
+    text = text.replace("?", " ")
+    if not text.isascii():
+        # The few distinct non-ASCII characters, gathered with bytes
+        # operations; the non-alphanumeric ones (no-break and zero-width
+        # spaces, typographic quotes...) separate words like ASCII punctuation
+        for char in set(text.encode("utf-8").translate(None, _ASCII).decode("utf-8")):
+            if not char.isalnum():
+                text = text.replace(char, " ")
+    return text.encode("ascii", "replace").translate(_SEPARATOR_TABLE)
+
+
+def match_case(original: str, replacement: str) -> str:
+    """Give replacement the capitalization of the word it replaces."""
+    if len(original) > 1 and original.isupper():
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+class TextNormalizer:
+    """
+    Whole-word replacement of informal forms.
+
+    The dictionary words present in a text are found with a set
+    intersection over its split ASCII shadow, and only their occurrences
+    are visited, so texts without informal forms cost a few C-level passes
+    and the dictionary can grow without slowing the scan down. Texts full of
+    informal forms take a single pass over their words instead.
+    """
+
+    def __init__(self, replacements: Mapping[str, str]):
+        """
+        Compile the dictionary.
+
+        Args:
+            replacements: Mapping of informal words to replacements; keys that
+                are not a single word are ignored
+        """
+        self.replacements = {
+            k.lower(): v for k, v in replacements.items() if _WORD.fullmatch(k)
+        }
+        # Several keys may share a shadow (e.g. "tá" and "tô" are both "t?")
+        self._shadow_keys = frozenset(_shadow(k) for k in self.replacements)
+
+    @classmethod
+    def from_file(cls, path: Path = INFORMAL_DICT_PATH) -> "TextNormalizer":
+        """Create a normalizer from a dictionary file (see load_replacements)."""
+        return cls(load_replacements(path))
+
+    def _substitute(self, match: "re.Match[str]") -> str:
+        word = match.group(0)
+        replacement = self.replacements.get(word.lower())
+        return word if replacement is None else match_case(word, replacement)
+
+    def _find(self, text: str, lowered: str, shadow: bytes, found) -> str:
+        """Replace the occurrences of a few shadow keys, one bytes.find each."""
+        # The shadow is padded with a leading space, so the match of
+        # b" key " at i covers text[i:i + len(key)]
+        shadow = b" " + shadow + b" "
+        spans = []
+        for key in found:
+            needle = b" " + key + b" "
+            start = shadow.find(needle)
+            while start != -1:
+                end = start + len(key)
+                word = lowered[start:end]
+                if word in self.replacements:
+                    spans.append((start, end, word))
+                start = shadow.find(needle, end + 1)
+        spans.sort()
+
+        pieces = []
+        position = 0
+        for start, end, key in spans:
+            original = text[start:end]
+            replacement = self.replacements[key]
+            pieces.append(text[position:start])
+            pieces.append(replacement if original == key else match_case(original, replacement))
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+    def _walk(self, text: str, lowered: str, words: List[bytes]) -> str:
+        """Replace dictionary words visiting every shadow word once."""
+        keys = self._shadow_keys
+        replacements = self.replacements
+        pieces = []
+        last = 0
+        position = 0
+        for word in words:
+            if word in keys:
+                end = position + len(word)
+                key = lowered[position:end]
+                replacement = replacements.get(key)
+                if replacement is not None:
+                    original = text[position:end]
+                    pieces.append(text[last:position])
+                    pieces.append(replacement if original == key else match_case(original, replacement))
+                    last = end
+            position += len(word) + 1
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+    def replace(self, text: str) -> str:
+        """Replace every informal word in text, keeping the rest untouched."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Rare characters whose lowercase form is longer shift every offset
+            return _WORD.sub(self._substitute, text)
+
+        shadow = _shadow(lowered)
+        words = shadow.split(b" ")
+        found = self._shadow_keys.intersection(words)
+        if not found:
+            return text
+        if sum(shadow.count(key) for key in found) > _DENSE_HITS:
+            return self._walk(text, lowered, words)
+        return self._find(text, lowered, shadow, found)
+
+    def normalize(self, text: str) -> str:
+        """
+        Basic text improvement when LLM is not available.
+
+        Replaces informal words, capitalizes the first letter and makes sure
+        the text ends with punctuation.
+
+        Args:
+            text: Original feedback text
+
+        Returns:
+            Improved text
+        """
+        if not text:
+            return text
+        improved = self.replace(text.strip())
+        if not improved:
+            return improved
+        improved = improved[0].upper() + improved[1:]
+        if improved[-1] not in ".!?":
+            improved += "."
+        return improved
+
+
+_default_normalizer: Optional[TextNormalizer] = None
+
+
+def get_normalizer() -> TextNormalizer:
+    """Return the process-wide normalizer (dictionary from INFORMAL_DICT_PATH)."""
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = TextNormalizer.from_file(
+            Path(os.getenv("INFORMAL_DICT_PATH", str(INFORMAL_DICT_PATH)))
+        )
+    return _default_normalizer
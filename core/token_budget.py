@@ -0,0 +1,175 @@
+"""
+Token accounting for prompts and generation budgets
+"""
+
+import logging
+import math
+import os
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Conservative UTF-8 bytes per token for PT-BR text on BPE tokenizers (the
+# real ratio is closer to 4), so estimates err on the side of overcounting
+BYTES_PER_TOKEN = 3.0
+
+# Expected response size: the JSON scaffolding, versao_curta, suggestions and
+# notes cost a roughly fixed amount, while feedback_aprimorado and the FIS
+# sentences grow with the input
+OUTPUT_BASE_TOKENS = 320
+OUTPUT_TOKENS_PER_INPUT_TOKEN = 2.2
+
+
+class PromptTooLongError(ValueError):
+    """Raised when a prompt leaves no room for the response in the context window."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text from its UTF-8 length.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated number of tokens (an overestimate for typical text)
+    """
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+@lru_cache(maxsize=4)
+def load_tokenizer(name_or_path: str) -> Optional[Any]:
+    """
+    Load a Hugging Face tokenizer once per process.
+
+    Requires the optional "tokenizers" package; any failure (package
+    missing, unknown model, no network) is logged and returns None so the
+    byte estimate is used instead.
+
+    Args:
+        name_or_path: Path to a tokenizer.json file or a Hub model name
+
+    Returns:
+        tokenizers.Tokenizer instance, or None
+    """
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        logger.warning("Pacote 'tokenizers' não instalado; usando estimativa de tokens por bytes")
+        return None
+    try:
+        if os.path.isfile(name_or_path):
+            return Tokenizer.from_file(name_or_path)
+        return Tokenizer.from_pretrained(name_or_path)
+    except Exception as e:
+        logger.warning("Não foi possível carregar o tokenizer %s: %s", name_or_path, e)
+        return None
+
+
+def get_token_counter(name_or_path: Optional[str] = None) -> Callable[[str], int]:
+    """
+    Return a token counting function.
+
+    Args:
+        name_or_path: Tokenizer to use (can use env var TOKENIZER_PATH); the
+            byte estimate is used when unset or unavailable
+
+    Returns:
+        Function mapping a text to its token count
+    """
+    name_or_path = name_or_path or os.getenv("TOKENIZER_PATH", "")
+    tokenizer = load_tokenizer(name_or_path) if name_or_path else None
+    if tokenizer is None:
+        return estimate_tokens
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class TokenBudget:
+    """
+    Splits a model's context window between the prompt and the response.
+
+    The response budget (max_new_tokens) grows with the feedback text, as
+    the response restates and restructures it, and is capped by both
+    max_new_tokens and the room the prompt leaves in the context window.
+    """
+
+    def __init__(
+        self,
+        context_window: int = 8192,
+        max_new_tokens: int = 4096,
+        min_new_tokens: int = 256,
+        counter: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Initialize the budget.
+
+        Args:
+            context_window: Model context size in tokens (prompt + response)
+            max_new_tokens: Upper bound for the response budget
+            min_new_tokens: Smallest response budget a prompt must leave room for
+            counter: Token counting function (default: get_token_counter())
+        """
+        self.context_window = context_window
+        self.max_new_tokens = max_new_tokens
+        self.min_new_tokens = min_new_tokens
+        self.count = counter or get_token_counter()
+        self._prefix: Tuple[str, int] = ("", 0)
+
+    def count_prefix(self, prefix: str) -> int:
+        """Token count of the static prompt prefix, remembered between calls."""
+        cached, tokens = self._prefix
+        if prefix is not cached and prefix != cached:
+            tokens = self.count(prefix)
+            self._prefix = (prefix, tokens)
+        return tokens
+
+    def output_tokens(self, feedback_tokens: int) -> int:
+        """Response budget for a feedback text of feedback_tokens tokens."""
+        wanted = OUTPUT_BASE_TOKENS + math.ceil(OUTPUT_TOKENS_PER_INPUT_TOKEN * feedback_tokens)
+        return max(self.min_new_tokens, min(self.max_new_tokens, wanted))
+
+    def available(self, prompt_tokens: int) -> int:
+        """Tokens left for the response after a prompt of prompt_tokens tokens."""
+        return self.context_window - prompt_tokens
+
+    def fits(self, prompt_tokens: int) -> bool:
+        """Whether a prompt leaves room for at least min_new_tokens."""
+        return self.available(prompt_tokens) >= self.min_new_tokens
+
+    def max_feedback_tokens(self, overhead_tokens: int) -> int:
+        """
+        Longest feedback text whose prompt and full response budget fit.
+
+        Args:
+            overhead_tokens: Prompt tokens besides the feedback text
+
+        Returns:
+            Token limit for the feedback text (0 when nothing fits)
+        """
+        room = self.context_window - overhead_tokens
+        # Largest f with f + output_tokens(f) <= room, for either branch of the cap
+        uncapped = math.floor((room - OUTPUT_BASE_TOKENS) / (1 + OUTPUT_TOKENS_PER_INPUT_TOKEN))
+        return max(0, uncapped, room - self.max_new_tokens)
+
+    def plan(self, prompt_tokens: int, feedback_tokens: int) -> int:
+        """
+        Response budget for a prompt.
+
+        Args:
+            prompt_tokens: Tokens in the complete prompt
+            feedback_tokens: Tokens in the feedback text it contains
+
+        Returns:
+            max_new_tokens to request
+
+        Raises:
+            PromptTooLongError: If the prompt leaves less than min_new_tokens
+        """
+        if not self.fits(prompt_tokens):
+            raise PromptTooLongError(
+                f"O texto é longo demais para o modelo ({prompt_tokens} tokens no prompt, "
+                f"limite de contexto {self.context_window}). Reduza o texto e tente novamente."
+            )
+        return min(self.output_tokens(feedback_tokens), self.available(prompt_tokens))
@@ -2,7 +2,99 @@
 Validators for input validation and sanitization
 """
 
-from typing import Optional, Tuple
+from functools import partial
+from typing import Any, FrozenSet, Iterable, Iterator, Mapping, NamedTuple, Optional, Tuple, Union
+
+
+MIN_TEXT_LENGTH = 10
+MAX_TEXT_LENGTH = 5000
+
+# Ordered for error messages; the frozensets are used for lookups
+FEEDBACK_TYPE_CHOICES = ("geral", "desempenho", "comportamento", "técnico", "liderança")
+TONE_CHOICES = ("construtivo", "neutro", "encorajador", "direto")
+FORMALITY_CHOICES = ("formal", "neutro", "casual")
+FEEDBACK_TYPES = frozenset(FEEDBACK_TYPE_CHOICES)
+TONES = frozenset(TONE_CHOICES)
+FORMALITY_LEVELS = frozenset(FORMALITY_CHOICES)
+
+# Options used when a row leaves them out (same as build_prompt)
+DEFAULT_OPTIONS = {
+    "feedback_type": "geral",
+    "tone": "construtivo",
+    "formality": "neutro"
+}
+
+# Error codes of FieldError
+EMPTY = "empty"
+NOT_STRING = "not_string"
+TOO_SHORT = "too_short"
+TOO_LONG = "too_long"
+INVALID_CHOICE = "invalid_choice"
+
+_MESSAGES = {
+    ("feedback_text", EMPTY): "O texto de feedback não pode estar vazio.",
+    ("feedback_text", NOT_STRING): "O texto deve ser uma string.",
+    ("feedback_text", TOO_SHORT): f"O texto deve ter pelo menos {MIN_TEXT_LENGTH} caracteres.",
+    ("feedback_text", TOO_LONG): f"O texto não pode exceder {MAX_TEXT_LENGTH} caracteres.",
+    ("feedback_type", INVALID_CHOICE): f"Tipo de feedback inválido. Use: {', '.join(FEEDBACK_TYPE_CHOICES)}",
+    ("tone", INVALID_CHOICE): f"Tom inválido. Use: {', '.join(TONE_CHOICES)}",
+    ("formality", INVALID_CHOICE): f"Nível de formalidade inválido. Use: {', '.join(FORMALITY_CHOICES)}",
+}
+
+
+class FieldError(NamedTuple):
+    """A validation failure of one field."""
+
+    field: str
+    code: str
+
+    @property
+    def message(self) -> str:
+        """User-facing (PT-BR) description of the error."""
+        return _MESSAGES[(self.field, self.code)]
+
+
+class RowValidation(NamedTuple):
+    """Validation outcome of one input row."""
+
+    index: int
+    errors: Tuple[FieldError, ...] = ()
+
+    @property
+    def valid(self) -> bool:
+        """Whether the row passed every check."""
+        return not self.errors
+
+
+# Every possible error, so validating a row allocates at most the errors tuple
+_ERRORS = {key: FieldError(*key) for key in _MESSAGES}
+_TEXT_ERRORS = {code: (_ERRORS[("feedback_text", code)],) for (field, code) in _MESSAGES if field == "feedback_text"}
+_TYPE_ERROR = _ERRORS[("feedback_type", INVALID_CHOICE)]
+_TONE_ERROR = _ERRORS[("tone", INVALID_CHOICE)]
+_FORMALITY_ERROR = _ERRORS[("formality", INVALID_CHOICE)]
+
+
+def _text_error(text: Any) -> Optional[str]:
+    """Error code for a feedback text, or None."""
+    if not text:
+        return EMPTY
+    if not isinstance(text, str):
+        return NOT_STRING
+    length = len(text.strip())
+    if length < MIN_TEXT_LENGTH:
+        return TOO_SHORT
+    if length > MAX_TEXT_LENGTH:
+        return TOO_LONG
+    return None
+
+
+def _result(field: str, code: Optional[str]) -> Tuple[bool, Optional[str]]:
+    return (True, None) if code is None else (False, _MESSAGES[(field, code)])
+
+
+def _is_choice(value: Any, choices: FrozenSet[str]) -> bool:
+    # Strings only: a list or dict is an invalid choice, not a TypeError
+    return isinstance(value, str) and value in choices
 
 
 def validate_feedback_text(text: str) -> Tuple[bool, Optional[str]]:
@@ -15,45 +107,78 @@ def validate_feedback_text(text: str) -> Tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not text:
-        return False, "O texto de feedback não pode estar vazio."
-
-    if not isinstance(text, str):
-        return False, "O texto deve ser uma string."
-
-    text_stripped = text.strip()
-
-    if len(text_stripped) < 10:
-        return False, "O texto deve ter pelo menos 10 caracteres."
-
-    if len(text_stripped) > 5000:
-        return False, "O texto não pode exceder 5000 caracteres."
-
-    return True, None
+    return _result("feedback_text", _text_error(text))
 
 
 def validate_feedback_type(feedback_type: str) -> Tuple[bool, Optional[str]]:
     """Validate feedback type selection."""
-    valid_types = ["geral", "desempenho", "comportamento", "técnico", "liderança"]
-    if feedback_type not in valid_types:
-        return False, f"Tipo de feedback inválido. Use: {', '.join(valid_types)}"
-    return True, None
+    return _result("feedback_type", None if _is_choice(feedback_type, FEEDBACK_TYPES) else INVALID_CHOICE)
 
 
 def validate_tone(tone: str) -> Tuple[bool, Optional[str]]:
     """Validate tone selection."""
-    valid_tones = ["construtivo", "neutro", "encorajador", "direto"]
-    if tone not in valid_tones:
-        return False, f"Tom inválido. Use: {', '.join(valid_tones)}"
-    return True, None
+    return _result("tone", None if _is_choice(tone, TONES) else INVALID_CHOICE)
 
 
 def validate_formality(formality: str) -> Tuple[bool, Optional[str]]:
     """Validate formality level selection."""
-    valid_levels = ["formal", "neutro", "casual"]
-    if formality not in valid_levels:
-        return False, f"Nível de formalidade inválido. Use: {', '.join(valid_levels)}"
-    return True, None
+    return _result("formality", None if _is_choice(formality, FORMALITY_LEVELS) else INVALID_CHOICE)
+
+
+def _row_errors(row: Union[str, Mapping[str, Any]]) -> Tuple[FieldError, ...]:
+    """Errors of one row, in field order (the shared empty tuple when valid)."""
+    # dict first: isinstance() against the Mapping ABC is comparatively slow
+    if not isinstance(row, dict) and (isinstance(row, str) or not isinstance(row, Mapping)):
+        code = _text_error(row)
+        return () if code is None else _TEXT_ERRORS[code]
+
+    text = row.get("feedback_text")
+    if type(text) is str and MIN_TEXT_LENGTH <= len(text.strip()) <= MAX_TEXT_LENGTH:
+        errors: Tuple[FieldError, ...] = ()
+    else:
+        code = _text_error(text)
+        errors = () if code is None else _TEXT_ERRORS[code]
+    if not _is_choice(row.get("feedback_type") or "geral", FEEDBACK_TYPES):
+        errors += (_TYPE_ERROR,)
+    if not _is_choice(row.get("tone") or "construtivo", TONES):
+        errors += (_TONE_ERROR,)
+    if not _is_choice(row.get("formality") or "neutro", FORMALITY_LEVELS):
+        errors += (_FORMALITY_ERROR,)
+    return errors
+
+
+def validate_row(row: Union[str, Mapping[str, Any]], index: int = 0) -> RowValidation:
+    """
+    Validate one input row.
+
+    Args:
+        row: A feedback text, or a mapping with "feedback_text" and the
+            optional "feedback_type", "tone" and "formality" (missing or
+            empty options take DEFAULT_OPTIONS)
+        index: Position of the row, copied to the result
+
+    Returns:
+        RowValidation with every failed check, in field order
+    """
+    return RowValidation(index, _row_errors(row))
+
+
+# Builds a RowValidation from (index, errors) without the Python-level
+# NamedTuple __new__, which dominates the cost of a valid row
+_new_validation = partial(tuple.__new__, RowValidation)
+
+
+def validate_many(rows: Iterable[Union[str, Mapping[str, Any]]]) -> Iterator[RowValidation]:
+    """
+    Validate rows lazily, one result per row.
+
+    Args:
+        rows: Feedback texts or row mappings (see validate_row)
+
+    Returns:
+        Iterator of RowValidation, one per row, indexed by position
+    """
+    return map(_new_validation, enumerate(map(_row_errors, rows)))
 
 
 def sanitize_text(text: str) -> str:
@@ -68,6 +193,10 @@ def sanitize_text(text: str) -> str:
     """
     if not text:
         return ""
+    # isprintable() is False for every whitespace character but " ", so a
+    # printable text without double spaces only needs its ends trimmed
+    if text.isprintable() and "  " not in text:
+        return text.strip(" ")
 
     # Remove excessive whitespace but preserve single spaces
     lines = text.split('\n')
@@ -78,3 +207,16 @@ def sanitize_text(text: str) -> str:
             cleaned_line = ' '.join(line.split())
             cleaned_lines.append(cleaned_line)
     return '\n'.join(cleaned_lines)
+
+
+def sanitize_many(texts: Iterable[Optional[str]]) -> Iterator[str]:
+    """
+    Sanitize texts lazily (see sanitize_text).
+
+    Args:
+        texts: Input texts; None and other falsy values become ""
+
+    Returns:
+        Iterator of sanitized texts, in order
+    """
+    return map(sanitize_text, texts)
@@ -0,0 +1,133 @@
+"""
+Tests for admission module
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from core.admission import (
+    AdmissionController,
+    RateLimitedError,
+    RateLimiter,
+    ServiceBusyError,
+    client_id,
+    create_rate_limiter,
+    default_trusted_hops
+)
+
+
+class TestAdmissionController:
+    """Tests for concurrency slots with bounded waiting."""
+
+    def test_rejects_beyond_waiting_room(self):
+        """Test that requests beyond the running and waiting bounds are rejected at once."""
+        controller = AdmissionController(max_concurrent=1, max_waiting=1, wait_timeout=None)
+
+        async def hold(release: asyncio.Event):
+            async with controller.slot():
+                await release.wait()
+
+        async def scenario():
+            release = asyncio.Event()
+            running = asyncio.create_task(hold(release))
+            await asyncio.sleep(0)
+            waiting = asyncio.create_task(hold(release))
+            await asyncio.sleep(0)
+            assert controller.stats() == {"running": 1, "waiting": 1, "rejected": 0}
+
+            with pytest.raises(ServiceBusyError):
+                async with controller.slot():
+                    pass
+
+            release.set()
+            await asyncio.gather(running, waiting)
+            return controller.stats()
+
+        assert asyncio.run(scenario()) == {"running": 0, "waiting": 0, "rejected": 1}
+
+    def test_wait_timeout(self):
+        """Test that a request waiting longer than wait_timeout is rejected."""
+        controller = AdmissionController(max_concurrent=1, max_waiting=4, wait_timeout=0.01)
+
+        async def scenario():
+            async with controller.slot():
+                with pytest.raises(ServiceBusyError):
+                    async with controller.slot():
+                        pass
+            # The slot is free again
+            async with controller.slot():
+                pass
+
+        asyncio.run(scenario())
+        assert controller.stats()["rejected"] == 1
+
+
+class TestRateLimiter:
+    """Tests for per-client token buckets."""
+
+    def test_burst_then_refill(self):
+        """Test that a client gets its burst, then one request per 1/rate seconds."""
+        limiter = RateLimiter(rate=1.0, burst=2)
+        with patch("core.admission.time.monotonic", return_value=100.0):
+            assert limiter.acquire("a") == 0
+            assert limiter.acquire("a") == 0
+            assert limiter.acquire("a") == pytest.approx(1.0)
+            # Other clients have their own bucket
+            assert limiter.acquire("b") == 0
+        with patch("core.admission.time.monotonic", return_value=101.0):
+            assert limiter.acquire("a") == 0
+
+    def test_check_raises_with_message(self):
+        """Test that check() raises a user-facing error with the wait."""
+        limiter = RateLimiter(rate=0.1, burst=1)
+        limiter.check("a")
+        with pytest.raises(RateLimitedError) as exc_info:
+            limiter.check("a")
+        assert exc_info.value.retry_after > 9
+        assert "10 s" in str(exc_info.value)
+        assert isinstance(exc_info.value, ServiceBusyError)
+
+    def test_bounded_clients(self):
+        """Test that only max_clients buckets are kept."""
+        limiter = RateLimiter(rate=1.0, burst=1, max_clients=2)
+        for client in ("a", "b", "c"):
+            limiter.acquire(client)
+        assert len(limiter) == 2
+        assert limiter.acquire("a") == 0
+
+    def test_create_rate_limiter(self):
+        """Test that a non-positive rate disables limiting."""
+        assert create_rate_limiter(0) is None
+        limiter = create_rate_limiter(per_minute=30, burst=3)
+        assert limiter.rate == 0.5
+        assert limiter.burst == 3
+
+
+def _request(forwarded=None, peer="10.0.0.1"):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=peer))
+
+
+class TestClientId:
+    """Tests for caller identification."""
+
+    def test_forwarded_for_ignored_by_default(self):
+        """Test that a caller-supplied X-Forwarded-For does not change the identity."""
+        assert client_id(_request("1.2.3.4"), trusted_hops=0) == "10.0.0.1"
+        assert client_id(None) == "local"
+
+    def test_trusted_hops_counted_from_the_right(self):
+        """Test that only entries written by trusted proxies are used."""
+        # The caller forged "6.6.6.6"; the single trusted proxy appended the real address
+        assert client_id(_request("6.6.6.6, 203.0.113.7"), trusted_hops=1) == "203.0.113.7"
+        assert client_id(_request("6.6.6.6, 203.0.113.7, 10.1.1.1"), trusted_hops=2) == "203.0.113.7"
+        assert client_id(_request("203.0.113.7"), trusted_hops=2) == "203.0.113.7"
+        assert client_id(_request(), trusted_hops=1) == "10.0.0.1"
+
+    def test_default_hops(self):
+        """Test that Spaces trust their proxy unless TRUSTED_PROXY_HOPS says otherwise."""
+        assert default_trusted_hops({}) == 0
+        assert default_trusted_hops({"SPACE_ID": "user/space"}) == 1
+        assert default_trusted_hops({"SPACE_ID": "user/space", "TRUSTED_PROXY_HOPS": "0"}) == 0
+        assert default_trusted_hops({"TRUSTED_PROXY_HOPS": "2"}) == 2
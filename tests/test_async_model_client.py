@@ -0,0 +1,195 @@
+"""
+Tests for async model client module
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from core.async_model_client import AsyncModelClient
+from core.resilience import CircuitBreaker, RetryPolicy
+
+
+PROMPT = "TEXTO ORIGINAL PARA MELHORAR:\nvc precisa melhorar\nINSTRUÇÕES:"
+
+
+def _response(status_code, body=None):
+    request = httpx.Request("POST", "https://example.test/models/test")
+    return httpx.Response(status_code, json=body, request=request)
+
+
+class TestAsyncModelClient:
+    """Tests for AsyncModelClient class."""
+
+    def test_inherits_configuration(self):
+        """Test that the async client keeps the sync client configuration."""
+        client = AsyncModelClient(model_name="test-model", api_key="key", timeout=5)
+        assert client.model_name == "test-model"
+        assert client.async_session.timeout.read == 5
+
+    def test_agenerate_success(self):
+        """Test successful async generation."""
+        client = AsyncModelClient(api_key="test-key")
+        generated = json.dumps({"feedback_aprimorado": "Test"})
+
+        with patch.object(httpx.AsyncClient, "post", new=AsyncMock(
+            return_value=_response(200, [{"generated_text": generated}])
+        )) as mock_post:
+            result = asyncio.run(client.agenerate("Test prompt"))
+
+        assert result == generated
+        assert mock_post.call_args.kwargs["headers"]["Authorization"] == "Bearer test-key"
+
+    def test_agenerate_503_uses_fallback_with_note(self):
+        """Test that a loading model falls back with the loading note."""
+        client = AsyncModelClient(retry_policy=RetryPolicy(max_attempts=1))
+
+        with patch.object(httpx.AsyncClient, "post", new=AsyncMock(return_value=_response(503, {}))):
+            result = asyncio.run(client.agenerate(PROMPT))
+
+        data = json.loads(result)
+        assert "carregando" in data["observacoes"]
+        assert data["feedback_aprimorado"].startswith("Você")
+
+    def test_agenerate_http_error_uses_fallback(self):
+        """Test that HTTP errors fall back with the status code in the note."""
+        client = AsyncModelClient()
+
+        with patch.object(httpx.AsyncClient, "post", new=AsyncMock(return_value=_response(401, {}))):
+            result = asyncio.run(client.agenerate(PROMPT))
+
+        assert "401" in json.loads(result)["observacoes"]
+
+    def test_agenerate_connection_error_uses_fallback(self):
+        """Test that connection errors fall back like the sync client."""
+        client = AsyncModelClient(retry_policy=RetryPolicy(max_attempts=1))
+
+        with patch.object(httpx.AsyncClient, "post", new=AsyncMock(side_effect=httpx.ConnectError("down"))):
+            result = asyncio.run(client.agenerate(PROMPT))
+
+        assert "conexão" in json.loads(result)["observacoes"]
+
+    def test_aparse_response_matches_sync(self, sample_response_data):
+        """Test that async parsing returns the same structure as the sync path."""
+        client = AsyncModelClient()
+        raw = "```json\n" + json.dumps(sample_response_data) + "\n```"
+
+        assert asyncio.run(client.aparse_response(raw)) == client.parse_response(raw)
+
+    def test_aclose(self):
+        """Test that aclose() closes the async session."""
+        async def run():
+            async with AsyncModelClient() as client:
+                session = client.async_session
+            return session
+
+        assert asyncio.run(run()).is_closed
+
+
+class TestAsyncGenerateStream:
+    """Tests for async streaming generation."""
+
+    def _client(self, handler):
+        client = AsyncModelClient()
+        client._async_session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    def _collect(self, client):
+        async def run():
+            return [token async for token in client.agenerate_stream("prompt")]
+        return asyncio.run(run())
+
+    def test_yields_tokens(self):
+        """Test that SSE tokens are yielded as they arrive."""
+        body = (
+            'data: {"token": {"text": "Olá"}}\n\n'
+            'data: {"token": {"text": " mundo"}}\n\n'
+        )
+
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+        assert self._collect(self._client(handler)) == ["Olá", " mundo"]
+
+    def test_503_yields_fallback(self):
+        """Test that a loading model yields the fallback with its note."""
+        client = self._client(lambda request: httpx.Response(503))
+        chunks = self._collect(client)
+
+        assert "carregando" in json.loads(chunks[0])["observacoes"]
+
+    def test_non_streaming_endpoint(self):
+        """Test that a plain JSON answer is yielded as a single chunk."""
+        client = self._client(lambda request: httpx.Response(200, json=[{"generated_text": "texto"}]))
+        assert self._collect(client) == ["texto"]
+
+
+class TestAsyncRetry:
+    """Tests for retries on the async path."""
+
+    def test_retries_then_succeeds(self):
+        """Test that a transient 502 is retried and the retry count reported."""
+        responses = iter([
+            httpx.Response(502),
+            httpx.Response(200, json=[{"generated_text": json.dumps({"versao_curta": "ok"})}])
+        ])
+        client = AsyncModelClient(retry_policy=RetryPolicy(base_delay=0.001))
+        client._async_session = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: next(responses)))
+
+        result = asyncio.run(client.aenhance("prompt"))
+
+        assert result["versao_curta"] == "ok"
+        assert result["_meta"]["retries"] == 1
+
+    def test_connection_errors_exhaust_budget(self):
+        """Test that repeated connection errors fall back after max_attempts."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ConnectError("down")
+
+        client = AsyncModelClient(retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001))
+        client._async_session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        result = asyncio.run(client.aenhance(PROMPT))
+
+        assert len(calls) == 3
+        assert result["_meta"] == {"fallback": True, "cause": "connection_error", "retries": 2}
+
+
+class TestAsyncCircuitBreaker:
+    """Tests for the circuit breaker around async calls."""
+
+    def _half_open(self):
+        breaker = CircuitBreaker(min_calls=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        return breaker
+
+    def test_cancelled_probe_releases_slot(self, sample_response_data):
+        """Test that a probe cancelled in flight does not keep the circuit rejecting calls."""
+        client = AsyncModelClient(circuit_breaker=self._half_open())
+        generated = json.dumps(sample_response_data)
+
+        async def slow_post(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        async def scenario():
+            with patch.object(httpx.AsyncClient, "post", new=slow_post):
+                probe = asyncio.create_task(client.agenerate(PROMPT))
+                await asyncio.sleep(0.01)
+                probe.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await probe
+            with patch.object(httpx.AsyncClient, "post", new=AsyncMock(
+                return_value=_response(200, [{"generated_text": generated}])
+            )):
+                return await client.agenerate(PROMPT)
+
+        assert asyncio.run(scenario()) == generated
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,199 @@
+"""
+Tests for batch processing module
+"""
+
+import csv
+import json
+import pytest
+from unittest.mock import Mock
+from core.batch import process_row, read_rows, run_batch
+from core.service import FeedbackService
+from core.token_budget import TokenBudget
+
+
+def _client(response_data):
+    client = Mock()
+    client.token_budget = TokenBudget()
+    client.cache_key.return_value = "key"
+    client.enhance.return_value = response_data
+    return client
+
+
+def _write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+ROWS = [
+    {"feedback_text": f"Feedback número {i} precisa de melhorias.", "tone": "direto"}
+    for i in range(10)
+]
+
+
+class TestReadRows:
+    """Tests for input streaming."""
+
+    def test_read_csv(self, tmp_path):
+        """Test reading rows from CSV with default ids."""
+        path = tmp_path / "input.csv"
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["feedback_text", "tone"])
+            writer.writeheader()
+            writer.writerows(ROWS[:2])
+
+        rows = list(read_rows(str(path)))
+        assert [row["id"] for row in rows] == [0, 1]
+        assert rows[0]["tone"] == "direto"
+
+    def test_read_jsonl_keeps_ids(self, tmp_path):
+        """Test that explicit ids are preserved and blank lines skipped."""
+        path = tmp_path / "input.jsonl"
+        path.write_text(
+            '{"id": "a", "feedback_text": "x"}\n\n{"feedback_text": "y"}\n{"id": 0, "feedback_text": "z"}\n',
+            encoding="utf-8"
+        )
+
+        assert [row["id"] for row in read_rows(str(path))] == ["a", 1, 0]
+
+
+    def test_malformed_jsonl_lines(self, tmp_path):
+        """Test that lines that are not JSON objects become rows carrying the error."""
+        path = tmp_path / "input.jsonl"
+        path.write_text('{"feedback_text": "x"}\n{"feedback_text": \n[1, 2]\n', encoding="utf-8")
+
+        rows = list(read_rows(str(path)))
+        assert [row["id"] for row in rows] == [0, 1, 2]
+        assert rows[1]["_line"] == 2
+        assert "JSON inválido" in rows[1]["_error"]
+        assert rows[2]["_line"] == 3
+
+
+class TestProcessRow:
+    """Tests for single row processing."""
+
+    def test_ok(self, sample_response_data):
+        """Test that a valid row is enhanced with the row options."""
+        client = _client(sample_response_data)
+        record = process_row(client, {"id": 1, **ROWS[0]})
+
+        assert record["status"] == "ok"
+        assert record["result"] == sample_response_data
+        assert "FEEDBACK APRIMORADO" in record["copy_text"]
+        assert client.cache_key.call_args.args[1:] == ("geral", "direto", "neutro")
+
+    def test_invalid(self, sample_response_data):
+        """Test that invalid rows are reported without calling the model."""
+        client = _client(sample_response_data)
+        record = process_row(client, {"id": 1, "feedback_text": "curto"})
+
+        assert record["status"] == "invalid"
+        assert record["errors"] == [{"field": "feedback_text", "code": "too_short"}]
+        client.enhance.assert_not_called()
+
+    def test_malformed_row(self, sample_response_data):
+        """Test that a malformed input line is reported as invalid with its line number."""
+        client = _client(sample_response_data)
+        record = process_row(client, {"id": 3, "_line": 4, "_error": "Linha 4: JSON inválido."})
+
+        assert record["status"] == "invalid"
+        assert record["line"] == 4
+        client.enhance.assert_not_called()
+
+    def test_uses_service_compression_and_budget(self, sample_response_data):
+        """Test that rows are compressed and budgeted like interface requests."""
+        client = _client(sample_response_data)
+        service = FeedbackService(client, compression_ratio=1.0)
+        text = "O relatório atrasou dois dias.\nAtenciosamente,\nCarlos"
+
+        assert process_row(client, {"id": 1, "feedback_text": text}, service)["status"] == "ok"
+
+        prompt = client.enhance.call_args.args[0]
+        assert "O relatório atrasou dois dias." in prompt
+        assert "Carlos" not in prompt
+        assert client.enhance.call_args.kwargs["max_length"] > 0
+
+    def test_error(self):
+        """Test that model errors are reported per row."""
+        client = _client(None)
+        client.enhance.side_effect = RuntimeError("boom")
+
+        record = process_row(client, {"id": 1, **ROWS[0]})
+        assert record == {"id": 1, "status": "error", "error": "boom"}
+
+
+class TestRunBatch:
+    """Tests for the batch runner."""
+
+    def test_results_in_input_order(self, tmp_path, sample_response_data):
+        """Test that every row is written once, in input order."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, ROWS)
+
+        stats = run_batch(str(input_path), str(output_path), _client(sample_response_data), concurrency=3)
+
+        assert stats["processed"] == stats["ok"] == 10
+        assert [record["id"] for record in _read_jsonl(output_path)] == list(range(10))
+
+    def test_resume_after_crash(self, tmp_path, sample_response_data):
+        """Test that a crashed run resumes after the last checkpointed row."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, ROWS)
+
+        client = _client(sample_response_data)
+        client.enhance.side_effect = [sample_response_data] * 4 + [KeyboardInterrupt()]
+        with pytest.raises(KeyboardInterrupt):
+            run_batch(str(input_path), str(output_path), client, concurrency=1)
+        # Simulate a partially written line left by the crash
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write('{"id": 4, "sta')
+
+        client = _client(sample_response_data)
+        stats = run_batch(str(input_path), str(output_path), client, concurrency=1)
+
+        assert stats["skipped"] == 4
+        assert client.enhance.call_count == 6
+        assert [record["id"] for record in _read_jsonl(output_path)] == list(range(10))
+
+    def test_malformed_line_does_not_stop_the_run(self, tmp_path, sample_response_data):
+        """Test that a bad line gets an invalid record and the rows after it are processed."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, ROWS[:2])
+        with open(input_path, "a", encoding="utf-8") as f:
+            f.write("não é json\n" + json.dumps(ROWS[2]) + "\n")
+
+        stats = run_batch(str(input_path), str(output_path), _client(sample_response_data))
+
+        assert stats == {"processed": 4, "ok": 3, "invalid": 1, "error": 0, "skipped": 0}
+        records = _read_jsonl(output_path)
+        assert [record["status"] for record in records] == ["ok", "ok", "invalid", "ok"]
+        assert records[2]["line"] == 3
+
+    def test_non_string_option_does_not_stop_the_run(self, tmp_path, sample_response_data):
+        """Test that a row with a list as an option is reported invalid and the run goes on."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{**ROWS[0], "tone": ["direto"]}, ROWS[1]])
+
+        stats = run_batch(str(input_path), str(output_path), _client(sample_response_data))
+
+        assert stats["processed"] == 2
+        records = _read_jsonl(output_path)
+        assert records[0]["status"] == "invalid"
+        assert records[0]["errors"] == [{"field": "tone", "code": "invalid_choice"}]
+        assert records[1]["status"] == "ok"
+
+    def test_no_resume_starts_over(self, tmp_path, sample_response_data):
+        """Test that resume=False reprocesses the whole file."""
+        input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        _write_jsonl(input_path, ROWS)
+        run_batch(str(input_path), str(output_path), _client(sample_response_data))
+
+        stats = run_batch(str(input_path), str(output_path), _client(sample_response_data), resume=False)
+
+        assert stats["processed"] == 10
+        assert len(_read_jsonl(output_path)) == 10
@@ -0,0 +1,123 @@
+"""
+Tests for cache module
+"""
+
+import pytest
+from unittest.mock import patch
+from core.cache import (
+    MemoryCache,
+    SQLiteCache,
+    create_cache,
+    make_cache_key
+)
+
+
+class TestMakeCacheKey:
+    """Tests for cache key construction."""
+
+    def test_same_inputs_same_key(self):
+        """Test that identical requests share a key."""
+        args = ("texto", "geral", "construtivo", "neutro", "model", 0.7, 0.9)
+        assert make_cache_key(*args) == make_cache_key(*args)
+
+    def test_each_field_changes_key(self):
+        """Test that every field contributes to the key."""
+        base = ["texto", "geral", "construtivo", "neutro", "model", 0.7, 0.9]
+        changed = ["outro", "técnico", "direto", "formal", "other", 0.0, 1.0]
+        keys = {make_cache_key(*base)}
+        for i, value in enumerate(changed):
+            args = list(base)
+            args[i] = value
+            keys.add(make_cache_key(*args))
+        assert len(keys) == len(base) + 1
+
+
+class TestMemoryCache:
+    """Tests for in-memory LRU cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that hits and misses are counted."""
+        cache = MemoryCache()
+        assert cache.get("a") is None
+        cache.set("a", {"x": 1})
+        assert cache.get("a") == {"x": 1}
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.hit_rate == 0.5
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", {})
+        cache.set("b", {})
+        cache.get("a")
+        cache.set("c", {})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {}
+        assert cache.stats.evictions == 1
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are dropped."""
+        cache = MemoryCache(ttl=10)
+        with patch("core.cache.time.monotonic", return_value=100.0):
+            cache.set("a", {})
+        with patch("core.cache.time.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+        assert cache.stats.evictions == 1
+
+
+class TestSQLiteCache:
+    """Tests for on-disk SQLite cache."""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        path = str(tmp_path / "cache.sqlite3")
+        cache = SQLiteCache(path=path)
+        cache.set("a", {"feedback_aprimorado": "Ação"})
+        cache.close()
+
+        reopened = SQLiteCache(path=path)
+        assert reopened.get("a") == {"feedback_aprimorado": "Ação"}
+        assert reopened.stats.hits == 1
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently accessed entry is evicted."""
+        cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+        with patch("core.cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.set("a", {})
+            cache.set("b", {})
+            cache.get("a")
+            cache.set("c", {})
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.stats.evictions == 1
+
+    def test_ttl_expiry(self, tmp_path):
+        """Test that expired entries are dropped."""
+        cache = SQLiteCache(path=str(tmp_path / "cache.sqlite3"), ttl=10)
+        with patch("core.cache.time.time", return_value=100.0):
+            cache.set("a", {})
+        with patch("core.cache.time.time", return_value=111.0):
+            assert cache.get("a") is None
+
+
+class TestCreateCache:
+    """Tests for the cache factory."""
+
+    def test_backends(self, tmp_path):
+        """Test that each backend name maps to its cache."""
+        assert isinstance(create_cache("memory"), MemoryCache)
+        assert isinstance(create_cache("sqlite", path=str(tmp_path / "c.db")), SQLiteCache)
+        assert create_cache("off") is None
+
+    def test_non_positive_ttl_disables_expiry(self):
+        """Test that ttl <= 0 means entries never expire."""
+        assert create_cache("memory", ttl=0).ttl is None
+
+    def test_unknown_backend(self):
+        """Test that unknown backends are rejected."""
+        with pytest.raises(ValueError):
+            create_cache("redis")
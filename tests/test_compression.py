@@ -0,0 +1,105 @@
+"""
+Tests for draft compression
+"""
+
+import pytest
+from core.compression import compress_feedback, compression_ratio_from_env
+
+
+EMAIL = """Oi Ana,
+Ontem a entrega atrasou dois dias. Isso gerou retrabalho para o time.
+Ontem a entrega atrasou dois dias. Sugiro alinharmos o cronograma toda segunda.
+Enviado do meu iPhone
+Atenciosamente,
+Carlos Silva
+Gerente de Projetos
+Em seg., 3 de jun. de 2024 às 10:00, Ana escreveu:
+> Pode me mandar o feedback?
+> Obrigada"""
+
+
+class TestCompressFeedback:
+    """Tests for compress_feedback."""
+
+    def test_removes_redundancy(self):
+        """Test removal of quoted replies, boilerplate, signature and repeats."""
+        result = compress_feedback(EMAIL)
+
+        assert result.text == (
+            "Oi Ana,\n"
+            "Ontem a entrega atrasou dois dias. Isso gerou retrabalho para o time.\n"
+            "Sugiro alinharmos o cronograma toda segunda."
+        )
+        assert result.removed == {"boilerplate": 1, "signature": 3, "quoted": 3, "duplicate": 1}
+        assert result.ratio < 0.6
+
+    def test_forwarded_message_is_kept(self):
+        """Test that a leading "original message" marker does not drop the content."""
+        text = "-----Mensagem original-----\nDe: Carla <carla@empresa.com>\nAssunto: Feedback\nO relatório atrasou."
+        assert compress_feedback(text).text == "O relatório atrasou."
+
+    def test_header_like_lines_in_the_body_are_kept(self):
+        """Test that lines such as "Data:" are only headers before the content."""
+        text = "Para: Carla\nO relatório atrasou.\nData: sexta-feira, antes da reunião.\nPara: o time, revisar o prazo."
+        result = compress_feedback(text)
+
+        assert result.text == "O relatório atrasou.\nData: sexta-feira, antes da reunião.\nPara: o time, revisar o prazo."
+        assert result.removed == {"boilerplate": 1}
+
+    def test_ratio_keeps_the_strongest_sentences(self):
+        """Test that a lower ratio drops the sentences with fewest FIS cues, in order."""
+        text = (
+            "Bom dia a todos. Ontem a entrega do projeto atrasou. "
+            "Foi um dia comum. Sugiro revisar o prazo com o cliente."
+        )
+        result = compress_feedback(text, ratio=0.7)
+
+        assert result.text == "Ontem a entrega do projeto atrasou. Sugiro revisar o prazo com o cliente."
+        assert result.removed == {"low_score": 2}
+
+    def test_keeps_at_least_one_sentence(self):
+        """Test that an extreme ratio still keeps a sentence."""
+        assert compress_feedback("Uma frase bem longa sobre o projeto.", ratio=0.01).text
+
+    def test_plain_text_unchanged(self):
+        """Test that text without redundancy is left as is."""
+        text = "O relatório atrasou. Isso afetou o cliente."
+        result = compress_feedback(text)
+        assert result.text == text
+        assert result.removed == {}
+
+    @pytest.mark.parametrize("first_line", ["Obrigado", "Abraços,", "--"])
+    def test_leading_sign_off_is_content(self, first_line):
+        """Test that a sign-off or delimiter with nothing before it is not a signature."""
+        text = f"{first_line}\nO relatório atrasou dois dias.\nSugiro revisar o prazo."
+        result = compress_feedback(text)
+        assert result.text == text
+        assert "signature" not in result.removed
+
+    def test_never_empty(self):
+        """Test that a draft made only of redundancy is returned unchanged."""
+        text = "> O relatório atrasou.\n> Sugiro revisar o prazo."
+        result = compress_feedback(text)
+        assert result.text == text
+        assert result.removed == {}
+
+    def test_invalid_ratio(self):
+        """Test that ratios outside (0, 1] are refused."""
+        with pytest.raises(ValueError):
+            compress_feedback("texto", ratio=0)
+
+
+class TestCompressionRatioFromEnv:
+    """Tests for compression_ratio_from_env."""
+
+    @pytest.mark.parametrize("value,expected", [("", None), ("0", None), ("0.5", 0.5), (" 1 ", 1.0)])
+    def test_valid(self, value, expected):
+        """Test that unset or 0 turns compression off and (0, 1] is accepted."""
+        assert compression_ratio_from_env({"PROMPT_COMPRESSION_RATIO": value}) == expected
+        assert compression_ratio_from_env({}) is None
+
+    @pytest.mark.parametrize("value", ["1.5", "-0.2", "metade", "nan"])
+    def test_invalid(self, value):
+        """Test that a value outside (0, 1] fails with a message naming the variable."""
+        with pytest.raises(ValueError, match="PROMPT_COMPRESSION_RATIO"):
+            compression_ratio_from_env({"PROMPT_COMPRESSION_RATIO": value})
@@ -0,0 +1,82 @@
+"""
+Tests for the offline fast engine
+"""
+
+import pytest
+from core.fast_engine import DEFAULT_FIS, FastEngine, score_sentence, split_sentences
+
+
+FEEDBACK = (
+    "vc tem que melhorar a comunicacao. Ontem na reuniao de sprint vc nao apresentou o relatorio. "
+    "Isso atrasou as entregas e gerou retrabalho. Sugiro alinhar o status antes das reunioes."
+)
+
+
+@pytest.fixture
+def engine():
+    return FastEngine.from_file()
+
+
+class TestSentences:
+    """Tests for segmentation and scoring."""
+
+    def test_split_sentences(self):
+        """Test splitting at final punctuation and line breaks."""
+        assert split_sentences("Primeira frase. Segunda!\nTerceira sem ponto\n\n") == [
+            "Primeira frase.", "Segunda!", "Terceira sem ponto"
+        ]
+
+    def test_score_sentence(self):
+        """Test the fato, impacto and sugestão scores."""
+        assert score_sentence("Ontem a entrega atrasou.") == (2, 1, 0)
+        assert score_sentence("Sugiro revisar em 2 dias.") == (2, 0, 1)
+
+
+class TestFastEngine:
+    """Tests for FastEngine."""
+
+    def test_extracts_fis(self, engine):
+        """Test that each FIS part comes from the matching sentence."""
+        fis = engine.enhance(FEEDBACK)["fato_impacto_sugestao"]
+
+        assert fis["fato"] == "Ontem na reunião de sprint você não apresentou o relatório."
+        assert fis["impacto"] == "Isso atrasou as entregas e gerou retrabalho."
+        assert fis["sugestao"] == "Sugiro alinhar o status antes das reuniões."
+
+    def test_rewrites_harsh_phrasing(self, engine):
+        """Test rewrites, including case and spacing variations."""
+        text, count = engine.rewrite("Péssimo resultado, você  nunca avisa e tem que melhorar")
+        assert text == "Abaixo do esperado resultado, você raramente avisa e precisa melhorar"
+        assert count == 3
+        assert engine.rewrite("resultado péssimos") == ("resultado péssimos", 0)
+
+    def test_missing_parts_use_defaults(self, engine):
+        """Test defaults and tips when the text has no impact or suggestion."""
+        result = engine.enhance("O texto nao diz muita coisa")
+
+        assert result["feedback_aprimorado"] == "O texto não diz muita coisa."
+        assert result["fato_impacto_sugestao"]["fato"] == "O texto não diz muita coisa."
+        assert result["fato_impacto_sugestao"]["impacto"] == DEFAULT_FIS["impacto"]
+        assert result["fato_impacto_sugestao"]["sugestao"] == DEFAULT_FIS["sugestao"]
+        assert any("impacto" in tip for tip in result["sugestoes_extras"])
+
+    def test_short_version_is_extractive(self, engine):
+        """Test that versao_curta is made of the top sentences, in order."""
+        result = engine.enhance(FEEDBACK)
+        short = result["versao_curta"]
+
+        assert short.startswith("Ontem na reunião")
+        assert short in result["feedback_aprimorado"]
+        assert 3 <= len(result["sugestoes_extras"]) <= 5
+
+    def test_long_short_version_is_truncated(self, engine):
+        """Test that versao_curta is capped in words."""
+        short = engine.enhance(" ".join(["palavra"] * 100))["versao_curta"]
+        assert short.endswith("...")
+        assert len(short.split()) == 40
+
+    def test_empty_text(self, engine):
+        """Test that empty text still gives a complete structure."""
+        result = engine.enhance("")
+        assert result["feedback_aprimorado"] == ""
+        assert result["fato_impacto_sugestao"] == DEFAULT_FIS
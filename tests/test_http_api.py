@@ -0,0 +1,123 @@
+"""
+Tests for http_api module
+"""
+
+import json
+import pytest
+from unittest.mock import AsyncMock
+from fastapi.testclient import TestClient
+from core.admission import create_rate_limiter
+from core.async_model_client import AsyncModelClient
+from core.cache import MemoryCache
+from core.http_api import create_api
+from core.metrics import metrics
+from core.service import FeedbackService
+from core.token_budget import PromptTooLongError
+
+
+TEXT = "O relatório atrasou dois dias e gerou retrabalho para o time."
+
+
+@pytest.fixture
+def service(sample_response_data):
+    client = AsyncModelClient(cache=MemoryCache())
+    client.aenhance = AsyncMock(return_value=sample_response_data)
+    return FeedbackService(client)
+
+
+class TestEndpoints:
+    """Tests for the JSON endpoints."""
+
+    def test_enhance(self, service, sample_response_data):
+        """Test that the parsed response dict is returned."""
+        response = TestClient(create_api(service)).post("/api/v1/enhance", json={"feedback_text": TEXT})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == sample_response_data
+
+    def test_invalid_input(self, service):
+        """Test that invalid input gets a 422 with structured errors."""
+        response = TestClient(create_api(service)).post(
+            "/api/v1/enhance", json={"feedback_text": "curto", "formality": "gíria"}
+        )
+        assert response.status_code == 422
+        assert [e["field"] for e in response.json()["errors"]] == ["feedback_text", "formality"]
+
+    def test_rate_limited(self, service):
+        """Test that rate limited clients get a 429 with Retry-After."""
+        service.rate_limiter = create_rate_limiter(per_minute=1, burst=1)
+        api = TestClient(create_api(service))
+        assert api.post("/api/v1/enhance", json={"feedback_text": TEXT}).status_code == 200
+        response = api.post("/api/v1/enhance", json={"feedback_text": TEXT})
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+    def test_batch(self, service, sample_response_data):
+        """Test that each batch item gets its own status, in order."""
+        api = TestClient(create_api(service, max_batch_items=2))
+        response = api.post("/api/v1/enhance/batch", json={"items": [{"feedback_text": TEXT}, {"feedback_text": "curto"}]})
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["ok", "invalid"]
+        assert results[0]["result"] == sample_response_data
+
+        too_many = {"items": [{"feedback_text": TEXT}] * 3}
+        assert api.post("/api/v1/enhance/batch", json=too_many).status_code == 413
+
+    def test_batch_prompt_too_long(self, service):
+        """Test that a draft that does not fit the context is reported as invalid, as in core.batch."""
+        service.client.aenhance.side_effect = PromptTooLongError("longo demais")
+        response = TestClient(create_api(service)).post(
+            "/api/v1/enhance/batch", json={"items": [{"feedback_text": TEXT}]}
+        )
+
+        assert response.json()["results"] == [{
+            "status": "invalid",
+            "error": "longo demais",
+            "errors": [{"field": "feedback_text", "code": "prompt_too_long"}]
+        }]
+
+    def test_batch_charged_once(self, service):
+        """Test that a batch spends one rate limit token, not one per item."""
+        service.rate_limiter = create_rate_limiter(per_minute=10, burst=5)
+        api = TestClient(create_api(service))
+
+        response = api.post("/api/v1/enhance/batch", json={"items": [{"feedback_text": TEXT}] * 10})
+        assert [r["status"] for r in response.json()["results"]] == ["ok"] * 10
+
+        for _ in range(4):
+            api.post("/api/v1/enhance", json={"feedback_text": TEXT})
+        response = api.post("/api/v1/enhance/batch", json={"items": [{"feedback_text": TEXT}]})
+        assert response.status_code == 429
+
+    def test_stream(self, service, sample_response_data):
+        """Test that the stream ends with the cached result as NDJSON."""
+        api = TestClient(create_api(service))
+        key = service.client.cache_key(TEXT, "geral", "construtivo", "neutro")
+        service.client.cache.set(key, sample_response_data)
+
+        response = api.post("/api/v1/enhance/stream", json={"feedback_text": TEXT})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [{"result": sample_response_data}]
+        assert api.post("/api/v1/enhance/stream", json={"feedback_text": "curto"}).status_code == 422
+
+    def test_health(self, service):
+        """Test the health endpoint."""
+        body = TestClient(create_api(service)).get("/api/v1/health").json()
+        assert body["status"] == "ok"
+        assert body["cache"]["hits"] == 0
+
+    def test_metrics(self, service):
+        """Test the Prometheus endpoint, which answers 404 while metrics are disabled."""
+        client = TestClient(create_api(service))
+        assert client.get("/metrics").status_code == 404
+        metrics.enable()
+        try:
+            client.post("/api/v1/enhance", json={"feedback_text": TEXT})
+            response = client.get("/metrics")
+        finally:
+            metrics.disable()
+            metrics.reset()
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'feedbackcraft_request_duration_seconds_count{mode="enhance"} 1' in response.text
@@ -0,0 +1,53 @@
+"""
+Tests for import time: heavy dependencies load on first use only
+"""
+
+import os
+import pytest
+
+from core.import_time import TARGETS, heavy_imports, import_times
+
+
+# About 3x the measured cost (~0.12 s); wall-clock time depends on the
+# machine, so the budget is only checked with CHECK_IMPORT_TIME=true (the
+# heavy-dependency tests catch the regressions that matter deterministically)
+IMPORT_BUDGET_US = 400_000
+CHECK_IMPORT_TIME = os.getenv("CHECK_IMPORT_TIME", "false").lower() == "true"
+
+
+class TestImportTime:
+    """Test cases for startup import cost."""
+
+    @pytest.mark.parametrize("module", TARGETS)
+    def test_no_heavy_dependency_at_import(self, module):
+        """Test that importing a module loads no heavy dependency."""
+        assert heavy_imports(import_times(module)) == []
+
+    def test_heavy_imports_match_submodules(self):
+        """Test that a heavy module is reported for its submodules, not for siblings."""
+        times = {"http": (1, 1), "http.client": (1, 1), "http.server": (1, 1), "numpy.linalg": (1, 1)}
+        assert heavy_imports(times) == ["http.server", "numpy"]
+        assert heavy_imports({"http.client": (1, 1), "requests_toolbelt": (1, 1)}) == []
+
+    @pytest.mark.skipif(not CHECK_IMPORT_TIME, reason="timing check opt-in (CHECK_IMPORT_TIME=true)")
+    def test_app_import_within_budget(self):
+        """Test that the application imports well within the budget."""
+        times = import_times("app")
+        assert times["app"][1] < IMPORT_BUDGET_US
+
+    def test_importing_app_does_not_create_service(self):
+        """Test that the model client is only built on first use."""
+        import app
+
+        assert app._service is None
+
+    def test_get_service_creates_once(self, monkeypatch):
+        """Test that get_service() builds the service once and reuses it."""
+        import app
+
+        monkeypatch.setattr(app, "_service", None)
+        monkeypatch.setenv("RESPONSE_CACHE", "off")
+        service = app.get_service()
+
+        assert app.get_service() is service
+        assert service.admission.max_concurrent == app.MODEL_CONCURRENCY
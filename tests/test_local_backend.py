@@ -0,0 +1,193 @@
+"""
+Tests for local inference backend
+"""
+
+import json
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from core.local_backend import (
+    GenerationRequest,
+    LocalBackend,
+    LocalBackendUnavailable,
+    get_local_backend
+)
+from core.model_client import ModelClient
+from core.prompt_builder import build_prompt_parts
+
+
+class FakeLlama:
+    """Stand-in for llama_cpp.Llama recording how it was used."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.cache = None
+        self.calls = []
+        self.loaded_states = []
+        FakeLlama.instances.append(self)
+
+    def reset(self):
+        pass
+
+    def save_state(self):
+        return ("state", self.calls[-1][0][0]["content"])
+
+    def load_state(self, state):
+        self.loaded_states.append(state)
+
+    def set_cache(self, cache):
+        self.cache = cache
+
+    def create_chat_completion(self, messages, stream=False, **kwargs):
+        self.calls.append((messages, kwargs))
+        if stream:
+            return iter([
+                {"choices": [{"delta": {"role": "assistant"}}]},
+                {"choices": [{"delta": {"content": "{\"a\""}}]},
+                {"choices": [{"delta": {"content": ": 1}"}}]}
+            ])
+        return {"choices": [{"message": {"content": "{\"a\": 1}"}}]}
+
+
+@pytest.fixture
+def fake_llama_cpp(monkeypatch):
+    FakeLlama.instances = []
+    module = SimpleNamespace(Llama=FakeLlama, LlamaRAMCache=lambda capacity_bytes: ("ram", capacity_bytes))
+    monkeypatch.setattr("core.local_backend._load_llama_cpp", lambda: module)
+    return module
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    path = tmp_path / "model.gguf"
+    path.write_bytes(b"GGUF")
+    return str(path)
+
+
+class TestLocalBackend:
+    """Tests for LocalBackend."""
+
+    def test_loads_once_with_threads_and_cache(self, fake_llama_cpp, model_file):
+        """Test that the model is loaded once with the configured threads and KV-cache."""
+        backend = LocalBackend(model_file, n_threads=4, kv_cache_bytes=1024)
+        backend.generate("p", 10, 0.7, 0.9)
+        backend.generate("p", 10, 0.7, 0.9)
+
+        assert len(FakeLlama.instances) == 1
+        llama = FakeLlama.instances[0]
+        assert llama.kwargs["n_threads"] == 4
+        assert llama.cache == ("ram", 1024)
+        assert llama.calls[0][1] == {"max_tokens": 10, "temperature": 0.7, "top_p": 0.9}
+
+    def test_stream_yields_content(self, fake_llama_cpp, model_file):
+        """Test that streaming yields only content deltas."""
+        backend = LocalBackend(model_file)
+        assert list(backend.stream("p", 10, 0.7, 0.9)) == ['{"a"', ": 1}"]
+
+    def test_missing_model_file(self, fake_llama_cpp, tmp_path):
+        """Test that a missing model file is reported as unavailable."""
+        backend = LocalBackend(str(tmp_path / "missing.gguf"))
+        with pytest.raises(LocalBackendUnavailable):
+            backend.generate("p", 10, 0.7, 0.9)
+
+    def test_missing_package(self, model_file):
+        """Test that a missing llama-cpp-python is reported as unavailable."""
+        with patch.dict("sys.modules", {"llama_cpp": None}):
+            with pytest.raises(LocalBackendUnavailable):
+                LocalBackend(model_file).generate("p", 10, 0.7, 0.9)
+
+    def test_prefix_prefilled_once(self, fake_llama_cpp, model_file):
+        """Test that the static prefix is evaluated once and reused while it stays loaded."""
+        backend = LocalBackend(model_file)
+        backend.generate("PREFIX a", 10, 0.7, 0.9, prefix="PREFIX ")
+        backend.generate("PREFIX b", 10, 0.7, 0.9, prefix="PREFIX ")
+
+        llama = FakeLlama.instances[0]
+        prompts = [messages[0]["content"] for messages, _ in llama.calls]
+        assert prompts == ["PREFIX ", "PREFIX a", "PREFIX b"]
+        assert llama.calls[0][1]["max_tokens"] == 1
+        assert llama.loaded_states == []
+
+    def test_prefix_state_restored_after_other_prompt(self, fake_llama_cpp, model_file):
+        """Test that the saved prefix state is loaded back after an unrelated prompt."""
+        backend = LocalBackend(model_file)
+        backend.warm_up("PREFIX ")
+        backend.generate("outro prompt", 10, 0.7, 0.9, prefix="PREFIX ")
+        list(backend.stream("PREFIX c", 10, 0.7, 0.9, prefix="PREFIX "))
+
+        llama = FakeLlama.instances[0]
+        assert llama.loaded_states == [("state", "PREFIX ")]
+        assert len(llama.calls) == 3
+
+    def test_generate_batch_groups_by_prefix(self, fake_llama_cpp, model_file):
+        """Test that a batch runs requests sharing a prefix together and keeps result order."""
+        backend = LocalBackend(model_file)
+        results = backend.generate_batch([
+            GenerationRequest("A 1", 10, 0.7, 0.9, prefix="A "),
+            GenerationRequest("B 1", 10, 0.7, 0.9, prefix="B "),
+            GenerationRequest("A 2", 10, 0.7, 0.9, prefix="A ")
+        ])
+
+        llama = FakeLlama.instances[0]
+        prompts = [messages[0]["content"] for messages, _ in llama.calls]
+        assert prompts == ["A ", "A 1", "A 2", "B ", "B 1"]
+        assert results == ['{"a": 1}'] * 3
+
+    def test_grouping_off_by_default(self, model_file):
+        """Test that generate() runs directly unless a batch size is configured."""
+        assert LocalBackend(model_file).batcher is None
+
+    def test_concurrent_generate_is_batched(self, fake_llama_cpp, model_file):
+        """Test that concurrent generate() calls are executed as one batch."""
+        backend = LocalBackend(model_file, max_batch_size=4, max_wait=0.2)
+        threads = [threading.Thread(target=backend.generate, args=("p", 10, 0.7, 0.9)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert backend.batcher.batches == 1
+        assert backend.batcher.items == 4
+
+    def test_backend_shared_per_process(self, model_file):
+        """Test that the same model path returns the same backend."""
+        assert get_local_backend(model_file) is get_local_backend(model_file)
+
+
+class TestModelClientLocal:
+    """Tests for ModelClient(use_local=True)."""
+
+    def test_generate_uses_local_model(self, fake_llama_cpp, model_file):
+        """Test that generate() returns the local model output."""
+        client = ModelClient(use_local=True, local_model_path=model_file + ".client")
+        with patch("core.model_client.get_local_backend", return_value=LocalBackend(model_file)):
+            assert json.loads(client.generate("prompt")) == {"a": 1}
+
+    def test_stream_uses_local_model(self, fake_llama_cpp, model_file):
+        """Test that generate_stream() streams from the local model."""
+        client = ModelClient(use_local=True, local_model_path=model_file)
+        with patch("core.model_client.get_local_backend", return_value=LocalBackend(model_file)):
+            assert "".join(client.generate_stream("prompt")) == '{"a": 1}'
+
+    def test_passes_static_prefix(self, fake_llama_cpp, model_file):
+        """Test that prompts from build_prompt() get their static prefix prefilled."""
+        client = ModelClient(use_local=True, local_model_path=model_file)
+        prefix, suffix = build_prompt_parts("texto")
+        with patch("core.model_client.get_local_backend", return_value=LocalBackend(model_file)):
+            client.generate(prefix + suffix)
+
+        first_prompt = FakeLlama.instances[0].calls[0][0][0]["content"]
+        assert first_prompt == prefix
+
+    def test_without_model_path_uses_fallback(self, monkeypatch):
+        """Test that an unconfigured local model degrades to the fallback."""
+        monkeypatch.delenv("LOCAL_MODEL_PATH", raising=False)
+        client = ModelClient(use_local=True)
+
+        result = client.enhance("TEXTO ORIGINAL PARA MELHORAR:\ntexto\nINSTRUÇÕES:")
+
+        assert result["_meta"]["cause"] == "local_unavailable"
+        assert "LOCAL_MODEL_PATH" in result["observacoes"]
@@ -0,0 +1,165 @@
+"""
+Tests for metrics module
+"""
+
+import asyncio
+import json
+import pytest
+import subprocess
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+from core.async_model_client import AsyncModelClient
+from core.cache import MemoryCache
+from core.metrics import Counter, Gauge, Histogram, metrics, timed
+from core.model_client import ModelClient
+from core.resilience import CircuitBreaker, RetryPolicy
+from core.service import FeedbackService
+
+
+TEXT = "O relatório atrasou dois dias e gerou retrabalho para o time."
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+class TestMetricTypes:
+    """Tests for Counter, Gauge and Histogram."""
+
+    def test_counter_render(self):
+        """Test counters render one sample per label set."""
+        counter = Counter("requests_total", "Requests.", ("cause",))
+        counter.inc("a")
+        counter.inc("a")
+        counter.inc('quote"d', amount=0.5)
+
+        lines = counter.render().splitlines()
+        assert lines[:2] == ["# HELP requests_total Requests.", "# TYPE requests_total counter"]
+        assert 'requests_total{cause="a"} 2' in lines
+        assert 'requests_total{cause="quote\\"d"} 0.5' in lines
+
+    def test_gauge_goes_down(self):
+        """Test gauges can be decremented and set."""
+        gauge = Gauge("in_flight", "In flight.", ("stage",))
+        gauge.inc("http")
+        gauge.dec("http")
+        assert gauge.value("http") == 0
+        gauge.set("http", value=3)
+        assert gauge.value("http") == 3
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count."""
+        histogram = Histogram("duration_seconds", "Duration.", ("stage",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, "http")
+
+        lines = histogram.render().splitlines()
+        assert 'duration_seconds_bucket{stage="http",le="0.1"} 2' in lines
+        assert 'duration_seconds_bucket{stage="http",le="1.0"} 3' in lines
+        assert 'duration_seconds_bucket{stage="http",le="+Inf"} 4' in lines
+        assert 'duration_seconds_sum{stage="http"} 2.65' in lines
+        assert histogram.count("http") == 4
+
+    def test_import_skips_http_server(self):
+        """Test http.server is only imported by serve_metrics()."""
+        code = "import sys, core.metrics; print('http.server' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "False"
+
+
+class TestMetrics:
+    """Tests for the Metrics hooks."""
+
+    def test_disabled_records_nothing(self):
+        """Test that hooks are no-ops while disabled."""
+        metrics.reset()
+        with metrics.stage("validate"), metrics.request("enhance"):
+            pass
+        metrics.observe_stage("first_token", 0.1)
+
+        assert metrics.stage("validate") is metrics.stage("http", in_flight=True)
+        assert metrics.stage_seconds.count("validate") == 0
+        assert metrics.request_seconds.count("enhance") == 0
+
+    def test_stage_and_request(self, enabled_metrics):
+        """Test stage durations and the in-flight gauge."""
+        with metrics.request("enhance"):
+            assert metrics.in_flight.value("request") == 1
+            with metrics.stage("http", in_flight=True):
+                assert metrics.in_flight.value("http") == 1
+
+        assert metrics.in_flight.value("request") == 0
+        assert metrics.in_flight.value("http") == 0
+        assert metrics.request_seconds.count("enhance") == 1
+        assert metrics.stage_seconds.count("http") == 1
+
+    def test_timed_decorator(self, enabled_metrics):
+        """Test that decorated calls are timed only while enabled."""
+        format_text = timed("format")(str.upper)
+        assert format_text("a") == "A"
+        metrics.disable()
+        format_text("b")
+        assert metrics.stage_seconds.count("format") == 1
+
+
+class TestInstrumentation:
+    """Tests for the hooks in the client and the service."""
+
+    @patch('requests.Session.post')
+    def test_fallback_counted_by_cause(self, mock_post, enabled_metrics):
+        """Test that a 503 answer counts as a model_loading fallback."""
+        mock_post.return_value = Mock(status_code=503, headers={}, json=Mock(return_value={}))
+        client = ModelClient(retry_policy=RetryPolicy(max_attempts=1))
+        client.enhance(f"Feedback original: {TEXT}")
+
+        assert metrics.fallbacks.value("model_loading") == 1
+        assert metrics.stage_seconds.count("http") == 1
+        assert metrics.stage_seconds.count("parse_response") == 1
+
+    @patch('requests.Session.post')
+    def test_tokens_and_cache_hits(self, mock_post, enabled_metrics, sample_response_data):
+        """Test token counters and cache hit/miss counters."""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = [{"generated_text": json.dumps(sample_response_data)}]
+        mock_post.return_value = mock_response
+        client = ModelClient(cache=MemoryCache())
+
+        client.enhance("prompt", cache_key="k")
+        client.enhance("prompt", cache_key="k")
+
+        assert metrics.tokens.value("in") > 0
+        assert metrics.tokens.value("out") > 0
+        assert metrics.cache_lookups.value("exact", "miss") == 1
+        assert metrics.cache_lookups.value("exact", "hit") == 1
+        assert metrics.stage_seconds.count("model") == 1
+
+    def test_service_stages(self, enabled_metrics, sample_response_data):
+        """Test that every pipeline stage of a request is timed."""
+        client = AsyncModelClient(cache=MemoryCache())
+        client.aenhance = AsyncMock(return_value=sample_response_data)
+        asyncio.run(FeedbackService(client).enhance(TEXT))
+
+        for stage in ("validate", "sanitize", "build_prompt", "cache_lookup"):
+            assert metrics.stage_seconds.count(stage) == 1
+        assert metrics.request_seconds.count("enhance") == 1
+        assert metrics.in_flight.value("request") == 0
+
+    def test_circuit_state_exported(self, enabled_metrics):
+        """Test that app.export_circuit tracks a breaker's state and transitions."""
+        from app import export_circuit
+
+        breaker = CircuitBreaker(min_calls=1, name="primary")
+        export_circuit(breaker)
+        assert metrics.circuit_state.value("primary", "closed") == 1
+
+        breaker.record_failure()
+
+        assert metrics.circuit_state.value("primary", "closed") == 0
+        assert metrics.circuit_state.value("primary", "open") == 1
+        assert metrics.circuit_transitions.value("primary", "closed", "open") == 1
+        assert 'feedbackcraft_circuit_state{circuit="primary",state="open"} 1' in metrics.render()
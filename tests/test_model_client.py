@@ -4,8 +4,14 @@ Tests for model client module
 
 import pytest
 import json
+import requests
 from unittest.mock import Mock, patch, MagicMock
 from core.model_client import ModelClient
+from core.cache import MemoryCache
+from core.resilience import CircuitBreaker, RetryPolicy
+from core.prompt_builder import build_prompt
+from core.semantic_cache import SemanticCache
+from core.token_budget import TokenBudget
 
 
 class TestModelClient:
@@ -70,7 +76,7 @@ class TestModelClient:
         assert isinstance(result, dict)
         assert "feedback_aprimorado" in result
 
-    @patch('core.model_client.requests.post')
+    @patch('requests.Session.post')
     def test_generate_api_success(self, mock_post):
         """Test successful API generation."""
         # Mock successful API response
@@ -86,7 +92,7 @@ class TestModelClient:
         assert len(result) > 0
         mock_post.assert_called_once()
 
-    @patch('core.model_client.requests.post')
+    @patch('requests.Session.post')
     def test_generate_api_error(self, mock_post):
         """Test API generation with error (should use fallback)."""
         # Mock API error
@@ -112,6 +118,38 @@ class TestModelClient:
         assert isinstance(parsed, dict)
         assert "feedback_aprimorado" in parsed
 
+    def test_generate_fallback_uses_fast_engine(self):
+        """Test that the fallback FIS is extracted from the feedback itself."""
+        client = ModelClient()
+        prompt = build_prompt("Ontem o relatório atrasou. Isso gerou retrabalho. Sugiro revisar o prazo.")
+
+        parsed = json.loads(client._generate_fallback(prompt, "http_error"))
+
+        assert parsed["fato_impacto_sugestao"]["fato"] == "Ontem o relatório atrasou."
+        assert parsed["fato_impacto_sugestao"]["sugestao"] == "Sugiro revisar o prazo."
+        assert parsed["_meta"] == {"fallback": True, "cause": "http_error"}
+
+    def test_max_new_tokens_follows_prompt(self):
+        """Test that the default response budget is sized from the feedback text."""
+        client = ModelClient(token_budget=TokenBudget(context_window=8192, counter=len))
+
+        short = client.max_new_tokens(build_prompt("Texto curto."))
+        long = client.max_new_tokens(build_prompt("Texto bem mais longo. " * 100))
+
+        assert short < long <= client.token_budget.max_new_tokens
+
+    @patch('requests.Session.post')
+    def test_generate_sends_dynamic_budget(self, mock_post):
+        """Test that generate() without max_length sends the computed budget."""
+        mock_post.return_value = Mock(status_code=200, json=lambda: [{"generated_text": "{}"}])
+        client = ModelClient(api_key="test-key")
+        prompt = build_prompt("Texto curto.")
+
+        client.generate(prompt)
+
+        sent = mock_post.call_args.kwargs["json"]["parameters"]["max_new_tokens"]
+        assert sent == client.max_new_tokens(prompt)
+
     def test_generate_fallback_no_original_text(self):
         """Test fallback generation without original text in prompt."""
         client = ModelClient()
@@ -123,3 +161,353 @@ class TestModelClient:
         parsed = json.loads(result)
         assert isinstance(parsed, dict)
         assert "feedback_aprimorado" in parsed
+
+
+class TestConnectionPool:
+    """Tests for pooled HTTP session lifecycle."""
+
+    def test_session_is_reused(self):
+        """Test that the same session serves every call."""
+        client = ModelClient()
+        assert client.session is client.session
+
+    def test_pool_configuration(self):
+        """Test that pool settings are applied to the mounted adapter."""
+        client = ModelClient(pool_connections=2, pool_maxsize=8, pool_block=True)
+        adapter = client.session.get_adapter(client.api_url)
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 8
+        assert adapter._pool_block is True
+
+    def test_keep_alive_disabled(self):
+        """Test that disabling keep-alive closes connections after each call."""
+        client = ModelClient(keep_alive=False)
+        assert client.session.headers["Connection"] == "close"
+
+    def test_close_releases_session(self):
+        """Test that close() drops the session and a new one is created on demand."""
+        client = ModelClient()
+        first = client.session
+        client.close()
+        assert client._session is None
+        assert client.session is not first
+
+    def test_context_manager_closes(self):
+        """Test that the context manager closes the session on exit."""
+        with patch('requests.Session.close') as mock_close:
+            with ModelClient() as client:
+                client.session
+        mock_close.assert_called_once()
+        assert client._session is None
+
+    @patch('requests.Session.post')
+    def test_generate_uses_timeout(self, mock_post):
+        """Test that the configured timeout is passed to the request."""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = [{"generated_text": "{}"}]
+        mock_post.return_value = mock_response
+
+        client = ModelClient(timeout=5)
+        client.generate("Test prompt")
+
+        assert mock_post.call_args.kwargs["timeout"] == 5
+
+
+class TestEnhanceCache:
+    """Tests for cached generation through enhance()."""
+
+    @patch('requests.Session.post')
+    def test_repeated_request_served_from_cache(self, mock_post, sample_response_data):
+        """Test that a repeated request does not hit the API again."""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = [{"generated_text": json.dumps(sample_response_data)}]
+        mock_post.return_value = mock_response
+
+        client = ModelClient(cache=MemoryCache())
+        key = client.cache_key("texto", "geral", "construtivo", "neutro")
+        first = client.enhance("prompt", cache_key=key)
+        second = client.enhance("prompt", cache_key=key)
+
+        assert first == second
+        assert first["feedback_aprimorado"] == sample_response_data["feedback_aprimorado"]
+        mock_post.assert_called_once()
+        assert client.cache.stats.hits == 1
+
+    @patch('requests.Session.post')
+    def test_use_cache_false_forces_fresh_sample(self, mock_post, sample_response_data):
+        """Test that callers can opt out of the cache."""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = [{"generated_text": json.dumps(sample_response_data)}]
+        mock_post.return_value = mock_response
+
+        client = ModelClient(cache=MemoryCache())
+        key = client.cache_key("texto", "geral", "construtivo", "neutro")
+        client.enhance("prompt", cache_key=key)
+        client.enhance("prompt", cache_key=key, use_cache=False)
+
+        assert mock_post.call_count == 2
+
+    @patch('requests.Session.post')
+    def test_fallback_not_cached(self, mock_post):
+        """Test that degraded fallback answers are not cached."""
+        mock_post.side_effect = Exception("API Error")
+
+        client = ModelClient(cache=MemoryCache())
+        key = client.cache_key("texto", "geral", "construtivo", "neutro")
+        result = client.enhance("prompt", cache_key=key)
+
+        assert result["_meta"]["fallback"] is True
+        assert result["_meta"]["cause"] == "connection_error"
+        assert len(client.cache) == 0
+
+    @patch('requests.Session.post')
+    def test_similar_draft_served_from_semantic_cache(self, mock_post, sample_response_data):
+        """Test that a reworded draft is served from the semantic cache."""
+        mock_response = Mock(status_code=200)
+        mock_response.json.return_value = [{"generated_text": json.dumps(sample_response_data)}]
+        mock_post.return_value = mock_response
+
+        client = ModelClient(cache=MemoryCache(), semantic_cache=SemanticCache())
+        first_text = "O relatório atrasou dois dias e gerou retrabalho para o time."
+        second_text = "Gerou retrabalho para o time: o relatório atrasou dois dias!"
+        for text in (first_text, second_text):
+            result = client.enhance(
+                build_prompt(text),
+                cache_key=client.cache_key(text, "geral", "construtivo", "neutro"),
+                semantic_key=client.semantic_key(text, "geral", "construtivo", "neutro")
+            )
+
+        mock_post.assert_called_once()
+        assert result["feedback_aprimorado"] == sample_response_data["feedback_aprimorado"]
+        assert result["_meta"]["similarity"] >= 0.9
+        assert client.semantic_key(first_text, "geral", "direto", "neutro") != \
+            client.semantic_key(first_text, "geral", "construtivo", "neutro")
+
+    def test_cache_key_includes_model(self):
+        """Test that different models never share cache entries."""
+        args = ("texto", "geral", "construtivo", "neutro")
+        assert ModelClient(model_name="a").cache_key(*args) != ModelClient(model_name="b").cache_key(*args)
+
+
+def _sse_response(lines, content_type="text/event-stream"):
+    """Mock a streaming response usable as a context manager."""
+    response = MagicMock(status_code=200)
+    response.headers = {"Content-Type": content_type}
+    response.iter_lines.return_value = iter(lines)
+    response.__enter__.return_value = response
+    return response
+
+
+class TestGenerateStream:
+    """Tests for streaming generation."""
+
+    def test_parse_sse_line(self):
+        """Test token extraction from server-sent event lines."""
+        assert ModelClient._parse_sse_line('data: {"token": {"text": "Olá"}}') == "Olá"
+        assert ModelClient._parse_sse_line('data:{"token": {"text": "</s>", "special": true}}') is None
+        assert ModelClient._parse_sse_line("") is None
+        assert ModelClient._parse_sse_line(": keep-alive") is None
+        with pytest.raises(ValueError):
+            ModelClient._parse_sse_line('data: {"error": "overloaded"}')
+
+    @patch('requests.Session.post')
+    def test_yields_tokens(self, mock_post):
+        """Test that tokens are yielded in order and the stream flag is sent."""
+        mock_post.return_value = _sse_response([
+            'data: {"token": {"text": "{\\"a\\""}}',
+            "",
+            'data: {"token": {"text": ": 1}"}}',
+            'data: {"token": {"text": "", "special": true}, "generated_text": "{\\"a\\": 1}"}'
+        ])
+
+        client = ModelClient()
+        tokens = list(client.generate_stream("prompt"))
+
+        assert tokens == ['{"a"', ': 1}']
+        assert mock_post.call_args.kwargs["json"]["stream"] is True
+        assert mock_post.call_args.kwargs["stream"] is True
+
+    @patch('requests.Session.post')
+    def test_non_streaming_endpoint(self, mock_post):
+        """Test that a plain JSON answer is yielded as a single chunk."""
+        response = _sse_response([], content_type="application/json")
+        response.json.return_value = [{"generated_text": "texto"}]
+        mock_post.return_value = response
+
+        assert list(ModelClient().generate_stream("prompt")) == ["texto"]
+
+    @patch('requests.Session.post')
+    def test_503_yields_fallback(self, mock_post):
+        """Test that a loading model yields the fallback with its note."""
+        response = _sse_response([])
+        response.status_code = 503
+        mock_post.return_value = response
+
+        chunks = list(ModelClient().generate_stream("prompt"))
+
+        assert len(chunks) == 1
+        assert "carregando" in json.loads(chunks[0])["observacoes"]
+
+    @patch('requests.Session.post')
+    def test_error_after_first_token_stops_stream(self, mock_post):
+        """Test that a mid-stream failure ends the stream without a fallback."""
+        def lines():
+            yield 'data: {"token": {"text": "parcial"}}'
+            raise ConnectionError("reset")
+
+        response = _sse_response([])
+        response.iter_lines.return_value = lines()
+        mock_post.return_value = response
+
+        assert list(ModelClient().generate_stream("prompt")) == ["parcial"]
+
+
+class TestParseTruncatedResponse:
+    """Tests for recovering truncated model output."""
+
+    def test_parse_truncated_response(self, sample_response_data):
+        """Test that a response cut at max_new_tokens keeps its complete fields."""
+        text = json.dumps(sample_response_data, ensure_ascii=False)
+        truncated = text[:text.index('"sugestoes_extras"') + 30]
+
+        result = ModelClient().parse_response(truncated)
+
+        assert result["feedback_aprimorado"] == sample_response_data["feedback_aprimorado"]
+        assert result["fato_impacto_sugestao"] == sample_response_data["fato_impacto_sugestao"]
+        assert result["_meta"]["truncated"] is True
+
+    def test_truncated_response_not_cached(self, sample_response_data):
+        """Test that salvaged partial answers are not cached."""
+        client = ModelClient(cache=MemoryCache())
+        client.cache_store("key", {"versao_curta": "x", "_meta": {"truncated": True}})
+        assert len(client.cache) == 0
+
+
+def _http_response(status_code, body=None, headers=None):
+    response = Mock(status_code=status_code)
+    response.headers = headers or {}
+    response.json.return_value = body
+    if status_code >= 400:
+        error = requests.exceptions.HTTPError(response=response)
+        response.raise_for_status.side_effect = error
+    return response
+
+
+@patch('core.model_client.time.sleep')
+class TestRetryPolicy:
+    """Tests for retries in _generate_api."""
+
+    @patch('requests.Session.post')
+    def test_transient_error_is_retried(self, mock_post, mock_sleep, sample_response_data):
+        """Test that a 429 is retried and the answer comes from the model."""
+        mock_post.side_effect = [
+            _http_response(429, {}, {"Retry-After": "2"}),
+            _http_response(200, [{"generated_text": json.dumps(sample_response_data)}])
+        ]
+
+        result = ModelClient().enhance("prompt")
+
+        assert result["feedback_aprimorado"] == sample_response_data["feedback_aprimorado"]
+        assert result["_meta"] == {"retries": 1}
+        mock_sleep.assert_called_once_with(2.0)
+
+    @patch('requests.Session.post')
+    def test_model_loading_waits_estimated_time(self, mock_post, mock_sleep):
+        """Test that a 503 honors Hugging Face's estimated_time."""
+        mock_post.side_effect = [
+            _http_response(503, {"error": "loading", "estimated_time": 4.0}),
+            _http_response(200, [{"generated_text": "{}"}])
+        ]
+
+        ModelClient().generate("prompt")
+
+        mock_sleep.assert_called_once_with(4.0)
+
+    @patch('requests.Session.post')
+    def test_fallback_when_hint_exceeds_budget(self, mock_post, mock_sleep):
+        """Test that waits longer than the deadline fall back immediately."""
+        mock_post.return_value = _http_response(503, {"estimated_time": 120.0})
+
+        client = ModelClient(retry_policy=RetryPolicy(deadline=30))
+        result = client.enhance("TEXTO ORIGINAL PARA MELHORAR:\ntexto\nINSTRUÇÕES:")
+
+        assert result["_meta"] == {"fallback": True, "cause": "model_loading", "retries": 0}
+        mock_sleep.assert_not_called()
+
+    @patch('requests.Session.post')
+    def test_connection_errors_exhaust_attempts(self, mock_post, mock_sleep):
+        """Test that connection errors fall back after max_attempts."""
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+
+        result = ModelClient(retry_policy=RetryPolicy(max_attempts=3)).enhance("prompt")
+
+        assert mock_post.call_count == 3
+        assert result["_meta"] == {"fallback": True, "cause": "connection_error", "retries": 2}
+
+    @patch('requests.Session.post')
+    def test_client_errors_not_retried(self, mock_post, mock_sleep):
+        """Test that non-retryable statuses fall back right away."""
+        mock_post.return_value = _http_response(401, {})
+
+        result = ModelClient().enhance("prompt")
+
+        mock_post.assert_called_once()
+        assert result["_meta"]["cause"] == "http_error"
+
+
+class TestCircuitBreaker:
+    """Tests for the circuit breaker in _generate_api."""
+
+    @patch('core.model_client.time.sleep')
+    @patch('requests.Session.post')
+    def test_open_circuit_skips_endpoint(self, mock_post, mock_sleep):
+        """Test that once the circuit opens, calls go straight to the fallback."""
+        mock_post.side_effect = requests.exceptions.ConnectionError("down")
+        client = ModelClient(
+            retry_policy=RetryPolicy(max_attempts=1),
+            circuit_breaker=CircuitBreaker(min_calls=3, cooldown=60)
+        )
+
+        for _ in range(3):
+            client.generate("prompt")
+        assert client.circuit_breaker.state == CircuitBreaker.OPEN
+
+        result = client.enhance("TEXTO ORIGINAL PARA MELHORAR:\ntexto\nINSTRUÇÕES:")
+
+        assert mock_post.call_count == 3
+        assert result["_meta"]["cause"] == "circuit_open"
+        assert "indisponível" in result["observacoes"]
+
+    @patch('requests.Session.post')
+    def test_client_errors_do_not_open_circuit(self, mock_post):
+        """Test that 4xx answers about the request count as a reachable endpoint."""
+        mock_post.return_value = _http_response(400, {})
+        client = ModelClient(circuit_breaker=CircuitBreaker(min_calls=2))
+
+        for _ in range(3):
+            client.generate("prompt")
+
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+    @patch('requests.Session.post')
+    def test_unauthorized_opens_circuit(self, mock_post):
+        """Test that an endpoint rejecting every call (401) opens the circuit."""
+        mock_post.return_value = _http_response(401, {})
+        client = ModelClient(circuit_breaker=CircuitBreaker(min_calls=2))
+
+        for _ in range(3):
+            client.generate("prompt")
+
+        assert client.circuit_breaker.state == CircuitBreaker.OPEN
+        assert mock_post.call_count == 2
+
+    @patch('requests.Session.post')
+    def test_open_circuit_skips_stream(self, mock_post):
+        """Test that streaming also short-circuits while open."""
+        breaker = CircuitBreaker(min_calls=1, cooldown=60)
+        breaker.record_failure()
+
+        chunks = list(ModelClient(circuit_breaker=breaker).generate_stream("prompt"))
+
+        mock_post.assert_not_called()
+        assert json.loads(chunks[0])["_meta"]["cause"] == "circuit_open"
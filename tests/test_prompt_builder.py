@@ -2,9 +2,20 @@
 Tests for prompt builder module
 """
 
+import os
 import pytest
 from pathlib import Path
-from core.prompt_builder import build_prompt, load_master_prompt
+from core.prompt_builder import (
+    PromptTemplate,
+    FALLBACK_MASTER_PROMPT,
+    build_budgeted_prompt,
+    build_prompt,
+    build_prompt_parts,
+    extract_feedback_text,
+    load_master_prompt,
+    truncate_to_tokens
+)
+from core.token_budget import PromptTooLongError, TokenBudget
 
 
 class TestLoadMasterPrompt:
@@ -96,3 +107,128 @@ class TestBuildPrompt:
             assert feedback_text in prompt
             assert isinstance(prompt, str)
             assert len(prompt) > len(feedback_text)
+
+
+class TestPromptTemplate:
+    """Tests for the compiled prompt template."""
+
+    def test_master_prompt_read_once(self, tmp_path, monkeypatch):
+        """Test that repeated builds do not re-read an unchanged file."""
+        path = tmp_path / "master.txt"
+        path.write_text("MASTER", encoding="utf-8")
+        template = PromptTemplate(path, check_interval=0)
+
+        reads = []
+        monkeypatch.setattr("core.prompt_builder._read_master_prompt", lambda p: reads.append(p) or "X")
+        for _ in range(5):
+            assert template.build("texto").startswith("MASTER")
+        assert reads == []
+
+    def test_reloads_on_mtime_change(self, tmp_path):
+        """Test that editing the file invalidates the compiled template."""
+        path = tmp_path / "master.txt"
+        path.write_text("VERSAO 1", encoding="utf-8")
+        template = PromptTemplate(path, check_interval=0)
+        assert template.build("texto").startswith("VERSAO 1")
+
+        path.write_text("VERSAO 2", encoding="utf-8")
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        assert template.build("texto").startswith("VERSAO 2")
+        assert template.master_prompt == "VERSAO 2"
+
+    def test_missing_file_uses_fallback(self, tmp_path):
+        """Test that a missing master prompt falls back to the built-in one."""
+        template = PromptTemplate(tmp_path / "missing.txt")
+        assert template.master_prompt == FALLBACK_MASTER_PROMPT
+
+    def test_unknown_labels_use_defaults(self):
+        """Test that unknown options map to the default English labels."""
+        prompt = build_prompt("texto", feedback_type="x", tone="y", formality="z")
+        assert "Tipo de feedback: general" in prompt
+        assert "Tom desejado: constructive\n" in prompt
+        assert "Nível de formalidade: neutral" in prompt
+
+    def test_text_at_the_end(self):
+        """Test that the user text follows the context, before the closing line."""
+        prompt = build_prompt("MEU TEXTO")
+        assert "TEXTO ORIGINAL PARA MELHORAR:\nMEU TEXTO\n\nResponda APENAS" in prompt
+        assert prompt.index("INSTRUÇÕES:") < prompt.index("CONTEXTO:")
+
+
+class TestPromptParts:
+    """Tests for the static prefix / dynamic suffix split."""
+
+    def test_parts_concatenate_to_prompt(self):
+        """Test that prefix + suffix is exactly the built prompt."""
+        prefix, suffix = build_prompt_parts("texto", "técnico", "direto", "formal")
+        assert prefix + suffix == build_prompt("texto", "técnico", "direto", "formal")
+
+    def test_prefix_shared_by_all_requests(self):
+        """Test that the prefix holds the master prompt and JSON format for any options."""
+        prefix, _ = build_prompt_parts("a", "geral", "construtivo", "neutro")
+        other_prefix, other_suffix = build_prompt_parts("b", "liderança", "direto", "casual")
+
+        assert prefix == other_prefix
+        assert prefix.startswith(load_master_prompt())
+        assert "FORMATO DE RESPOSTA (JSON)" in prefix
+        assert "CONTEXTO:" not in prefix
+        assert "Tom desejado: direct" in other_suffix
+
+    def test_extract_feedback_text(self):
+        """Test that the user text can be recovered from a built prompt."""
+        assert extract_feedback_text(build_prompt("linha 1\nlinha 2")) == "linha 1\nlinha 2"
+        assert extract_feedback_text("TEXTO ORIGINAL PARA MELHORAR:\nantigo\nINSTRUÇÕES:") == "antigo"
+        assert extract_feedback_text("sem marcador") is None
+
+
+class TestBudgetedPrompt:
+    """Tests for token-budgeted prompts."""
+
+    def test_budget_follows_input_size(self):
+        """Test that longer drafts get a larger response budget."""
+        short = build_budgeted_prompt("Precisa melhorar a comunicação.")
+        long = build_budgeted_prompt("Precisa melhorar a comunicação. " * 50)
+
+        assert short.prompt == build_prompt("Precisa melhorar a comunicação.")
+        assert short.prompt_tokens < long.prompt_tokens
+        assert short.max_new_tokens < long.max_new_tokens
+        assert not short.truncated
+
+    def test_reject_overflow(self):
+        """Test that a prompt beyond the context window is rejected."""
+        budget = TokenBudget(context_window=1500)
+        with pytest.raises(PromptTooLongError):
+            build_budgeted_prompt("Precisa melhorar a comunicação. " * 200, budget=budget)
+
+    def test_truncate_overflow(self):
+        """Test that truncation cuts the draft at a sentence to fit."""
+        budget = TokenBudget(context_window=1500)
+        result = build_budgeted_prompt(
+            "Precisa melhorar a comunicação. " * 200, budget=budget, on_overflow="truncate"
+        )
+
+        assert result.truncated
+        assert result.feedback_text.endswith("comunicação.")
+        assert extract_feedback_text(result.prompt) == result.feedback_text
+        assert result.prompt_tokens + result.max_new_tokens <= 1500
+
+    def test_compress_overflow(self):
+        """Test that compression removes repetition before anything is cut."""
+        budget = TokenBudget(context_window=1800)
+        text = "Ontem o relatório atrasou. " * 150 + "Sugiro revisar o prazo."
+        result = build_budgeted_prompt(text, budget=budget, on_overflow="compress")
+
+        assert result.truncated
+        assert result.feedback_text == "Ontem o relatório atrasou. Sugiro revisar o prazo."
+
+    def test_unknown_overflow_policy(self):
+        """Test that an unknown overflow policy is refused."""
+        with pytest.raises(ValueError):
+            build_budgeted_prompt("Texto de feedback", on_overflow="ignore")
+
+    def test_truncate_to_tokens(self):
+        """Test cutting at word boundaries when there is no sentence end."""
+        assert truncate_to_tokens("um dois tres quatro", 10, len) == "um dois"
+        assert truncate_to_tokens("curto", 10, len) == "curto"
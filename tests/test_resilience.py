@@ -0,0 +1,138 @@
+"""
+Tests for resilience module
+"""
+
+import pytest
+from email.utils import formatdate
+from unittest.mock import patch
+from core.resilience import CircuitBreaker, RetryPolicy, retry_hint
+
+
+class TestRetryPolicy:
+    """Tests for RetryPolicy."""
+
+    def test_exponential_backoff_without_jitter(self):
+        """Test that backoff doubles up to max_delay."""
+        policy = RetryPolicy(base_delay=1, max_delay=5, jitter=False)
+        assert [policy.backoff(i) for i in range(4)] == [1, 2, 4, 5]
+
+    def test_jitter_stays_within_bounds(self):
+        """Test that jittered backoff never exceeds the exponential value."""
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for retry in range(5):
+            assert 0 <= policy.backoff(retry) <= min(5, 2 ** retry)
+
+    def test_hint_overrides_backoff(self):
+        """Test that a server hint replaces the computed backoff."""
+        policy = RetryPolicy(jitter=False)
+        assert policy.next_delay(0, 7.5) == 7.5
+        assert policy.next_delay(0, None) == policy.base_delay
+
+    def test_should_retry_respects_attempts_and_budget(self):
+        """Test that retries stop at max_attempts or when the wait exceeds the budget."""
+        policy = RetryPolicy(max_attempts=3)
+        assert policy.should_retry(0, 1.0, 10.0)
+        assert not policy.should_retry(2, 1.0, 10.0)
+        assert not policy.should_retry(0, 11.0, 10.0)
+
+
+class TestRetryHint:
+    """Tests for retry_hint."""
+
+    def test_retry_after_seconds(self):
+        """Test Retry-After given in seconds."""
+        assert retry_hint({"Retry-After": "3"}) == 3.0
+
+    def test_retry_after_http_date(self):
+        """Test Retry-After given as an HTTP date."""
+        with patch("core.resilience.time.time", return_value=1000.0):
+            assert retry_hint({"Retry-After": formatdate(1010.0, usegmt=True)}) == pytest.approx(10.0)
+
+    def test_estimated_time(self):
+        """Test Hugging Face estimated_time while the model loads."""
+        assert retry_hint({}, {"error": "loading", "estimated_time": 12.5}) == 12.5
+
+    def test_no_hint(self):
+        """Test that responses without hints return None."""
+        assert retry_hint({}, None) is None
+        assert retry_hint({"Retry-After": "soon"}, ["x"]) is None
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker."""
+
+    def _open(self, breaker):
+        for _ in range(breaker.min_calls):
+            breaker.record_failure()
+
+    def test_opens_at_failure_rate(self):
+        """Test that the circuit opens once the window failure rate reaches the threshold."""
+        breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4)
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_min_calls_required(self):
+        """Test that few failures do not open the circuit."""
+        breaker = CircuitBreaker(min_calls=5)
+        for _ in range(4):
+            breaker.record_failure()
+        assert breaker.allow_request()
+
+    def test_open_rejects_requests(self):
+        """Test that an open circuit rejects and counts calls."""
+        breaker = CircuitBreaker(cooldown=60)
+        self._open(breaker)
+
+        assert not breaker.allow_request()
+        assert breaker.stats()["rejected"] == 1
+        assert breaker.stats()["opened"] == 1
+
+    def test_half_open_after_cooldown(self):
+        """Test the open -> half-open -> closed recovery path."""
+        breaker = CircuitBreaker(cooldown=10, half_open_max_calls=1)
+        with patch("core.resilience.time.monotonic", return_value=100.0):
+            self._open(breaker)
+        with patch("core.resilience.time.monotonic", return_value=111.0):
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.allow_request()
+            assert not breaker.allow_request()
+            breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.stats()["window_calls"] == 0
+
+    def test_half_open_failure_reopens(self):
+        """Test that a failed probe opens the circuit again."""
+        breaker = CircuitBreaker(cooldown=10)
+        with patch("core.resilience.time.monotonic", return_value=100.0):
+            self._open(breaker)
+        with patch("core.resilience.time.monotonic", return_value=111.0):
+            assert breaker.allow_request()
+            breaker.record_failure()
+            assert breaker.state == CircuitBreaker.OPEN
+
+    def test_release_frees_probe_slot(self):
+        """Test that a probe abandoned without an outcome lets the next call probe."""
+        breaker = CircuitBreaker(cooldown=10)
+        with patch("core.resilience.time.monotonic", return_value=100.0):
+            self._open(breaker)
+        with patch("core.resilience.time.monotonic", return_value=111.0):
+            assert breaker.allow_request()
+            breaker.release()
+            assert breaker.allow_request()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_listeners_and_logs(self, caplog):
+        """Test that transitions are logged and reported to listeners."""
+        breaker = CircuitBreaker()
+        transitions = []
+        breaker.add_listener(lambda old, new: transitions.append((old, new)))
+
+        with caplog.at_level("WARNING", logger="core.resilience"):
+            self._open(breaker)
+
+        assert transitions == [("closed", "open")]
+        assert "closed -> open" in caplog.text
@@ -0,0 +1,278 @@
+"""
+Tests for multi-backend routing
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import Mock
+from core.model_client import ModelClient
+from core.resilience import CircuitBreaker
+from core.router import (
+    BackendStats,
+    RouteTarget,
+    Router,
+    _is_fallback,
+    _parse_backends,
+    build_router,
+    router_from_env
+)
+
+
+FALLBACK = json.dumps({"feedback_aprimorado": "x", "_meta": {"fallback": True, "cause": "http_error"}})
+
+
+def _http_error(status_code):
+    import requests
+
+    return requests.exceptions.HTTPError(response=Mock(status_code=status_code))
+
+
+class FakeClient:
+    """Backend client answering after a fixed delay."""
+
+    def __init__(self, text="ok", delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+        self.budgets = []
+        self.timeout = 60
+        self.circuit_breaker = CircuitBreaker()
+
+    def _generate_with_meta(self, prompt, max_length, temperature, top_p, budget=None):
+        self.calls += 1
+        self.budgets.append(budget)
+        time.sleep(self.delay)
+        return self.text, {"retries": 0}
+
+    async def _agenerate_with_meta(self, prompt, max_length, temperature, top_p, budget=None):
+        self.calls += 1
+        self.budgets.append(budget)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self.text, {"retries": 0}
+
+    def close(self):
+        pass
+
+
+def _target(name, client, latencies=()):
+    target = RouteTarget(name, client)
+    for latency in latencies:
+        target.stats.begin()
+        target.stats.end(latency, True)
+    return target
+
+
+class TestBackendStats:
+    """Tests for BackendStats."""
+
+    def test_ewma_and_quantile(self):
+        """Test that latency and error rate are exponentially averaged."""
+        stats = BackendStats(alpha=0.5)
+        for latency, ok in ((1.0, True), (3.0, True), (9.0, False)):
+            stats.begin()
+            stats.end(latency, ok)
+
+        assert stats.latency == pytest.approx(2.0)
+        assert stats.error_rate == pytest.approx(0.5)
+        assert stats.quantile(0.95) == 3.0
+        assert stats.quantile(0.95, min_samples=5) is None
+        assert stats.in_flight == 0
+
+
+class TestRouter:
+    """Tests for Router."""
+
+    def test_routes_to_fastest_healthy_backend(self):
+        """Test that the lowest EWMA latency wins and open circuits are skipped."""
+        slow = _target("slow", FakeClient(), [0.5])
+        fast = _target("fast", FakeClient(), [0.1])
+        router = Router([slow, fast])
+        assert router.choose().name == "fast"
+
+        for _ in range(5):
+            fast.client.circuit_breaker.record_failure()
+        assert router.choose().name == "slow"
+
+    def test_fails_over_on_fallback(self):
+        """Test that a fallback answer makes the router try the next backend."""
+        broken = _target("broken", FakeClient(FALLBACK), [0.1])
+        good = _target("good", FakeClient("resposta"), [0.2])
+        router = Router([broken, good])
+
+        text, meta = router.generate_with_meta("p", 10, 0.7, 0.9)
+
+        assert text == "resposta"
+        assert meta["backend"] == "good"
+        assert broken.stats.failures == 1
+
+    def test_failing_backend_loses_traffic(self):
+        """Test that a backend answering only fallbacks stops being picked first."""
+        broken = _target("broken", FakeClient(FALLBACK))
+        good = _target("good", FakeClient("resposta"))
+        router = Router([broken, good])
+
+        for _ in range(20):
+            router.generate_with_meta("p", 10, 0.7, 0.9)
+
+        assert broken.client.calls == 1
+        assert good.client.calls == 20
+
+    def test_unauthorized_backend_loses_traffic(self, sample_response_data):
+        """Test that traffic moves away from a backend answering 401 to every call."""
+        from unittest.mock import patch
+
+        def post(url, **kwargs):
+            if "denied" in url:
+                return Mock(status_code=401, raise_for_status=Mock(side_effect=_http_error(401)))
+            generated = [{"generated_text": json.dumps(sample_response_data)}]
+            return Mock(status_code=200, json=Mock(return_value=generated))
+
+        denied = RouteTarget("denied", ModelClient(api_url="http://denied.test/",
+                                                   circuit_breaker=CircuitBreaker(min_calls=2)))
+        good = RouteTarget("good", ModelClient(api_url="http://good.test/"))
+        router = Router([denied, good])
+
+        with patch("requests.Session.post", side_effect=post) as mock_post:
+            backends = [router.generate_with_meta("p", 10, 0.7, 0.9)[1]["backend"] for _ in range(20)]
+
+        assert backends == ["good"] * 20
+        assert sum("denied" in call.args[0] for call in mock_post.call_args_list) == 1
+        assert denied.client.circuit_breaker.stats()["window_failures"] == 1
+
+    def test_failover_shares_one_deadline(self):
+        """Test that backends tried in turn only get what is left of the deadline."""
+        first = _target("first", FakeClient(FALLBACK, delay=0.2), [0.01])
+        second = _target("second", FakeClient(FALLBACK, delay=0.2), [0.02])
+        third = _target("third", FakeClient("resposta"), [0.03])
+        router = Router([first, second, third], deadline=0.3)
+
+        text, meta = router.generate_with_meta("p", 10, 0.7, 0.9)
+
+        assert _is_fallback(text)
+        assert first.client.budgets == [pytest.approx(0.3, abs=0.01)]
+        assert 0 < second.client.budgets[0] < 0.15
+        assert third.client.calls == 0
+
+    def test_hedges_slow_primary(self):
+        """Test that a duplicate goes to the next backend once the primary passes its p95."""
+        primary = _target("primary", FakeClient("lento", delay=0.5), [0.01] * 20)
+        backup = _target("backup", FakeClient("rapido"), [0.02] * 20)
+        router = Router([primary, backup], hedge=True)
+
+        start = time.perf_counter()
+        text, meta = router.generate_with_meta("p", 10, 0.7, 0.9)
+
+        assert text == "rapido"
+        assert meta == {"retries": 0, "backend": "backup", "hedged": True}
+        assert time.perf_counter() - start < 0.4
+        router.close()
+
+    def test_async_hedge_cancels_loser(self):
+        """Test that the slower async call is cancelled once the hedge answers."""
+        primary = _target("primary", FakeClient("lento", delay=5), [0.01] * 20)
+        backup = _target("backup", FakeClient("rapido"), [0.02] * 20)
+        router = Router([primary, backup], hedge=True)
+
+        text, meta = asyncio.run(router.agenerate_with_meta("p", 10, 0.7, 0.9))
+
+        assert text == "rapido"
+        assert meta["hedged"] is True
+        assert primary.client.cancelled
+        assert primary.stats.in_flight == 0
+
+    def test_cancelled_hedge_releases_half_open_probe(self, sample_response_data):
+        """Test that cancelling a half-open backend's hedged call leaves its breaker probing."""
+        import httpx
+        from unittest.mock import patch
+        from core.async_model_client import AsyncModelClient
+
+        generated = json.dumps(sample_response_data)
+        breaker = CircuitBreaker(min_calls=1, cooldown=0)
+        breaker.record_failure()
+        slow = AsyncModelClient(api_url="http://slow.test/", circuit_breaker=breaker)
+        fast = AsyncModelClient(api_url="http://fast.test/")
+        primary = _target("primary", slow, [0.01] * 20)
+        backup = _target("backup", fast, [0.02] * 20)
+        router = Router([primary, backup], hedge=True)
+
+        async def post(self, url, **kwargs):
+            if "slow" in url:
+                await asyncio.sleep(5)
+            request = httpx.Request("POST", url)
+            return httpx.Response(200, json=[{"generated_text": generated}], request=request)
+
+        with patch.object(httpx.AsyncClient, "post", new=post):
+            text, meta = asyncio.run(router.agenerate_with_meta("p", 10, 0.7, 0.9))
+
+        assert meta["backend"] == "backup"
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert primary.healthy
+
+    def test_client_uses_router(self):
+        """Test that ModelClient delegates generation to its router."""
+        router = Router([_target("only", FakeClient('{"feedback_aprimorado": "ok"}'))])
+        client = ModelClient(router=router)
+
+        result = client.enhance("prompt")
+
+        assert result["feedback_aprimorado"] == "ok"
+        assert result["_meta"]["backend"] == "only"
+
+
+class TestRouterConfig:
+    """Tests for router configuration."""
+
+    def test_parse_backends_env(self):
+        """Test the inline ROUTER_BACKENDS format."""
+        assert _parse_backends("hf=https://a/models/x, tgi=http://tgi:8080/|TGI_TOKEN,cpu=local:m.gguf") == [
+            {"name": "hf", "url": "https://a/models/x"},
+            {"name": "tgi", "url": "http://tgi:8080/", "api_key_env": "TGI_TOKEN"},
+            {"name": "cpu", "local": True, "model_path": "m.gguf"}
+        ]
+
+    def test_build_router(self, monkeypatch):
+        """Test that each backend gets its own client, breaker and API key."""
+        monkeypatch.setenv("HF_API_KEY", "hf-secret")
+        router = build_router(
+            {"hedge": True, "backends": [
+                {"name": "hf", "api_key_env": "HF_API_KEY"},
+                {"name": "tgi", "url": "http://tgi:8080/"},
+                {"name": "cpu", "local": True, "model_path": "m.gguf"}
+            ]},
+            ModelClient,
+            timeout=5
+        )
+
+        hf, tgi, cpu = (t.client for t in router.targets)
+        assert router.hedge is True
+        assert hf.api_key == "hf-secret"
+        assert tgi.api_url == "http://tgi:8080/"
+        assert tgi.api_key == ""
+        assert cpu.use_local and cpu.local_model_path == "m.gguf"
+        assert hf.circuit_breaker is not tgi.circuit_breaker
+
+    def test_inline_backends_get_api_keys(self, monkeypatch):
+        """Test that Hugging Face URLs default to HF_API_KEY and "|VAR" names another key."""
+        monkeypatch.setenv("HF_API_KEY", "hf-secret")
+        monkeypatch.setenv("TGI_TOKEN", "tgi-secret")
+        monkeypatch.setenv("ROUTER_BACKENDS", (
+            "hf=https://api-inference.huggingface.co/models/x,"
+            "tgi=http://tgi:8080/|TGI_TOKEN,other=http://other:8080/"
+        ))
+        monkeypatch.setenv("ROUTER_DEADLINE", "20")
+
+        router = router_from_env(ModelClient)
+
+        hf, tgi, other = (t.client for t in router.targets)
+        assert hf.api_key == "hf-secret"
+        assert tgi.api_key == "tgi-secret"
+        assert other.api_key == ""
+        assert router.deadline == 20
@@ -0,0 +1,109 @@
+"""
+Tests for the micro-batching scheduler
+"""
+
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from core.scheduler import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Tests for MicroBatcher."""
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test that requests arriving together are run as one batch."""
+        batches = []
+        release = threading.Event()
+
+        def run_batch(items):
+            batches.append(list(items))
+            release.wait(1)
+            return enumerate(item * 2 for item in items)
+
+        batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait=0.2)
+        futures = [batcher.submit(i) for i in range(5)]
+        release.set()
+
+        assert [f.result(timeout=1) for f in futures] == [0, 2, 4, 6, 8]
+        assert batches == [[0, 1, 2, 3, 4]]
+        batcher.close()
+
+    def test_max_batch_size(self):
+        """Test that a batch never exceeds max_batch_size."""
+        sizes = []
+        batcher = MicroBatcher(
+            lambda items: sizes.append(len(items)) or enumerate(items), max_batch_size=3, max_wait=0.05
+        )
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            results = list(pool.map(batcher.run, range(10)))
+
+        assert results == list(range(10))
+        assert max(sizes) <= 3
+        assert sum(sizes) == 10
+        batcher.close()
+
+    def test_per_item_exception(self):
+        """Test that an exception returned for one item only fails that caller."""
+        batcher = MicroBatcher(
+            lambda items: enumerate(ValueError("ruim") if item == "x" else item for item in items),
+            max_wait=0.05
+        )
+        ok, bad = batcher.submit("a"), batcher.submit("x")
+
+        assert ok.result(timeout=1) == "a"
+        with pytest.raises(ValueError):
+            bad.result(timeout=1)
+        batcher.close()
+
+    def test_results_delivered_as_items_complete(self):
+        """Test that a caller gets its result before the rest of its batch has run."""
+        release = threading.Event()
+
+        def run_batch(items):
+            yield 0, items[0]
+            release.wait(1)
+            yield 1, items[1]
+
+        batcher = MicroBatcher(run_batch, max_wait=0.05)
+        first, second = batcher.submit("a"), batcher.submit("b")
+
+        assert first.result(timeout=0.5) == "a"
+        assert not second.done()
+        release.set()
+        assert second.result(timeout=1) == "b"
+        batcher.close()
+
+    def test_missing_result_fails_the_rest(self):
+        """Test that callers left without a result get an error instead of waiting forever."""
+        batcher = MicroBatcher(lambda items: [(0, items[0])], max_wait=0.05)
+        first, second = batcher.submit("a"), batcher.submit("b")
+
+        assert first.result(timeout=1) == "a"
+        with pytest.raises(RuntimeError):
+            second.result(timeout=1)
+        batcher.close()
+
+    def test_batch_failure_fails_every_caller(self):
+        """Test that an exception from run_batch is delivered to the whole batch."""
+        def run_batch(items):
+            raise RuntimeError("falhou")
+
+        batcher = MicroBatcher(run_batch, max_wait=0.05)
+        futures = [batcher.submit(i) for i in range(3)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=1)
+        batcher.close()
+
+    def test_close_rejects_new_requests(self):
+        """Test that a closed batcher drains its queue and refuses new work."""
+        batcher = MicroBatcher(lambda items: enumerate(items), max_wait=0)
+        assert batcher.run(1) == 1
+        batcher.close()
+
+        assert batcher.mean_batch_size == 1.0
+        with pytest.raises(RuntimeError):
+            batcher.submit(2)
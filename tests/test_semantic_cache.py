@@ -0,0 +1,140 @@
+"""
+Tests for semantic cache module
+"""
+
+import pytest
+from core.semantic_cache import (
+    HashingEmbedder,
+    SemanticCache,
+    SemanticKey,
+    create_semantic_cache,
+    guard_terms
+)
+
+
+OPTIONS = ("geral", "construtivo", "neutro", "model", 0.7, 0.9)
+DRAFT = "O relatório atrasou dois dias e gerou retrabalho para o time."
+REWORDED = "Gerou retrabalho para o time: o relatório atrasou dois dias!"
+UNRELATED = "Precisa melhorar a pontualidade nas reuniões de status."
+
+
+def _key(text, options=OPTIONS):
+    return SemanticKey(text, options)
+
+
+class TestHashingEmbedder:
+    """Tests for the dependency-free embedder."""
+
+    def test_unit_vectors_and_similarity(self):
+        """Test that reworded drafts are closer than unrelated ones."""
+        embed = HashingEmbedder()
+        draft, reworded, unrelated = embed(DRAFT), embed(REWORDED), embed(UNRELATED)
+        assert float(draft @ draft) == pytest.approx(1.0)
+        assert float(draft @ reworded) > 0.9
+        assert float(draft @ unrelated) < 0.5
+
+
+class TestSemanticCache:
+    """Tests for SemanticCache."""
+
+    @pytest.mark.parametrize("index", ["numpy", "auto"])
+    def test_similar_draft_hits(self, index):
+        """Test that a similar draft with the same options is served."""
+        cache = SemanticCache(index=index)
+        cache.set(_key(DRAFT), {"versao_curta": "x"})
+
+        hit = cache.get(_key(REWORDED))
+        assert hit["versao_curta"] == "x"
+        assert hit["_meta"]["similarity"] >= cache.threshold
+        assert cache.get(_key(UNRELATED)) is None
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_filtered_by_options_and_guard_terms(self):
+        """Test that other options, negations or numbers never match."""
+        cache = SemanticCache()
+        cache.set(_key("Você nunca entrega os relatórios no prazo."), {"versao_curta": "x"})
+
+        assert cache.get(_key("Você nunca entrega os relatórios no prazo!")) is not None
+        assert cache.get(_key("Você sempre entrega os relatórios no prazo.")) is None
+        assert cache.get(_key("Você nunca entrega os relatórios no prazo.", ("geral", "direto") + OPTIONS[2:])) is None
+        assert guard_terms("Atrasou 2 dias, não 3.") == ("2", "3", "não")
+
+    def test_names_never_match(self):
+        """Test that a draft about someone else is not served another person's enhancement."""
+        draft = ("O João atrasou a entrega do relatório mensal de vendas duas vezes "
+                 "e isso gerou retrabalho para toda a equipe comercial.")
+        swapped = draft.replace("O João", "A Maria")
+        embed = HashingEmbedder()
+        assert float(embed(draft) @ embed(swapped)) >= SemanticCache().threshold
+
+        cache = SemanticCache()
+        cache.set(_key(draft), {"versao_curta": "João, ..."})
+
+        assert cache.get(_key(swapped)) is None
+        assert cache.get(_key(draft.replace("O João", "o João"))) is not None
+        assert guard_terms("Ontem o João falou com a Maria. Depois saiu.") == ("joão", "maria")
+
+    def test_near_duplicate_replaces_entry(self):
+        """Test that storing a similar draft updates the existing entry."""
+        cache = SemanticCache()
+        cache.set(_key(DRAFT), {"versao_curta": "old"})
+        cache.set(_key(REWORDED), {"versao_curta": "new"})
+        assert len(cache) == 1
+        assert cache.get(_key(DRAFT))["versao_curta"] == "new"
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = SemanticCache(max_entries=2)
+        texts = [DRAFT, UNRELATED, "Ótimo trabalho na apresentação de ontem, continue assim."]
+        cache.set(_key(texts[0]), {"n": 0})
+        cache.set(_key(texts[1]), {"n": 1})
+        cache.get(_key(texts[0]))
+        cache.set(_key(texts[2]), {"n": 2})
+
+        assert cache.get(_key(texts[1])) is None
+        assert cache.get(_key(texts[0]))["n"] == 0
+        assert cache.get(_key(texts[2]))["n"] == 2
+        assert cache.stats.evictions == 1
+
+    def test_persistence(self, tmp_path):
+        """Test that entries survive a restart and other embedders' files are ignored."""
+        path = str(tmp_path / "semantic.npz")
+        cache = SemanticCache(path=path)
+        cache.set(_key(DRAFT), {"versao_curta": "x"})
+        cache.save()
+
+        restored = SemanticCache(path=path)
+        assert len(restored) == 1
+        assert restored.get(_key(REWORDED))["versao_curta"] == "x"
+        assert len(SemanticCache(embedder=HashingEmbedder(dim=256), path=path)) == 0
+
+    def test_autosave(self, tmp_path):
+        """Test that the cache is saved every save_every stores."""
+        path = tmp_path / "semantic.npz"
+        cache = SemanticCache(path=str(path), save_every=2)
+        cache.set(_key(DRAFT), {})
+        assert not path.exists()
+        cache.set(_key(UNRELATED), {})
+        assert path.exists()
+
+
+class TestCreateSemanticCache:
+    """Tests for the semantic cache factory."""
+
+    def test_off(self):
+        """Test that the cache is disabled by default."""
+        assert create_semantic_cache() is None
+        assert create_semantic_cache("off") is None
+
+    def test_hashing(self):
+        """Test creating a cache with the hashing embedder."""
+        cache = create_semantic_cache("hashing", threshold=0.95, max_entries=10)
+        assert isinstance(cache.embedder, HashingEmbedder)
+        assert cache.threshold == 0.95
+        assert cache.max_entries == 10
+
+    def test_unknown_index(self):
+        """Test that an unknown index type is rejected."""
+        with pytest.raises(ValueError):
+            SemanticCache(index="faiss")
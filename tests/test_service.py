@@ -0,0 +1,111 @@
+"""
+Tests for service module
+"""
+
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from core.admission import AdmissionController, RateLimitedError, ServiceBusyError, create_rate_limiter
+from core.async_model_client import AsyncModelClient
+from core.cache import MemoryCache
+from core.semantic_cache import HashingEmbedder, SemanticCache
+from core.service import FeedbackService, InvalidFeedbackError
+
+
+TEXT = "O relatório atrasou dois dias e gerou retrabalho para o time."
+
+
+def _service(response_data, **kwargs):
+    client = AsyncModelClient(cache=MemoryCache())
+    client.aenhance = AsyncMock(return_value=response_data)
+    return FeedbackService(client, **kwargs)
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestEnhance:
+    """Tests for FeedbackService.enhance."""
+
+    def test_returns_parsed_response(self, sample_response_data):
+        """Test that the parsed response dict is returned as is."""
+        service = _service(sample_response_data)
+        assert asyncio.run(service.enhance(TEXT)) == sample_response_data
+        prompt = service.client.aenhance.call_args.args[0]
+        assert TEXT in prompt
+
+    def test_invalid_input(self, sample_response_data):
+        """Test that invalid input raises with structured errors."""
+        service = _service(sample_response_data)
+        with pytest.raises(InvalidFeedbackError) as exc_info:
+            asyncio.run(service.enhance("curto", tone="rude"))
+        assert [e.code for e in exc_info.value.errors] == ["too_short", "invalid_choice"]
+        assert "10 caracteres" in str(exc_info.value)
+        service.client.aenhance.assert_not_called()
+
+    def test_cache_hit_needs_no_slot(self, sample_response_data):
+        """Test that cached answers are served even when no model slot is free."""
+        service = _service(sample_response_data, admission=AdmissionController(max_concurrent=0, max_waiting=0))
+        key = service.client.cache_key(TEXT, "geral", "construtivo", "neutro")
+        service.client.cache.set(key, sample_response_data)
+
+        assert asyncio.run(service.enhance(TEXT)) == sample_response_data
+        with pytest.raises(ServiceBusyError):
+            asyncio.run(service.enhance(TEXT + " De novo."))
+
+    def test_semantic_miss_embeds_once_off_the_loop(self, sample_response_data):
+        """Test that a semantic cache miss embeds the draft once, on a worker thread."""
+        import threading
+
+        threads = []
+        embedder = HashingEmbedder()
+
+        def embed(text):
+            threads.append(threading.get_ident())
+            return embedder(text)
+
+        embed.name, embed.dim = embedder.name, embedder.dim
+        client = AsyncModelClient(semantic_cache=SemanticCache(embedder=embed))
+        client._agenerate_with_meta = AsyncMock(return_value=(json.dumps(sample_response_data), {}))
+
+        async def run():
+            await FeedbackService(client).enhance(TEXT)
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        assert len(threads) == 1
+        assert threads[0] != loop_thread
+        assert len(client.semantic_cache) == 1
+
+    def test_rate_limited(self, sample_response_data):
+        """Test that a client over its rate is rejected."""
+        service = _service(sample_response_data, rate_limiter=create_rate_limiter(per_minute=1, burst=1))
+        asyncio.run(service.enhance(TEXT, client_id="a"))
+        with pytest.raises(RateLimitedError):
+            asyncio.run(service.enhance(TEXT, client_id="a"))
+        asyncio.run(service.enhance(TEXT, client_id="b"))
+
+
+class TestEnhanceStream:
+    """Tests for FeedbackService.enhance_stream."""
+
+    def test_preview_partials_then_result(self, sample_response_data):
+        """Test that the preview and partial fields come before the parsed result."""
+        service = _service(sample_response_data)
+        raw = json.dumps(sample_response_data, ensure_ascii=False)
+
+        async def tokens(prompt, max_length=None):
+            for i in range(0, len(raw), 40):
+                yield raw[i:i + 40]
+
+        with patch.object(service.client, "agenerate_stream", tokens):
+            chunks = asyncio.run(_collect(service.enhance_stream(TEXT)))
+
+        assert [done for done, _ in chunks].count(True) == 1
+        assert chunks[-1] == (True, sample_response_data)
+        assert "feedback_aprimorado" in chunks[0][1]
+        # Cached afterwards: the second stream is the result only
+        assert asyncio.run(_collect(service.enhance_stream(TEXT))) == [(True, sample_response_data)]
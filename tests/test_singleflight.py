@@ -0,0 +1,278 @@
+"""
+Tests for single-flight request coalescing
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from core.async_model_client import AsyncModelClient
+from core.model_client import ModelClient
+from core.singleflight import AsyncSingleFlight, SingleFlight, flight_key
+
+
+N_CALLERS = 8
+
+
+class TestSingleFlight:
+    """Tests for the thread-based group."""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that N concurrent callers run the function once."""
+        group = SingleFlight()
+        calls = []
+        barrier = threading.Barrier(N_CALLERS)
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"valor": 1}
+
+        def caller():
+            barrier.wait()
+            return group.do("key", fn)
+
+        with ThreadPoolExecutor(N_CALLERS) as pool:
+            results = list(pool.map(lambda _: caller(), range(N_CALLERS)))
+
+        assert len(calls) == 1
+        assert all(result == {"valor": 1} for result in results)
+
+    def test_errors_propagate_to_followers(self):
+        """Test that every caller sees the leader's exception."""
+        group = SingleFlight()
+        started = threading.Event()
+
+        def fn():
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("falhou")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(group.do, "key", fn)
+            started.wait()
+            follower = pool.submit(group.do, "key", fn)
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+
+    def test_leader_gets_a_copy(self):
+        """Test that the caller running fn cannot alter the object fn stored elsewhere."""
+        group = SingleFlight()
+        stored = {"valor": 1}
+
+        result = group.do("key", lambda: stored)
+        result["valor"] = 2
+
+        assert stored == {"valor": 1}
+
+    def test_sequential_calls_are_not_coalesced(self):
+        """Test that a finished call does not serve later callers."""
+        group = SingleFlight()
+        assert group.do("key", lambda: 1) == 1
+        assert group.do("key", lambda: 2) == 2
+
+    def test_flight_key(self):
+        """Test that keys differ when any parameter differs."""
+        assert flight_key("p", 0.7) == flight_key("p", 0.7)
+        assert flight_key("p", 0.7) != flight_key("p", 0.8)
+
+
+class TestAsyncSingleFlight:
+    """Tests for the asyncio group."""
+
+    def test_do_shares_one_call(self):
+        """Test that N concurrent coroutines await a single call."""
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        async def run():
+            return await asyncio.gather(*(group.do("key", fn) for _ in range(N_CALLERS)))
+
+        assert asyncio.run(run()) == ["ok"] * N_CALLERS
+        assert len(calls) == 1
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        """Test that followers still get the result when the first caller is cancelled."""
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {"text": "ok"}
+
+        async def run():
+            leader = asyncio.ensure_future(group.do("key", fn))
+            await asyncio.sleep(0)
+            followers = [asyncio.ensure_future(group.do("key", fn)) for _ in range(3)]
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            assert leader.cancelled()
+            return results
+
+        assert asyncio.run(run()) == [{"text": "ok"}] * 3
+        assert len(calls) == 1
+
+    def test_stream_replays_chunks_to_every_subscriber(self):
+        """Test that late subscribers receive the chunks they missed."""
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def producer():
+            calls.append(1)
+            for chunk in ["a", "b", "c"]:
+                await asyncio.sleep(0.01)
+                yield chunk
+
+        async def consume():
+            return [chunk async for chunk in group.stream("key", producer)]
+
+        async def run():
+            first = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.015)
+            second = asyncio.ensure_future(consume())
+            return await asyncio.gather(first, second)
+
+        assert asyncio.run(run()) == [["a", "b", "c"], ["a", "b", "c"]]
+        assert len(calls) == 1
+
+    def test_async_leader_gets_a_copy(self):
+        """Test that every async caller, the first included, gets its own copy."""
+        group = AsyncSingleFlight()
+        stored = {"valor": 1}
+
+        async def fn():
+            return stored
+
+        result = asyncio.run(group.do("key", fn))
+        result["valor"] = 2
+
+        assert stored == {"valor": 1}
+
+    def test_stream_cancelled_when_subscribers_leave(self):
+        """Test that the upstream is closed once the last subscriber stops reading."""
+        group = AsyncSingleFlight()
+        read, closed = [], []
+
+        async def producer():
+            try:
+                for i in range(100):
+                    read.append(i)
+                    await asyncio.sleep(0.005)
+                    yield i
+            finally:
+                closed.append(True)
+
+        async def take(n):
+            stream = group.stream("key", producer)
+            chunks = [await stream.__anext__() for _ in range(n)]
+            await stream.aclose()
+            return chunks
+
+        async def run():
+            first = await asyncio.gather(take(1), take(2))
+            await asyncio.sleep(0.05)
+            again = await take(1)
+            await asyncio.sleep(0.01)
+            return first, again
+
+        first, again = asyncio.run(run())
+
+        assert first == [[0], [0, 1]]
+        assert again == [0]
+        assert closed == [True, True]
+        assert len(read) < 10
+
+
+class TestModelClientCoalescing:
+    """Tests that concurrent identical requests reach the model once."""
+
+    @patch('requests.Session.post')
+    def test_sync_enhance(self, mock_post, sample_response_data):
+        """Test that N concurrent enhance() calls issue one upstream request."""
+        def slow_post(*args, **kwargs):
+            time.sleep(0.05)
+            response = Mock(status_code=200)
+            response.json.return_value = [{"generated_text": json.dumps(sample_response_data)}]
+            return response
+
+        mock_post.side_effect = slow_post
+        client = ModelClient()
+        barrier = threading.Barrier(N_CALLERS)
+
+        def caller():
+            barrier.wait()
+            return client.enhance("prompt")
+
+        with ThreadPoolExecutor(N_CALLERS) as pool:
+            results = list(pool.map(lambda _: caller(), range(N_CALLERS)))
+
+        assert mock_post.call_count == 1
+        assert all(r["versao_curta"] == sample_response_data["versao_curta"] for r in results)
+
+    @patch('requests.Session.post')
+    def test_fresh_samples_not_coalesced(self, mock_post):
+        """Test that use_cache=False callers get their own request."""
+        response = Mock(status_code=200)
+        response.json.return_value = [{"generated_text": "{}"}]
+        mock_post.return_value = response
+
+        client = ModelClient()
+        client.enhance("prompt", use_cache=False)
+        client.enhance("prompt", use_cache=False)
+
+        assert mock_post.call_count == 2
+
+    def _async_client(self, body, content_type="application/json"):
+        requests_seen = []
+
+        async def handler(request):
+            requests_seen.append(request)
+            await asyncio.sleep(0.02)
+            return httpx.Response(200, text=body, headers={"Content-Type": content_type})
+
+        client = AsyncModelClient()
+        client._async_session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client, requests_seen
+
+    def test_async_enhance(self, sample_response_data):
+        """Test that N concurrent aenhance() calls issue one upstream request."""
+        body = json.dumps([{"generated_text": json.dumps(sample_response_data)}])
+        client, requests_seen = self._async_client(body)
+
+        async def run():
+            return await asyncio.gather(*(client.aenhance("prompt") for _ in range(N_CALLERS)))
+
+        results = asyncio.run(run())
+
+        assert len(requests_seen) == 1
+        assert len(results) == N_CALLERS
+
+    def test_async_stream(self):
+        """Test that N concurrent streams issue one upstream request."""
+        body = 'data: {"token": {"text": "Olá"}}\n\ndata: {"token": {"text": "!"}}\n\n'
+        client, requests_seen = self._async_client(body, "text/event-stream")
+
+        async def consume():
+            return [token async for token in client.agenerate_stream("prompt")]
+
+        async def run():
+            return await asyncio.gather(*(consume() for _ in range(N_CALLERS)))
+
+        results = asyncio.run(run())
+
+        assert len(requests_seen) == 1
+        assert results == [["Olá", "!"]] * N_CALLERS
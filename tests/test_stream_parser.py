@@ -0,0 +1,137 @@
+"""
+Tests for incremental stream parser module
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+from core.stream_parser import (
+    IncrementalResponseParser,
+    repair_fragment,
+    salvage_response
+)
+
+
+def _chunks(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestRepairFragment:
+    """Tests for truncated value repair."""
+
+    def test_open_string(self):
+        """Test that an unterminated string is closed."""
+        assert repair_fragment('"Sua comunicação pode') == "Sua comunicação pode"
+
+    def test_incomplete_escape(self):
+        """Test that a dangling escape sequence is dropped."""
+        assert repair_fragment('"linha\\') == "linha"
+        assert repair_fragment('"a\\u00') == "a"
+
+    def test_open_object_with_dangling_key(self):
+        """Test that a half-written member is dropped from an object."""
+        assert repair_fragment('{"fato": "F", "impac') == {"fato": "F"}
+
+    def test_open_array(self):
+        """Test that an unterminated list keeps its complete items."""
+        assert repair_fragment('["um", "dois", "tr') == ["um", "dois", "tr"]
+
+    def test_empty(self):
+        """Test that empty fragments cannot be repaired."""
+        assert repair_fragment("  ") is None
+
+
+class TestIncrementalResponseParser:
+    """Tests for IncrementalResponseParser."""
+
+    def test_emits_fields_as_they_complete(self, sample_response_data):
+        """Test that each top-level field is emitted exactly once, in order."""
+        text = "```json\n" + json.dumps(sample_response_data, ensure_ascii=False) + "\n```"
+        parser = IncrementalResponseParser()
+
+        emitted = []
+        for chunk in _chunks(text):
+            emitted.extend(parser.feed(chunk))
+
+        assert [field for field, _ in emitted] == list(sample_response_data)
+        assert dict(emitted) == sample_response_data
+        assert parser.complete
+        assert parser.finish() == sample_response_data
+
+    def test_field_available_before_end(self, sample_response_data):
+        """Test that the first field is emitted before the stream ends."""
+        text = json.dumps(sample_response_data)
+        parser = IncrementalResponseParser()
+        end = text.index('"versao_curta"')
+
+        emitted = parser.feed(text[:end])
+
+        assert emitted == [("feedback_aprimorado", sample_response_data["feedback_aprimorado"])]
+        assert not parser.complete
+
+    def test_partial_includes_value_in_progress(self):
+        """Test that partial() exposes the text generated so far."""
+        parser = IncrementalResponseParser()
+        parser.feed('{"feedback_aprimorado": "Sua comuni')
+
+        assert parser.partial() == {"feedback_aprimorado": "Sua comuni"}
+
+    def test_partial_at_every_prefix(self, sample_response_data):
+        """Test that previews built from the parser's state match a full rescan."""
+        text = json.dumps({**sample_response_data, "observacoes": 'a\\b "c" \u00e9 {d}'}, ensure_ascii=False)
+        parser = IncrementalResponseParser()
+
+        for end in range(1, len(text) + 1):
+            parser.feed(text[end - 1])
+            pending = parser.pending()
+            if pending is not None:
+                assert pending[1] == repair_fragment(parser.buffer[parser._mark:])
+
+        assert parser.finish() == json.loads(text)
+
+    def test_partial_does_not_rescan(self):
+        """Test that a preview reuses the scan state instead of rescanning the value."""
+        parser = IncrementalResponseParser()
+        parser.feed('{"fato_impacto_sugestao": {"fato": "F", "impacto": "Sua comuni')
+
+        with patch("core.stream_parser._scan", side_effect=AssertionError("rescan")):
+            assert parser.partial() == {"fato_impacto_sugestao": {"fato": "F", "impacto": "Sua comuni"}}
+
+    def test_braces_inside_strings(self):
+        """Test that structural characters inside strings are ignored."""
+        parser = IncrementalResponseParser()
+        parser.feed('{"observacoes": "use {chaves}, [listas] e \\"aspas\\"", "versao_curta": "x"}')
+
+        assert parser.finish() == {"observacoes": 'use {chaves}, [listas] e "aspas"', "versao_curta": "x"}
+
+    def test_truncated_output_is_recovered(self, sample_response_data):
+        """Test that output cut mid-list keeps everything generated."""
+        text = json.dumps(sample_response_data, ensure_ascii=False)
+        cut = text.index("Usar ferramentas") + 5
+        parser = IncrementalResponseParser()
+        parser.feed(text[:cut])
+
+        result = parser.finish()
+        assert result["feedback_aprimorado"] == sample_response_data["feedback_aprimorado"]
+        assert result["fato_impacto_sugestao"] == sample_response_data["fato_impacto_sugestao"]
+        assert result["sugestoes_extras"] == ["Agendar reuniões regulares de alinhamento", "Usar "]
+        assert result["_meta"] == {"truncated": True}
+
+    def test_no_object(self):
+        """Test that text without an object yields nothing."""
+        parser = IncrementalResponseParser()
+        parser.feed("Desculpe, não consigo ajudar.")
+        assert parser.finish() is None
+
+
+class TestSalvageResponse:
+    """Tests for salvage_response."""
+
+    def test_trailing_text(self):
+        """Test that text after the object does not break parsing."""
+        result = salvage_response('{"versao_curta": "ok"} Espero ter ajudado!')
+        assert result == {"versao_curta": "ok"}
+
+    def test_unknown_fields_rejected(self):
+        """Test that objects without any known field are not salvaged."""
+        assert salvage_response('{"foo": 1') is None
@@ -0,0 +1,104 @@
+"""
+Tests for the fallback text normalizer
+"""
+
+import random
+import re
+
+import pytest
+from core.text_normalizer import (
+    DEFAULT_REPLACEMENTS,
+    TextNormalizer,
+    load_replacements,
+    match_case
+)
+
+
+@pytest.fixture
+def normalizer():
+    return TextNormalizer(load_replacements())
+
+
+class TestLoadReplacements:
+    """Tests for the dictionary file."""
+
+    def test_shipped_dictionary(self):
+        """Test that the shipped dictionary covers the original forms."""
+        replacements = load_replacements()
+        assert len(replacements) > len(DEFAULT_REPLACEMENTS)
+        for informal, formal in DEFAULT_REPLACEMENTS.items():
+            assert replacements[informal] == formal
+
+    def test_parses_tsv(self, tmp_path):
+        """Test comments, blank lines, malformed lines and key lowercasing."""
+        path = tmp_path / "dict.tsv"
+        path.write_text("# comentário\n\nVLW\tobrigado\nsem tab\nfds\tfim de semana\n", encoding="utf-8")
+        assert load_replacements(path) == {"vlw": "obrigado", "fds": "fim de semana"}
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        """Test that a missing file falls back to the built-in forms."""
+        assert load_replacements(tmp_path / "missing.tsv") == DEFAULT_REPLACEMENTS
+
+
+class TestTextNormalizer:
+    """Tests for TextNormalizer."""
+
+    def test_whole_words_only(self, normalizer):
+        """Test that forms inside other words are left alone."""
+        assert normalizer.replace("ta tata está ta") == "está tata está está"
+
+    def test_preserves_case(self, normalizer):
+        """Test that replacements follow the case of the original word."""
+        assert normalizer.replace("vc Vc VC") == "você Você VOCÊ"
+
+    def test_punctuation_and_whitespace_kept(self, normalizer):
+        """Test that punctuation around words and the original spacing survive."""
+        text = "(vc)  pq?\n“tbm”, hj!"
+        assert normalizer.replace(text) == "(você)  porque?\n“também”, hoje!"
+
+    def test_accented_keys(self, normalizer):
+        """Test keys with accents that share the same ASCII shadow."""
+        assert normalizer.replace("tá bom, tô indo") == "está bom, estou indo"
+
+    def test_unicode_lowercase_expansion(self, normalizer):
+        """Test texts whose lowercase form is longer than the original."""
+        assert normalizer.replace("İstanbul vc") == "İstanbul você"
+
+    def test_underscore_is_a_word_character(self, normalizer):
+        """Test that words joined by "_" are left alone."""
+        assert normalizer.replace("nome_vc vc_nome vc_") == "nome_vc vc_nome vc_"
+
+    @pytest.mark.parametrize("separator", ["\xa0", "\u2009", "\u200b", "\u200d", "€", "\x0b"])
+    def test_unicode_separators(self, normalizer, separator):
+        """Test that any character outside \\w ends a word."""
+        text = f"vc{separator}precisa"
+        assert normalizer.replace(text) == f"você{separator}precisa"
+
+    def test_matches_regex_reference(self, normalizer):
+        """Test random texts against a \\b\\w+\\b substitution."""
+        def reference(text):
+            def substitute(match):
+                word = match.group(0)
+                replacement = normalizer.replacements.get(word.lower())
+                return word if replacement is None else match_case(word, replacement)
+            return re.sub(r"\b\w+\b", substitute, text)
+
+        pieces = ["vc", "Vc", "TB", "tá", "to", "nao", "eh", "é", "ç", "x", "1", "_",
+                  " ", "?", ".", "\n", "\xa0", "\u2009", "\u200d", "“", "\u0301", "🙂"]
+        rng = random.Random(15)
+        for _ in range(2000):
+            # Long texts take the dense path, short ones the find path
+            text = "".join(rng.choices(pieces, k=rng.choice((3, 20, 400))))
+            assert normalizer.replace(text) == reference(text), repr(text)
+
+    def test_normalize(self, normalizer):
+        """Test capitalization of the first letter and final punctuation."""
+        assert normalizer.normalize("  vc precisa ver o João ") == "Você precisa ver o João."
+        assert normalizer.normalize("tudo certo?") == "Tudo certo?"
+        assert normalizer.normalize("") == ""
+        assert normalizer.normalize("   ") == ""
+
+    def test_large_dictionary(self):
+        """Test that thousands of entries are handled."""
+        replacements = {f"gir{i}": f"giria {i}" for i in range(5000)}
+        assert TextNormalizer(replacements).replace("a gir4999 b") == "a giria 4999 b"
@@ -0,0 +1,64 @@
+"""
+Tests for token accounting and generation budgets
+"""
+
+import pytest
+from core.token_budget import (
+    OUTPUT_BASE_TOKENS,
+    PromptTooLongError,
+    TokenBudget,
+    estimate_tokens,
+    get_token_counter
+)
+
+
+class TestTokenCounting:
+    """Tests for the token counters."""
+
+    def test_estimate_counts_utf8_bytes(self):
+        """Test that the estimate uses bytes, so accented text counts more."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abc") == 1
+        assert estimate_tokens("ação" * 3) > estimate_tokens("acao" * 3)
+
+    def test_missing_tokenizer_falls_back_to_estimate(self, tmp_path):
+        """Test that an unavailable tokenizer yields the byte estimate."""
+        assert get_token_counter(str(tmp_path / "missing.json")) is estimate_tokens
+
+
+class TestTokenBudget:
+    """Tests for TokenBudget."""
+
+    def test_output_grows_with_feedback(self):
+        """Test that short drafts get small budgets and long ones larger, capped."""
+        budget = TokenBudget(max_new_tokens=2000, min_new_tokens=100, counter=len)
+
+        assert budget.output_tokens(0) == OUTPUT_BASE_TOKENS
+        assert budget.output_tokens(100) < budget.output_tokens(500)
+        assert budget.output_tokens(10_000) == 2000
+
+    def test_plan_is_capped_by_context(self):
+        """Test that the response budget never exceeds the room left."""
+        budget = TokenBudget(context_window=1000, min_new_tokens=100, counter=len)
+
+        assert budget.plan(prompt_tokens=850, feedback_tokens=300) == 150
+        with pytest.raises(PromptTooLongError):
+            budget.plan(prompt_tokens=950, feedback_tokens=300)
+
+    def test_max_feedback_tokens_fits_full_budget(self):
+        """Test that the feedback limit leaves room for the response it needs."""
+        budget = TokenBudget(context_window=4096, max_new_tokens=4096, counter=len)
+        overhead = 900
+        limit = budget.max_feedback_tokens(overhead)
+
+        assert overhead + limit + budget.output_tokens(limit) <= budget.context_window
+        assert overhead + limit + 1 + budget.output_tokens(limit + 1) > budget.context_window - 3
+
+    def test_count_prefix_is_remembered(self):
+        """Test that the static prefix is counted once."""
+        calls = []
+        budget = TokenBudget(counter=lambda text: calls.append(text) or len(text))
+
+        assert budget.count_prefix("prefixo") == 7
+        assert budget.count_prefix("prefixo") == 7
+        assert calls == ["prefixo"]
@@ -8,6 +8,9 @@ from core.validators import (
     validate_feedback_type,
     validate_tone,
     validate_formality,
+    validate_many,
+    validate_row,
+    sanitize_many,
     sanitize_text
 )
 
@@ -84,6 +87,13 @@ class TestValidateFeedbackType:
         assert error is not None
         assert "inválido" in error.lower() or "invalid" in error.lower()
 
+    @pytest.mark.parametrize("value", [["geral"], {"geral": 1}])
+    def test_unhashable_type(self, value):
+        """Test that a list or dict is reported as an invalid choice."""
+        is_valid, error = validate_feedback_type(value)
+        assert is_valid is False
+        assert error is not None
+
 
 class TestValidateTone:
     """Tests for tone validation."""
@@ -102,6 +112,13 @@ class TestValidateTone:
         assert is_valid is False
         assert error is not None
 
+    @pytest.mark.parametrize("value", [["direto"], {"direto": 1}])
+    def test_unhashable_tone(self, value):
+        """Test that a list or dict is reported as an invalid choice."""
+        is_valid, error = validate_tone(value)
+        assert is_valid is False
+        assert error is not None
+
 
 class TestValidateFormality:
     """Tests for formality validation."""
@@ -120,6 +137,13 @@ class TestValidateFormality:
         assert is_valid is False
         assert error is not None
 
+    @pytest.mark.parametrize("value", [["formal"], {"formal": 1}])
+    def test_unhashable_formality(self, value):
+        """Test that a list or dict is reported as an invalid choice."""
+        is_valid, error = validate_formality(value)
+        assert is_valid is False
+        assert error is not None
+
 
 class TestSanitizeText:
     """Tests for text sanitization."""
@@ -153,3 +177,64 @@ class TestSanitizeText:
         """Test sanitization of whitespace-only text."""
         result = sanitize_text("   \n\t  ")
         assert result == ""
+
+
+class TestValidateMany:
+    """Tests for bulk row validation."""
+
+    def test_structured_errors(self):
+        """Test that every failed check is reported in field order."""
+        result = validate_row({"feedback_text": "curto", "tone": "rude", "formality": "gíria"}, index=3)
+        assert result.index == 3
+        assert result.valid is False
+        assert [(e.field, e.code) for e in result.errors] == [
+            ("feedback_text", "too_short"), ("tone", "invalid_choice"), ("formality", "invalid_choice")
+        ]
+        assert result.errors[0].message == validate_feedback_text("curto")[1]
+
+    def test_unhashable_options(self):
+        """Test that list and dict options are invalid choices rather than errors."""
+        result = validate_row({
+            "feedback_text": "Um feedback válido o bastante.",
+            "feedback_type": ["geral"],
+            "tone": {"direto": 1},
+            "formality": ["formal"]
+        })
+        assert [(e.field, e.code) for e in result.errors] == [
+            ("feedback_type", "invalid_choice"), ("tone", "invalid_choice"), ("formality", "invalid_choice")
+        ]
+
+    def test_defaults_and_plain_texts(self):
+        """Test that missing or empty options are valid and plain strings are accepted."""
+        rows = [
+            {"feedback_text": "Um feedback válido o bastante.", "feedback_type": ""},
+            "Outro feedback válido o bastante.",
+            123,
+        ]
+        results = list(validate_many(rows))
+        assert [r.index for r in results] == [0, 1, 2]
+        assert [r.valid for r in results] == [True, True, False]
+        assert results[2].errors[0].code == "not_string"
+
+    def test_lazy(self):
+        """Test that rows are validated as they are consumed."""
+        consumed = []
+
+        def rows():
+            for text in ("Primeiro feedback válido.", "curto"):
+                consumed.append(text)
+                yield text
+
+        results = validate_many(rows())
+        assert next(results).valid is True
+        assert consumed == ["Primeiro feedback válido."]
+
+
+class TestSanitizeMany:
+    """Tests for bulk sanitization."""
+
+    def test_matches_sanitize_text(self):
+        """Test that results match sanitize_text, in order."""
+        texts = ["  Texto   limpo.  ", "Linha 1\n\n \tLinha 2", None, "Já limpo."]
+        assert list(sanitize_many(texts)) == [sanitize_text(t) for t in texts]
+        assert list(sanitize_many(texts))[2] == ""